@@ -0,0 +1,181 @@
+import functools
+import hashlib
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from tasks.conditional import conditional_response, set_validator_headers
+
+# Форматы файла схемы: расширение в URL /swagger<ext> -> тип содержимого и кодек drf_yasg
+SCHEMA_FORMATS = {
+    '.json': ('application/json; charset=utf-8', 'OpenAPICodecJson'),
+    '.yaml': ('application/yaml; charset=utf-8', 'OpenAPICodecYaml'),
+}
+SCHEMA_FILE_NAME = 'openapi'
+
+SchemaArtifact = namedtuple('SchemaArtifact', ['content', 'content_type', 'etag'])
+
+# Описание API для OpenAPI схемы drf_yasg
+SCHEMA_DESCRIPTION = """
+        REST API для управления задачами.
+        
+        ## Основные возможности:
+        - Создание, чтение, обновление и удаление задач
+        - Фильтрация и поиск задач
+        - Пагинация результатов
+        - Дополнительные действия (завершение, активация задач)
+        
+        ## Модель задачи:
+        - **id**: Уникальный идентификатор (автоматически)
+        - **title**: Назвние задачи (обязательное поле)
+        - **status**: Состояние задачи (active/completed)
+        - **created_at**: Дата и время создания
+        - **updated_at**: Дата и время последнего обновления
+        """
+
+
+def get_schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Tasks API",
+        default_version='v1',
+        description=SCHEMA_DESCRIPTION,
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@tasks.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema():
+    """Построение схемы OpenAPI (обход TaskViewSet, сериализаторов и TaskFilter)"""
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    return OpenAPISchemaGenerator(get_schema_info()).get_schema(request=None, public=True)
+
+
+@functools.cache
+def get_cached_schema():
+    """Схема, построенная один раз на процесс"""
+    return generate_schema()
+
+
+def encode_schema(schema, extension):
+    """Схема в байтах JSON или YAML"""
+    from drf_yasg import codecs
+
+    codec = getattr(codecs, SCHEMA_FORMATS[extension][1])
+    return codec(validators=[]).encode(schema)
+
+
+def get_schema_path(extension):
+    return Path(settings.TASKS_SCHEMA['DIR']) / f'{SCHEMA_FILE_NAME}{extension}'
+
+
+def write_schema_files(directory=None):
+    """Запись файлов схемы во всех форматах, возвращает список путей"""
+    directory = Path(directory or settings.TASKS_SCHEMA['DIR'])
+    directory.mkdir(parents=True, exist_ok=True)
+    schema = generate_schema()
+    paths = []
+    for extension in SCHEMA_FORMATS:
+        path = directory / f'{SCHEMA_FILE_NAME}{extension}'
+        path.write_bytes(encode_schema(schema, extension))
+        paths.append(path)
+    return paths
+
+
+@functools.cache
+def get_schema_artifact(extension):
+    """
+    Схема для /swagger.json и /swagger.yaml: файл из build_openapi_schema, если
+    он есть, иначе копия в памяти, построенная при первом запросе. ETag - хэш
+    содержимого, одинаковый у всех процессов с тем же файлом.
+    """
+    path = get_schema_path(extension)
+    content = path.read_bytes() if path.is_file() else encode_schema(get_cached_schema(), extension)
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    return SchemaArtifact(content, SCHEMA_FORMATS[extension][0], etag)
+
+
+def reset_schema_cache(*, setting, **kwargs):
+    if setting == 'TASKS_SCHEMA':
+        get_cached_schema.cache_clear()
+        get_schema_artifact.cache_clear()
+
+
+setting_changed.connect(reset_schema_cache)
+
+
+def get_schema_generator_class():
+    """
+    Генератор для представлений drf_yasg: в режиме LIVE строит схему на каждый
+    запрос, иначе отдает схему, построенную один раз на процесс.
+    """
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    class CachedSchemaGenerator(OpenAPISchemaGenerator):
+        def get_schema(self, request=None, public=False):
+            if settings.TASKS_SCHEMA['LIVE']:
+                return super().get_schema(request, public)
+            return get_cached_schema()
+
+    return CachedSchemaGenerator
+
+
+@functools.cache
+def get_schema_view():
+    """
+    Класс представления схемы drf_yasg. drf_yasg импортируется и представление
+    создается при первом обращении к документации, а не при загрузке urls.
+    """
+    from drf_yasg.views import get_schema_view as get_yasg_schema_view
+    from rest_framework import permissions
+
+    return get_yasg_schema_view(
+        get_schema_info(),
+        public=True,
+        generator_class=get_schema_generator_class(),
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@functools.cache
+def get_schema_ui_view(renderer=None):
+    """Представление схемы (renderer=None) или UI ('swagger', 'redoc') с кэшем ответа"""
+    schema_view = get_schema_view()
+    cache_timeout = settings.TASKS_SCHEMA_CACHE_TIMEOUT
+    if renderer is None:
+        return schema_view.without_ui(cache_timeout=cache_timeout)
+    return schema_view.with_ui(renderer, cache_timeout=cache_timeout)
+
+
+@require_safe
+def schema_file_view(request, format):
+    """
+    /swagger.json и /swagger.yaml: готовые байты схемы с ETag (304 по If-None-Match).
+    В режиме LIVE (по умолчанию при DEBUG) - схема drf_yasg, построенная на запрос.
+    """
+    if settings.TASKS_SCHEMA['LIVE']:
+        return get_schema_ui_view()(request, format=format)
+    artifact = get_schema_artifact(format)
+    validators = {'etag': artifact.etag, 'last_modified': None}
+    response = conditional_response(request, validators)
+    if response is None:
+        response = set_validator_headers(
+            HttpResponse(artifact.content, content_type=artifact.content_type), validators
+        )
+    patch_cache_control(response, public=True, max_age=settings.TASKS_SCHEMA_CACHE_TIMEOUT)
+    return response
+
+
+def lazy_schema_view(renderer=None):
+    """Функция для urlpatterns, создающая представление схемы при первом запросе"""
+    def view(request, *args, **kwargs):
+        return get_schema_ui_view(renderer)(request, *args, **kwargs)
+    return view
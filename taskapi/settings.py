@@ -2,6 +2,7 @@
 
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 
@@ -17,6 +18,14 @@ DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',') if os.getenv('ALLOWED_HOSTS') else []
 
+# Профиль приложения: 'full' - API, админка, документация (drf_yasg) и browsable API;
+# 'api' - только JSON API без admin, sessions, messages, staticfiles и drf_yasg,
+# их middleware и маршрутов (быстрее холодный старт и меньше память воркера)
+TASKAPI_PROFILE = os.getenv('TASKAPI_PROFILE', 'full')
+if TASKAPI_PROFILE not in ('full', 'api'):
+    raise ImproperlyConfigured(f"TASKAPI_PROFILE: ожидается 'full' или 'api', получено {TASKAPI_PROFILE!r}")
+API_ONLY = TASKAPI_PROFILE == 'api'
+
 
 
 INSTALLED_APPS = [
@@ -35,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.PerformanceMiddleware',
+    'tasks.middleware.QueryBudgetMiddleware',
+    'tasks.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +56,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Приложения и middleware, которые не нужны профилю api
+API_PROFILE_EXCLUDED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_yasg',
+]
+API_PROFILE_EXCLUDED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_PROFILE_EXCLUDED_APPS]
+    MIDDLEWARE = [name for name in MIDDLEWARE if name not in API_PROFILE_EXCLUDED_MIDDLEWARE]
+
 ROOT_URLCONF = 'taskapi.urls'
 
 TEMPLATES = [
@@ -55,8 +85,10 @@ TEMPLATES = [
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
+                *([] if API_ONLY else [
+                    'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                ]),
             ],
         },
     },
@@ -66,13 +98,62 @@ WSGI_APPLICATION = 'taskapi.wsgi.application'
 
 
 
+# Профиль SQLite для конкурентной нагрузки (SQLITE_TUNED): WAL (чтения не ждут записи),
+# synchronous=NORMAL, ожидание блокировки вместо "database is locked", mmap и кэш страниц.
+# Прагмы выполняются при каждом подключении (OPTIONS init_command), транзакции
+# начинаются с BEGIN IMMEDIATE, соединения переиспользуются CONN_MAX_AGE секунд.
+# Включается явно: WAL переводит файл БД в другой режим журнала (файлы -wal и -shm),
+# а постоянные соединения остаются открытыми между запросами
+SQLITE_TUNED = os.getenv('SQLITE_TUNED', 'False') == 'True'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Отрицательное значение - размер в КиБ (64 МиБ на соединение)
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),
+    'temp_store': 'MEMORY',
+}
+
+# DATABASE_PATH - файл SQLite (по умолчанию db.sqlite3 в корне проекта)
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Реплики для чтения: DATABASE_REPLICAS - пути к файлам SQLite через запятую
+# (локальная проверка, копии обновляет manage.py sync_sqlite_replicas). Для PostgreSQL
+# реплики добавляются в DATABASES, а их алиасы - в TASKS_REPLICA_DATABASES
+DATABASE_REPLICAS = [path for path in os.getenv('DATABASE_REPLICAS', '').split(',') if path]
+
+if SQLITE_TUNED:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+
+for number, path in enumerate(DATABASE_REPLICAS, start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        # В тестах реплика - та же тестовая БД
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Алиасы реплик для tasks.routers.ReplicaRouter: на них идут чтения list, retrieve,
+# active и completed; после записи клиент TASKS_REPLICA_PIN_SECONDS секунд читает
+# из default (cookie ReplicaPinningMiddleware)
+TASKS_REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+TASKS_REPLICA_PIN_SECONDS = int(os.getenv('TASKS_REPLICA_PIN_SECONDS', '5'))
+
+DATABASE_ROUTERS = ['tasks.routers.ReplicaRouter']
+
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,15 +197,15 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.SearchFilter',
-        'rest_framework.filters.OrderingFilter',
+        'tasks.filters.TaskSearchFilter',
+        'tasks.filters.TaskOrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'tasks.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'tasks.parsers.FastJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -138,6 +219,130 @@ REST_FRAMEWORK = {
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 }
 
+if API_ONLY:
+    # Без browsable API (шаблоны, формы) и сессий
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['tasks.renderers.FastJSONRenderer']
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = []
+
+# Максимальное количество элементов в одном пакетном запросе /api/tasks/bulk/
+TASKS_BULK_MAX_ITEMS = int(os.getenv('TASKS_BULK_MAX_ITEMS', '1000'))
+
+# Быстрая сериализация списков (list, active, completed) из values_list
+# без экземпляров модели; формат ответа совпадает с TaskSerializer
+TASKS_FAST_LIST_SERIALIZER = os.getenv('TASKS_FAST_LIST_SERIALIZER', 'True') == 'True'
+
+# Размер порции строк, читаемых из БД при потоковой выгрузке /api/tasks/export/
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# Бэкенд поиска по названию: 'simple' (icontains) или 'fulltext'
+# (FTS5 в SQLite, tsvector в PostgreSQL, индекс создается миграцией 0003)
+TASKS_SEARCH_BACKEND = os.getenv('TASKS_SEARCH_BACKEND', 'simple')
+
+# Асинхронные обработчики основных эндпоинтов задач (tasks.async_views)
+# для запуска под ASGI-сервером; под WSGI выгоды не дают
+TASKS_ASYNC_VIEWS = os.getenv('TASKS_ASYNC_VIEWS', 'False') == 'True'
+
+# Библиотека JSON для рендерера и парсера API: 'auto' (orjson, затем msgspec,
+# затем stdlib), 'orjson', 'msgspec' или 'stdlib'; без библиотеки - stdlib
+TASKS_JSON_BACKEND = os.getenv('TASKS_JSON_BACKEND', 'auto')
+
+# ?count=estimate: время жизни кэша точных COUNT(*) по фильтрам (секунды) и порог,
+# ниже которого оценка планировщика PostgreSQL заменяется точным подсчетом
+TASKS_COUNT_CACHE_TTL = int(os.getenv('TASKS_COUNT_CACHE_TTL', '60'))
+TASKS_COUNT_EXACT_THRESHOLD = int(os.getenv('TASKS_COUNT_EXACT_THRESHOLD', '1000'))
+
+# Запись через очередь единственного писателя (tasks.sqlite.run_write) на SQLite:
+# записи потоков одного процесса выполняются по очереди без конкуренции за блокировку
+TASKS_SQLITE_WRITE_QUEUE = os.getenv('TASKS_SQLITE_WRITE_QUEUE', 'False') == 'True'
+
+# Метрики запросов (tasks.middleware.PerformanceMiddleware): заголовок Server-Timing,
+# строка JSON в логгере tasks.perf на уровне DEBUG (TASKS_PERF_LOG_LEVEL), журнал запросов к БД дольше SLOW_QUERY_MS
+# и гистограммы в формате Prometheus на /metrics.
+# Server-Timing раскрывает клиентам время и количество запросов к БД, поэтому
+# по умолчанию включен только при DEBUG. /metrics выключен по умолчанию
+# (METRICS_ENABLED): за обратным прокси на том же хосте REMOTE_ADDR всегда
+# 127.0.0.1, и проверка METRICS_ALLOWED_IPS пропускает любого клиента. Включать,
+# только если прокси не пропускает путь /metrics и сборщик обращается к серверу приложения напрямую
+TASKS_PERF = {
+    'ENABLED': os.getenv('TASKS_PERF_ENABLED', 'True') == 'True',
+    'SERVER_TIMING': os.getenv('TASKS_PERF_SERVER_TIMING', str(DEBUG)) == 'True',
+    'SLOW_QUERY_MS': float(os.getenv('TASKS_PERF_SLOW_QUERY_MS', '100')),
+    'METRICS_ENABLED': os.getenv('TASKS_PERF_METRICS_ENABLED', 'False') == 'True',
+    'METRICS_ALLOWED_IPS': os.getenv('TASKS_PERF_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(','),
+}
+
+# Бюджет запросов к БД на HTTP запрос (tasks.middleware.QueryBudgetMiddleware):
+# max_queries объявляется декоратором @query_budget у действий TaskViewSet,
+# MAX_REPEATS - сколько запросов одной формы допустимо (больше - признак N+1).
+# MODE: 'warn' - предупреждение в логгере tasks.perf, 'raise' - исключение
+TASKS_QUERY_BUDGET = {
+    'ENABLED': os.getenv('TASKS_QUERY_BUDGET_ENABLED', str(DEBUG)) == 'True',
+    'MODE': os.getenv('TASKS_QUERY_BUDGET_MODE', 'warn'),
+    'MAX_REPEATS': int(os.getenv('TASKS_QUERY_BUDGET_MAX_REPEATS', '3')),
+}
+
+# Кэш ответов списка и деталей задач, сбрасывается при любой записи (после фиксации).
+# Выключен по умолчанию: LocalMemoryBackend - кэш одного процесса, при нескольких
+# воркерах запись в одном не сбрасывает кэш других. Для нескольких процессов:
+# BACKEND = 'tasks.cache.DjangoCacheBackend', OPTIONS = {'alias': 'default'}
+# (alias из CACHES, например Redis)
+TASKS_CACHE = {
+    'ENABLED': os.getenv('TASKS_CACHE_ENABLED', 'False') == 'True',
+    'BACKEND': os.getenv('TASKS_CACHE_BACKEND', 'tasks.cache.LocalMemoryBackend'),
+    'TTL': int(os.getenv('TASKS_CACHE_TTL', '30')),
+    'MAX_ENTRIES': int(os.getenv('TASKS_CACHE_MAX_ENTRIES', '1024')),
+    'OPTIONS': {},
+}
+
+# Лента изменений /api/tasks/changes/?since=<token>: размер порции по умолчанию
+# и максимальный (?limit=), задержка, после которой изменение попадает в ленту
+# (запись может зафиксироваться позже соседней с большим updated_at; транзакция
+# дольше SETTLE_SECONDS может быть пропущена - окно должно быть больше самой
+# долгой транзакции записи задач, включая пакеты импорта), и срок
+# хранения записей об удалении - токен старше него получает 410 Gone
+TASKS_CHANGES = {
+    'BATCH_SIZE': int(os.getenv('TASKS_CHANGES_BATCH_SIZE', '500')),
+    'MAX_BATCH_SIZE': int(os.getenv('TASKS_CHANGES_MAX_BATCH_SIZE', '1000')),
+    'SETTLE_SECONDS': float(os.getenv('TASKS_CHANGES_SETTLE_SECONDS', '1')),
+    'TOMBSTONE_RETENTION_DAYS': int(os.getenv('TASKS_CHANGES_TOMBSTONE_RETENTION_DAYS', '30')),
+}
+
+# Заголовок Idempotency-Key у POST /api/tasks/, /complete/ и /activate/ (tasks.idempotency):
+# ответ сохраняется в той же транзакции, что и запись задачи, повтор с тем же ключом
+# в течение TTL_HOURS получает сохраненный ответ
+TASKS_IDEMPOTENCY = {
+    'ENABLED': os.getenv('TASKS_IDEMPOTENCY_ENABLED', 'True') == 'True',
+    'TTL_HOURS': int(os.getenv('TASKS_IDEMPOTENCY_TTL_HOURS', '24')),
+}
+
+# Отложенное создание задач (tasks.write_behind): POST /api/tasks/ с заголовком
+# Prefer: respond-async проверяется и ставится в очередь процесса, ответ 202 с ключом.
+# Фоновый поток пишет очередь одним bulk_create каждые FLUSH_MS мс или по BATCH_SIZE
+# задач; при MAX_PENDING задачах в очереди новые запросы получают 503. Состояние
+# ключей (pending, failed) хранится STATE_TTL секунд в CACHES[CACHE]: при нескольких
+# процессах нужен общий кэш (Redis, Memcached), иначе опрос ключа в другом процессе - 404
+TASKS_WRITE_BEHIND = {
+    'ENABLED': os.getenv('TASKS_WRITE_BEHIND_ENABLED', 'False') == 'True',
+    'FLUSH_MS': int(os.getenv('TASKS_WRITE_BEHIND_FLUSH_MS', '20')),
+    'BATCH_SIZE': int(os.getenv('TASKS_WRITE_BEHIND_BATCH_SIZE', '500')),
+    'MAX_PENDING': int(os.getenv('TASKS_WRITE_BEHIND_MAX_PENDING', '10000')),
+    'CACHE': os.getenv('TASKS_WRITE_BEHIND_CACHE', 'default'),
+    'STATE_TTL': int(os.getenv('TASKS_WRITE_BEHIND_STATE_TTL', '86400')),
+}
+
+# Время кэширования ответов /swagger.json, /swagger/, /redoc/ и /api/docs/ (секунды,
+# 0 - без кэша); схема строится при первом обращении (taskapi.schema)
+TASKS_SCHEMA_CACHE_TIMEOUT = int(os.getenv('TASKS_SCHEMA_CACHE_TIMEOUT', '0' if DEBUG else '3600'))
+
+# OpenAPI схема для /swagger.json и /swagger.yaml: файлы DIR/openapi.json и openapi.yaml
+# из команды build_openapi_schema (при сборке) отдаются из памяти с ETag, без файлов
+# схема строится один раз при первом запросе. LIVE (по умолчанию при DEBUG) - схема
+# строится на каждый запрос, как при разработке
+TASKS_SCHEMA = {
+    'DIR': Path(os.getenv('TASKS_SCHEMA_DIR', str(BASE_DIR / 'openapi'))),
+    'LIVE': os.getenv('TASKS_SCHEMA_LIVE', str(DEBUG)) == 'True',
+}
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Basic': {
@@ -158,9 +363,46 @@ SWAGGER_SETTINGS = {
     'DOC_EXPANSION': 'none',
     'DEEP_LINKING': True,
     'SHOW_EXTENSIONS': True,
-    'DEFAULT_MODEL_RENDERING': 'example'
+    'DEFAULT_MODEL_RENDERING': 'example',
+    # UI загружает схему с /swagger.json (готовый файл схемы) вместо ?format=openapi
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+# Журнал (tasks.log): записи из запроса кладутся в очередь, консоль и файл пишет
+# фоновый поток пачками с одним flush на пачку (ASYNC=False - запись в потоке запроса).
+# Под нагрузкой (очередь заполнена больше чем на SHED_AT) записи DEBUG/INFO
+# сохраняются с вероятностью SAMPLE_RATE. FORMAT: 'text' или 'json' (строка JSON
+# на запись), ROTATION файла: 'size' (MAX_BYTES) или 'time' (каждую полночь)
+TASKS_LOG = {
+    'ASYNC': os.getenv('TASKS_LOG_ASYNC', 'True') == 'True',
+    'FORMAT': os.getenv('TASKS_LOG_FORMAT', 'text'),
+    'ROTATION': os.getenv('TASKS_LOG_ROTATION', 'size'),
+    'MAX_BYTES': int(os.getenv('TASKS_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+    'BACKUP_COUNT': int(os.getenv('TASKS_LOG_BACKUP_COUNT', '5')),
+    'QUEUE_SIZE': int(os.getenv('TASKS_LOG_QUEUE_SIZE', '10000')),
+    'SHED_AT': float(os.getenv('TASKS_LOG_SHED_AT', '0.8')),
+    'SAMPLE_RATE': float(os.getenv('TASKS_LOG_SAMPLE_RATE', '0.1')),
 }
 
+LOG_FILE_HANDLERS = {
+    'size': {
+        'class': 'tasks.log.BatchRotatingFileHandler',
+        'maxBytes': TASKS_LOG['MAX_BYTES'],
+    },
+    'time': {
+        'class': 'tasks.log.BatchTimedRotatingFileHandler',
+        'when': 'midnight',
+        'utc': True,
+    },
+}
+
+# Обработчики логгеров: очередь или напрямую консоль и файл
+LOG_HANDLERS = ['queue'] if TASKS_LOG['ASYNC'] else ['console', 'file']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -173,16 +415,29 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'tasks.log.JSONFormatter',
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            'class': 'tasks.log.BatchStreamHandler',
             'formatter': 'verbose',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            **LOG_FILE_HANDLERS[TASKS_LOG['ROTATION']],
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'backupCount': TASKS_LOG['BACKUP_COUNT'],
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json' if TASKS_LOG['FORMAT'] == 'json' else 'verbose',
+        },
+        'queue': {
+            'class': 'tasks.log.QueueLogHandler',
+            'handlers': ['console', 'file'],
+            'queue_size': TASKS_LOG['QUEUE_SIZE'],
+            'shed_at': TASKS_LOG['SHED_AT'],
+            'sample_rate': TASKS_LOG['SAMPLE_RATE'],
         },
     },
     'root': {
@@ -191,15 +446,20 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': LOG_HANDLERS,
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': False,
         },
         'tasks': {
-            'handlers': ['console', 'file'],
+            'handlers': LOG_HANDLERS,
             'level': 'INFO',
             'propagate': False,
         },
+        'tasks.perf': {
+            'handlers': LOG_HANDLERS,
+            'level': os.getenv('TASKS_PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
 
@@ -6,3 +6,5 @@ class TasksConfig(AppConfig):
     name = 'tasks'
     verbose_name = 'Tasks'
 
+    def ready(self):
+        from . import signals  # noqa: F401
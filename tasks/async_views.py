@@ -0,0 +1,261 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.permissions import SAFE_METHODS, AllowAny
+from rest_framework.response import Response
+
+from .cache import ainvalidate_task_cache, get_task_cache
+from .conditional import (
+    aget_detail_validators, aget_list_validators, conditional_response,
+    get_instance_validators, set_validator_headers,
+)
+from .idempotency import HEADER as IDEMPOTENCY_HEADER
+from .models import Task, TaskStatus
+from .routers import reads_from_primary, replica_reads
+from .search import awarm_search_backend
+from .serializers import TaskListFastSerializer, TaskSerializer
+from .views import TaskViewSet
+from .write_behind import prefers_async
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskView(View):
+    """
+    Асинхронный вариант основных эндпоинтов TaskViewSet для работы под ASGI.
+
+    Запросы к БД выполняются через асинхронный ORM (aget, acreate, aupdate,
+    async for), поэтому обработчик не занимает поток на время запроса.
+    Фильтры, сериализаторы, пагинация, кэш и формат ответов берутся
+    из TaskViewSet, экземпляр которого создается на каждый запрос.
+
+    Остальные случаи отдаются синхронному TaskViewSet через sync_to_async:
+    методы без асинхронного обработчика (OPTIONS, HEAD), browsable API и
+    другие форматы, режим курсора и ?count=, права доступа кроме AllowAny,
+    запросы с Idempotency-Key.
+
+    Подключается в tasks/urls.py настройкой TASKS_ASYNC_VIEWS.
+    """
+
+    view_is_async = True
+    actions = None
+    detail = False
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, actions, detail=False):
+        """Представление для маршрута с отображением HTTP метод -> действие"""
+        extra = dict(getattr(getattr(TaskViewSet, next(iter(actions.values()))), 'kwargs', {}))
+        extra['detail'] = detail
+        sync_view = TaskViewSet.as_view(dict(actions), basename='task', **extra)
+        # Как APIView.as_view: CSRF проверяет SessionAuthentication, а не CsrfViewMiddleware
+        return csrf_exempt(super().as_view(actions=actions, detail=detail, sync_view=sync_view))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.action = self.actions.get(request.method.lower())
+        if self.action is None:
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        viewset = TaskViewSet(
+            basename='task',
+            detail=self.detail,
+            action=self.action,
+            action_map=self.actions,
+            args=args,
+            kwargs=kwargs,
+            format_kwarg=None,
+        )
+        # Как в ViewSet.as_view: методы привязываются к действиям (нужно для заголовка Allow)
+        for method, action in self.actions.items():
+            setattr(viewset, method, getattr(viewset, action))
+        if 'get' in self.actions:
+            viewset.head = viewset.get
+        drf_request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = drf_request
+        viewset.headers = viewset.default_response_headers
+        if not self.is_native(viewset, drf_request):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        self.viewset = viewset
+        use_replica = self.action in viewset.replica_actions and request.method in SAFE_METHODS
+        try:
+            with replica_reads(use_replica):
+                await awarm_search_backend()
+                response = await getattr(self, self.action)(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        response = viewset.finalize_response(drf_request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    def is_native(self, viewset, request):
+        """Можно ли обработать запрос без синхронного TaskViewSet"""
+        if not all(isinstance(permission, AllowAny) for permission in viewset.get_permissions()):
+            # Проверка прав может обращаться к request.user, то есть к сессии в БД
+            return False
+        try:
+            renderer, media_type = viewset.perform_content_negotiation(request)
+        except NotAcceptable:
+            return False
+        if renderer.format != 'json':
+            return False
+        if getattr(getattr(TaskViewSet, self.action), 'idempotent', False) and IDEMPOTENCY_HEADER in request.headers:
+            # Сохранение ответа вместе с записью задачи - в транзакции синхронного действия
+            return False
+        if self.action == 'create' and prefers_async(request):
+            # Отложенное создание (ответ 202) - в синхронном действии
+            return False
+        if not self.detail and (
+            viewset.paginator.is_cursor_mode(request)
+            or request.query_params.get(viewset.paginator.count_query_param)
+        ):
+            return False
+        request.accepted_renderer, request.accepted_media_type = renderer, media_type
+        return True
+
+    async def get_object(self):
+        """Задача по pk из URL с учетом фильтров запроса"""
+        queryset = self.viewset.get_read_queryset()
+        if self.action in ('update', 'partial_update'):
+            # Без select_for_update: блокировку заменяет условный UPDATE в update
+            queryset = self.viewset.filter_queryset(self.viewset.queryset.all())
+        return await aget_object_or_404(queryset, pk=self.kwargs['pk'])
+
+    async def read_response(self, request, handler):
+        """Асинхронный вариант TaskViewSet._read_response"""
+        cache = get_task_cache()
+        key = entry = None
+        if cache is not None:
+            key, entry = await cache.arun(self.cache_lookup, cache, request)
+        if entry is not None:
+            validators = entry['validators']
+        elif self.detail:
+            validators = await aget_detail_validators(self.viewset.get_read_queryset(), self.kwargs['pk'])
+        else:
+            # ?count и режим курсора обрабатывает синхронный TaskViewSet (is_native)
+            validators = await aget_list_validators(self.viewset.get_read_queryset(), request)
+        if validators is not None:
+            not_modified = conditional_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        if entry is not None:
+            response = Response(entry['data'], headers={'X-Cache': 'HIT'})
+        else:
+            cacheable = cache is not None and reads_from_primary()
+            response = Response(await handler(request))
+            if cacheable:
+                await cache.arun(cache.set, key, {'data': response.data, 'validators': validators})
+                response['X-Cache'] = 'MISS'
+        if validators is None:
+            return response
+        return set_validator_headers(response, validators)
+
+    def cache_lookup(self, cache, request):
+        key = cache.make_key(request, self.action, self.kwargs.get('pk'))
+        return key, cache.get(key)
+
+    async def list(self, request, *args, **kwargs):
+        return await self.read_response(request, self.list_data)
+
+    async def active(self, request, *args, **kwargs):
+        return await self.read_response(request, self.list_data)
+
+    async def completed(self, request, *args, **kwargs):
+        return await self.read_response(request, self.list_data)
+
+    async def list_data(self, request):
+        """Страница списка задач: acount и async for по срезу страницы"""
+        queryset = self.viewset.get_read_queryset()
+        if settings.TASKS_FAST_LIST_SERIALIZER:
+            queryset = queryset.values_list(*TaskListFastSerializer.query_fields, named=True)
+            serializer_class = TaskListFastSerializer
+        else:
+            serializer_class = self.viewset.get_serializer
+        paginator = self.viewset.paginator
+        page = await paginator.apaginate_queryset(queryset, request, view=self.viewset)
+        if page is not None:
+            return paginator.get_paginated_response(serializer_class(page, many=True).data).data
+        return serializer_class([row async for row in queryset], many=True).data
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.read_response(request, self.retrieve_data)
+
+    async def retrieve_data(self, request):
+        return self.viewset.get_serializer(await self.get_object()).data
+
+    async def create(self, request, *args, **kwargs):
+        """Создание задачи через acreate"""
+        serializer = self.viewset.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task = await Task.objects.acreate(**serializer.validated_data)
+        logger.info('Создана новая задача: %s - %s', task.id, task.title)
+        return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
+
+    async def update(self, request, *args, partial=False, **kwargs):
+        """
+        Обновление одним UPDATE. С If-Match/If-Unmodified-Since строка
+        обновляется, только если updated_at не изменился с момента чтения,
+        иначе 412 (вместо select_for_update в синхронном варианте).
+        """
+        task = await self.get_object()
+        precondition = conditional_response(request, get_instance_validators(task))
+        if precondition is not None:
+            return precondition
+        serializer = self.viewset.get_serializer(task, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+
+        changes = {**serializer.validated_data, 'updated_at': timezone.now()}
+        conditional = 'HTTP_IF_MATCH' in request.META or 'HTTP_IF_UNMODIFIED_SINCE' in request.META
+        rows = Task.objects.filter(pk=task.pk)
+        if conditional:
+            rows = rows.filter(updated_at=task.updated_at)
+        if not await rows.aupdate(**changes):
+            # Задачу изменили или удалили после чтения
+            if conditional and await Task.objects.filter(pk=task.pk).aexists():
+                return Response(status=status.HTTP_412_PRECONDITION_FAILED)
+            raise Http404(f'No {Task._meta.object_name} matches the given query.')
+        await ainvalidate_task_cache()
+        for field, value in changes.items():
+            setattr(task, field, value)
+        logger.info('Обновлена задача: %s - %s', task.id, task.title)
+
+        response = Response(TaskSerializer(task).data)
+        return set_validator_headers(response, get_instance_validators(task))
+
+    async def partial_update(self, request, *args, **kwargs):
+        return await self.update(request, *args, partial=True, **kwargs)
+
+    async def destroy(self, request, *args, **kwargs):
+        """Удаление задачи через adelete"""
+        task = await self.get_object()
+        task_id, task_title = task.id, task.title
+        await task.adelete()
+        logger.info('Удалена задача: %s - %s', task_id, task_title)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    async def complete(self, request, *args, **kwargs):
+        task = await self.set_status(TaskStatus.COMPLETED)
+        logger.info('Задача %s помечена как завершенная', task.id)
+        return Response(self.viewset.get_serializer(task).data)
+
+    async def activate(self, request, *args, **kwargs):
+        task = await self.set_status(TaskStatus.ACTIVE)
+        logger.info('Задача %s помечена как активная', task.id)
+        return Response(self.viewset.get_serializer(task).data)
+
+    async def set_status(self, new_status):
+        """Смена статуса задачи через asave(update_fields=...)"""
+        task = await self.get_object()
+        task.status = new_status
+        await task.asave(update_fields=['status', 'updated_at'])
+        return task
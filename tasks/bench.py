@@ -0,0 +1,632 @@
+
+import asyncio
+import datetime
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .cache import invalidate_task_cache
+from .json_backends import JSON_BACKENDS, load_json_backend
+from .models import Task, TaskStatus
+from .pagination import TaskCursorPagination
+from .serializers import TaskListFastSerializer, TaskSerializer
+from .write_behind import get_write_behind_queue
+
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    """Регистрация сценария для manage.py bench"""
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings):
+    """Сводка по замерам в миллисекундах (без замеров - только runs)"""
+    if not timings:
+        return {
+            'runs': 0, 'min_ms': None, 'mean_ms': None, 'p50_ms': None,
+            'p95_ms': None, 'p99_ms': None, 'max_ms': None,
+        }
+    return {
+        'runs': len(timings),
+        'min_ms': round(min(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def measure(func, repeat, warmup=1):
+    """Замер времени выполнения func (мс) за repeat запусков"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize(timings)
+
+
+SEED_WORDS = ('отчет', 'встреча', 'релиз', 'проверка', 'ошибка', 'документация', 'деплой', 'ревью')
+SEED_PERIOD = datetime.timedelta(days=365)
+
+
+def seed_tasks(count, batch_size=5000):
+    """
+    Наполнение таблицы задач до count строк. Даты создания равномерно
+    распределены за последний год, названия из двух слов SEED_WORDS и номера,
+    каждая третья задача завершена. Строки вставляются напрямую (executemany),
+    чтобы задать created_at, триггеры поиска и счетчиков при этом срабатывают.
+    """
+    existing = Task.objects.count()
+    if existing >= count:
+        return existing
+
+    now = timezone.now()
+    step = SEED_PERIOD / count
+    adapt = connection.ops.adapt_datetimefield_value
+    table = connection.ops.quote_name(Task._meta.db_table)
+    sql = f'INSERT INTO {table} (title, status, created_at, updated_at) VALUES (%s, %s, %s, %s)'
+    words = len(SEED_WORDS)
+    for start in range(existing, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            created_at = adapt(now - SEED_PERIOD + step * i)
+            rows.append((
+                f'{SEED_WORDS[i % words]} {SEED_WORDS[i // words % words]} №{i}',
+                TaskStatus.COMPLETED if i % 3 == 0 else TaskStatus.ACTIVE,
+                created_at,
+                created_at,
+            ))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+    invalidate_task_cache()
+    return Task.objects.count()
+
+
+@contextmanager
+def bench_settings(cache=False):
+    """Настройки для запросов через тестовый клиент; кэш ответов по умолчанию выключен"""
+    overrides = {
+        'ALLOWED_HOSTS': ['testserver'],
+        'TASKS_CACHE': dict(settings.TASKS_CACHE, ENABLED=cache),
+    }
+    with override_settings(**overrides):
+        yield
+
+
+def measure_request(client, method, url, repeat, data=None):
+    """
+    Замер запроса к API: перцентили времени, количество SQL-запросов
+    и код ответа (по последнему запуску).
+    """
+    def call():
+        if data is None:
+            return getattr(client, method)(url)
+        return getattr(client, method)(url, data() if callable(data) else data, format='json')
+
+    result = measure(call, repeat)
+    with CaptureQueriesContext(connection) as queries:
+        response = call()
+    result['queries'] = len(queries.captured_queries)
+    result['status'] = response.status_code
+    return result
+
+
+def compare_reports(baseline, current, max_regression):
+    """
+    Сравнение двух отчетов bench: замеры с p50_ms на одинаковых путях.
+    Регрессия - рост p50 больше чем в (1 + max_regression) раз или рост числа запросов.
+    """
+    regressions = []
+    compared = 0
+
+    def walk(old, new, path):
+        nonlocal compared
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            return
+        if 'p50_ms' in old and 'p50_ms' in new:
+            compared += 1
+            ratio = new['p50_ms'] / old['p50_ms'] if old['p50_ms'] and new['p50_ms'] is not None else None
+            more_queries = new.get('queries', 0) > old.get('queries', 0)
+            if (ratio is not None and ratio > 1 + max_regression) or more_queries:
+                regressions.append({
+                    'path': '.'.join(path),
+                    'baseline_p50_ms': old['p50_ms'],
+                    'p50_ms': new['p50_ms'],
+                    'ratio': round(ratio, 2) if ratio is not None else None,
+                    'baseline_queries': old.get('queries'),
+                    'queries': new.get('queries'),
+                })
+            return
+        for key in old.keys() & new.keys():
+            walk(old[key], new[key], path + [key])
+
+    walk(baseline.get('scenarios', {}), current.get('scenarios', {}), [])
+    regressions.sort(key=lambda item: item['path'])
+    return {'compared': compared, 'regressions': regressions}
+
+
+@scenario('serializer')
+def bench_serializer(options):
+    """TaskSerializer против TaskListFastSerializer на странице списка"""
+    page_size = options['page_size']
+    repeat = options['repeat']
+    queryset = Task.objects.order_by('-created_at')[:page_size]
+    fields = TaskListFastSerializer.query_fields
+
+    instances = list(queryset)
+    rows = list(queryset.values_list(*fields, named=True))
+    renderer = JSONRenderer()
+    identical = (
+        renderer.render(TaskSerializer(instances, many=True).data)
+        == renderer.render(TaskListFastSerializer(rows).data)
+    )
+
+    results = {
+        'page_size': len(rows),
+        'identical_output': identical,
+        'serialize_only': {
+            'drf': measure(lambda: TaskSerializer(instances, many=True).data, repeat),
+            'fast': measure(lambda: TaskListFastSerializer(rows).data, repeat),
+        },
+        'query_and_serialize': {
+            'drf': measure(lambda: TaskSerializer(list(queryset.all()), many=True).data, repeat),
+            'fast': measure(
+                lambda: TaskListFastSerializer(list(queryset.values_list(*fields, named=True))).data,
+                repeat
+            ),
+        },
+    }
+    for section in ('serialize_only', 'query_and_serialize'):
+        drf, fast = results[section]['drf'], results[section]['fast']
+        results[section]['speedup'] = round(drf['p50_ms'] / fast['p50_ms'], 2) if fast['p50_ms'] else None
+    return results
+
+
+@scenario('json')
+def bench_json(options):
+    """Рендеринг страницы списка стандартным JSONRenderer и FastJSONRenderer"""
+    from .renderers import FastJSONRenderer
+
+    repeat = options['repeat']
+    queryset = Task.objects.order_by('-created_at')
+    rows = queryset.values_list(*TaskListFastSerializer.query_fields, named=True)[:options['page_size']]
+    data = {
+        'count': queryset.count(),
+        'next': None,
+        'previous': None,
+        'results': TaskListFastSerializer(rows).data,
+    }
+    expected = JSONRenderer().render(data)
+
+    results = {'stdlib_renderer': measure(lambda: JSONRenderer().render(data), repeat)}
+    for name in JSON_BACKENDS:
+        if load_json_backend(name) is None:
+            results[name] = None
+            continue
+        with override_settings(TASKS_JSON_BACKEND=name):
+            results[name] = measure(lambda: FastJSONRenderer().render(data), repeat)
+            results[name]['identical_output'] = FastJSONRenderer().render(data) == expected
+    return results
+
+
+def bench_requests(options):
+    """Смесь запросов к API для нагрузочных сценариев: страницы списка и детали задач"""
+    ids = list(Task.objects.order_by('-created_at').values_list('id', flat=True)[:options['page_size']])
+    paths = []
+    for i, task_id in enumerate(ids):
+        paths.append(f'/api/tasks/?page={i % 5 + 1}&page_size=20')
+        paths.append(f'/api/tasks/{task_id}/')
+    return paths
+
+
+def load_summary(timings, errors, wall):
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'rps': round(len(timings) / wall, 1) if wall else None,
+        'latency': summarize(timings),
+    }
+
+
+def run_wsgi_load(paths, total, concurrency):
+    """Синхронные обработчики в пуле потоков, как у многопоточного WSGI сервера"""
+    def request(i):
+        started = time.perf_counter()
+        response = Client().get(paths[i % len(paths)])
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    wall = time.perf_counter() - started
+    errors = sum(1 for _, status_code in results if status_code != 200)
+    return load_summary([timing for timing, _ in results], errors, wall)
+
+
+def run_asgi_load(paths, total, concurrency):
+    """Асинхронные обработчики: concurrency одновременных клиентов в одном event loop"""
+    timings = []
+    status_codes = []
+
+    async def worker(offset):
+        client = AsyncClient()
+        for i in range(offset, total, concurrency):
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            timings.append((time.perf_counter() - started) * 1000)
+            status_codes.append(response.status_code)
+
+    async def main():
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    wall = time.perf_counter() - started
+    return load_summary(timings, sum(1 for status_code in status_codes if status_code != 200), wall)
+
+
+@scenario('async')
+def bench_async(options):
+    """
+    Нагрузка на список и детали задачи: синхронный TaskViewSet в пуле потоков
+    против асинхронных обработчиков (tasks.async_views) при одинаковой конкурентности.
+    Кэш ответов выключен, чтобы сравнивались обращения к БД.
+    """
+    from .urls import async_urlpatterns, sync_urlpatterns
+
+    concurrency = options['concurrency']
+    total = options['repeat'] * concurrency
+    paths = bench_requests(options)
+    urlconfs = {
+        'wsgi_threads': ((path('api/', include(sync_urlpatterns)),), run_wsgi_load),
+        'asgi_async': ((path('api/', include(async_urlpatterns + sync_urlpatterns)),), run_asgi_load),
+    }
+
+    results = {'concurrency': concurrency}
+    with bench_settings():
+        for name, (urlconf, run) in urlconfs.items():
+            with override_settings(ROOT_URLCONF=urlconf):
+                run(paths, concurrency, concurrency)
+                results[name] = run(paths, total, concurrency)
+    wsgi, asgi = results['wsgi_threads']['rps'], results['asgi_async']['rps']
+    results['rps_ratio'] = round(asgi / wsgi, 2) if wsgi else None
+    return results
+
+
+def cursor_url(page_size, depth):
+    """URL страницы depth в режиме курсора (сортировка по умолчанию -created_at)"""
+    url = f'/api/tasks/?pagination=cursor&page_size={page_size}'
+    if depth == 1:
+        return url
+    row = (
+        Task.objects.order_by('-created_at', '-id')
+        .values_list('id', 'created_at', named=True)[(depth - 1) * page_size - 1]
+    )
+    paginator = TaskCursorPagination()
+    paginator.field = 'created_at'
+    return f'{url}&cursor={paginator.encode_cursor(row, False)}'
+
+
+@scenario('list')
+def bench_list(options):
+    """Страницы списка на разной глубине: page с COUNT(*), page с count=false и курсор"""
+    client = APIClient()
+    page_size = options['page_size']
+    repeat = options['repeat']
+    last_page = max(1, math.ceil(Task.objects.count() / page_size))
+    depths = sorted({depth for depth in (1, 10, 100, 1000) if depth <= last_page} | {last_page})
+
+    results = {}
+    with bench_settings():
+        for depth in depths:
+            url = f'/api/tasks/?page_size={page_size}&page={depth}'
+            results[f'page_{depth}'] = {
+                'count': measure_request(client, 'get', url, repeat),
+                'no_count': measure_request(client, 'get', f'{url}&count=false', repeat),
+                'estimate': measure_request(client, 'get', f'{url}&count=estimate', repeat),
+                'cursor': measure_request(client, 'get', cursor_url(page_size, depth), repeat),
+            }
+        results['active'] = measure_request(client, 'get', f'/api/tasks/active/?page_size={page_size}', repeat)
+    return results
+
+
+@scenario('filters')
+def bench_filters(options):
+    """Комбинации параметров TaskFilter и сортировки на первой странице"""
+    client = APIClient()
+    month_ago = (timezone.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%S')
+    two_months_ago = (timezone.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%dT%H:%M:%S')
+    cases = {
+        'status': {'status': 'active'},
+        'title': {'title': 'релиз'},
+        'created_after': {'created_after': month_ago},
+        'status_created_range': {
+            'status': 'completed',
+            'created_after': two_months_ago,
+            'created_before': month_ago,
+        },
+        'status_title_ordering': {'status': 'completed', 'title': 'отчет', 'ordering': 'title'},
+        'ordering_updated_at': {'ordering': '-updated_at'},
+    }
+    results = {}
+    with bench_settings():
+        for name, params in cases.items():
+            query = '&'.join(f'{key}={value}' for key, value in params.items())
+            url = f'/api/tasks/?page_size={options["page_size"]}&{query}'
+            results[name] = measure_request(client, 'get', url, options['repeat'])
+    return results
+
+
+@scenario('search')
+def bench_search(options):
+    """Поиск по названию (?search=) в режимах simple и fulltext"""
+    client = APIClient()
+    terms = {'common_word': 'отчет', 'two_words': 'отчет релиз', 'prefix': 'докум', 'number': '№12345'}
+    results = {}
+    for backend in ('simple', 'fulltext'):
+        results[backend] = {}
+        with bench_settings(), override_settings(TASKS_SEARCH_BACKEND=backend):
+            for name, term in terms.items():
+                url = f'/api/tasks/?page_size={options["page_size"]}&search={term}'
+                results[backend][name] = measure_request(client, 'get', url, options['repeat'])
+    return results
+
+
+@scenario('writes')
+def bench_writes(options):
+    """Создание, обновление и смена статуса задачи через API (с инвалидацией кэша)"""
+    client = APIClient()
+    repeat = options['repeat']
+    task_id = Task.objects.order_by('-created_at').values_list('id', flat=True).first()
+    counter = iter(range(10 ** 9))
+
+    results = {}
+    with bench_settings(cache=True):
+        results['create'] = measure_request(
+            client, 'post', '/api/tasks/', repeat,
+            data=lambda: {'title': f'bench создание {next(counter)}'}
+        )
+        results['update'] = measure_request(
+            client, 'patch', f'/api/tasks/{task_id}/', repeat,
+            data=lambda: {'title': f'bench обновление {next(counter)}'}
+        )
+        results['complete'] = measure_request(client, 'post', f'/api/tasks/{task_id}/complete/', repeat)
+        results['activate'] = measure_request(client, 'post', f'/api/tasks/{task_id}/activate/', repeat)
+    Task.objects.filter(title__startswith='bench создание').delete()
+    return results
+
+
+def run_create_burst(total, concurrency, headers):
+    """Одновременные POST /api/tasks/ в пуле потоков: задержка ответа и время до записи всех задач"""
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def request(_):
+        with lock:
+            title = f'bench очередь {next(counter)}'
+        started = time.perf_counter()
+        response = Client().post(
+            '/api/tasks/', {'title': title}, content_type='application/json', headers=headers
+        )
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    before = Task.objects.count()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    wall = time.perf_counter() - started
+    get_write_behind_queue().join()
+    stored = time.perf_counter() - started
+    errors = sum(1 for _, status_code in results if status_code not in (201, 202))
+    summary = load_summary([timing for timing, _ in results], errors, wall)
+    summary['stored_s'] = round(stored, 3)
+    summary['created'] = Task.objects.count() - before
+    return summary
+
+
+@scenario('accepted')
+def bench_accepted(options):
+    """
+    Всплеск создания задач: INSERT и COMMIT на каждый запрос (201) против очереди
+    отложенного создания (Prefer: respond-async, 202 и запись пачками bulk_create).
+    stored_s - время до записи всех задач в БД. На SQLite записи в обоих режимах
+    идут через очередь единственного писателя (TASKS_SQLITE_WRITE_QUEUE).
+    """
+    concurrency = options['concurrency']
+    total = options['repeat'] * concurrency
+    modes = {'sync': {}, 'accepted': {'Prefer': 'respond-async'}}
+    config = dict(settings.TASKS_WRITE_BEHIND, ENABLED=True)
+    config['MAX_PENDING'] = max(config['MAX_PENDING'], total)
+
+    results = {'concurrency': concurrency}
+    with bench_settings(cache=True), override_settings(
+        TASKS_WRITE_BEHIND=config, TASKS_SQLITE_WRITE_QUEUE=True
+    ):
+        for name, headers in modes.items():
+            results[name] = run_create_burst(total, concurrency, headers)
+    Task.objects.filter(title__startswith='bench очередь').delete()
+    return results
+
+
+SQLITE_PROFILES = {
+    'default': {'SQLITE_TUNED': 'False', 'TASKS_SQLITE_WRITE_QUEUE': 'False'},
+    'tuned': {'SQLITE_TUNED': 'True', 'TASKS_SQLITE_WRITE_QUEUE': 'False'},
+    'tuned_write_queue': {'SQLITE_TUNED': 'True', 'TASKS_SQLITE_WRITE_QUEUE': 'True'},
+}
+
+SQLITE_LOAD_SCRIPT = '''
+import json, sys
+import django
+django.setup()
+from tasks.bench import run_sqlite_load
+print(json.dumps(run_sqlite_load(**json.loads(sys.argv[1]))))
+'''
+
+
+def is_write_operation(number, write_ratio):
+    """Операция number - запись: записи равномерно распределены по запуску любой длины"""
+    return int((number + 1) * write_ratio) > int(number * write_ratio)
+
+
+def run_sqlite_load(rows, concurrency, operations, write_ratio):
+    """
+    Смешанная нагрузка потоков на API в процессе с профилем SQLite из окружения
+    (файл DATABASE_PATH, SQLITE_TUNED, TASKS_SQLITE_WRITE_QUEUE): чтения - страницы
+    GET /api/tasks/, записи - поровну POST /api/tasks/ и POST /api/tasks/{id}/complete/.
+    Ошибки - ответы 5xx (в том числе "database is locked").
+    """
+    call_command('migrate', verbosity=0, interactive=False)
+    seed_tasks(rows)
+    ids = list(Task.objects.order_by('id').values_list('id', flat=True)[:1000])
+    pages = max(1, min(50, rows // settings.REST_FRAMEWORK['PAGE_SIZE']))
+    connection.close()
+
+    def operation(number):
+        is_write = is_write_operation(number, write_ratio)
+        client = Client(raise_request_exception=False)
+        started = time.perf_counter()
+        if is_write and number % 2:
+            response = client.post(
+                '/api/tasks/', {'title': f'bench {number}'}, content_type='application/json'
+            )
+        elif is_write:
+            response = client.post(f'/api/tasks/{ids[number % len(ids)]}/complete/')
+        else:
+            response = client.get(f'/api/tasks/?page={number % pages + 1}')
+        return is_write, (time.perf_counter() - started) * 1000, response.status_code < 500
+
+    with bench_settings():
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(operation, range(operations)))
+        wall = time.perf_counter() - started
+
+    results = {}
+    for kind, is_write in (('reads', False), ('writes', True)):
+        timings = [duration for write_op, duration, ok in outcomes if write_op == is_write and ok]
+        errors = sum(1 for write_op, _, ok in outcomes if write_op == is_write and not ok)
+        results[kind] = load_summary(timings, errors, wall)
+    return results
+
+
+@scenario('sqlite')
+def bench_sqlite(options):
+    """
+    Конкурентные чтения и записи (20%) через API в файловую SQLite: настройки
+    по умолчанию против профиля SQLITE_TUNED и очереди писателя. Каждый профиль
+    запускается в отдельном процессе (настройки БД читаются при старте) на
+    своем временном файле.
+    """
+    concurrency = options['concurrency']
+    config = {
+        'rows': min(options['rows'], 100000),
+        'concurrency': concurrency,
+        'operations': options['repeat'] * concurrency,
+        'write_ratio': 0.2,
+    }
+    results = {'concurrency': concurrency}
+    for profile, profile_env in SQLITE_PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ, **profile_env,
+                DATABASE_PATH=os.path.join(directory, 'bench.sqlite3'),
+                DATABASE_REPLICAS='',
+                DJANGO_SETTINGS_MODULE='taskapi.settings',
+            )
+            output = subprocess.run(
+                [sys.executable, '-c', SQLITE_LOAD_SCRIPT, json.dumps(config)],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results[profile] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+STARTUP_SCRIPT = '''
+import json, resource, sys, time
+
+def rss_mb():
+    # VmRSS процесса (Linux); ru_maxrss на Linux сохраняется через exec от родителя
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    "startup_ms": (time.perf_counter() - started) * 1000,
+    "rss_mb": rss_mb(),
+    "modules": len(sys.modules),
+}))
+'''
+
+
+@scenario('startup')
+def bench_startup(options):
+    """
+    Холодный старт воркера в профилях TASKAPI_PROFILE: загрузка WSGI приложения
+    и URL конфигурации в новом процессе, память (RSS) после загрузки и число модулей.
+    """
+    runs = max(1, min(options['repeat'], 20))
+    results = {}
+    for profile in ('full', 'api'):
+        env = dict(os.environ, TASKAPI_PROFILE=profile, DJANGO_SETTINGS_MODULE='taskapi.settings')
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            sample = json.loads(output.strip().splitlines()[-1])
+            sample['process_ms'] = (time.perf_counter() - started) * 1000
+            samples.append(sample)
+        results[profile] = {
+            'startup': summarize([sample['startup_ms'] for sample in samples]),
+            'process': summarize([sample['process_ms'] for sample in samples]),
+            'rss_mb': round(statistics.median(sample['rss_mb'] for sample in samples), 1),
+            'modules': samples[-1]['modules'],
+        }
+    return results
@@ -0,0 +1,249 @@
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'BACKEND': 'tasks.cache.LocalMemoryBackend',
+    'TTL': 30,
+    'MAX_ENTRIES': 1024,
+    'OPTIONS': {},
+}
+
+_invalidation_suspended = ContextVar('tasks_cache_invalidation_suspended', default=False)
+
+
+class LocalMemoryBackend:
+    """LRU-кэш в памяти процесса с ограничением по времени жизни записей"""
+
+    in_process = True
+
+    def __init__(self, ttl, max_entries, **options):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._version = 1
+        self._lock = threading.Lock()
+
+    def get_version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+            # Записи старых версий больше недостижимы
+            self._data.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """
+    Общий для всех процессов кэш поверх django.core.cache (Redis, Memcached и т.п.).
+
+    Счетчик версии хранится в том же кэше, поэтому запись в одном процессе
+    инвалидирует ответы во всех остальных. Размер и вытеснение задаются
+    настройками выбранного CACHES alias.
+    """
+
+    version_key = 'tasks:cache:version'
+    in_process = False
+
+    def __init__(self, ttl, max_entries, alias='default', **options):
+        self.ttl = ttl
+        self.cache = caches[alias]
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, 1, None)
+            version = self.cache.get(self.version_key, 1)
+        return version
+
+    def bump_version(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, 2, None)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.ttl)
+
+    def clear(self):
+        self.bump_version()
+
+
+class TaskResponseCache:
+    """Read-through кэш ответов API задач с глобальным счетчиком версии"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, request, action, pk=None):
+        """Ключ по действию, id и нормализованным query параметрам"""
+        params = sorted(
+            (name, value)
+            for name in request.query_params
+            for value in request.query_params.getlist(name)
+            if value != ''
+        )
+        # Ссылки next/previous абсолютные, поэтому хост входит в ключ
+        return 'tasks:{version}:{action}:{pk}:{scheme}://{host}?{params}'.format(
+            version=self.backend.get_version(),
+            action=action,
+            pk='' if pk is None else pk,
+            scheme=request.scheme,
+            host=request.get_host(),
+            params=urlencode(params),
+        )
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, _plain(value))
+
+    def invalidate(self):
+        """Сброс всех закэшированных ответов увеличением версии"""
+        if not _invalidation_suspended.get():
+            self.backend.bump_version()
+
+    async def arun(self, func, *args):
+        """
+        Вызов операции кэша из асинхронного кода: кэш в памяти процесса
+        напрямую, внешний (сетевой) - через sync_to_async.
+        """
+        if getattr(self.backend, 'in_process', False):
+            return func(*args)
+        return await sync_to_async(func)(*args)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            'backend': f'{type(self.backend).__module__}.{type(self.backend).__name__}',
+            'version': self.backend.get_version(),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def _plain(data):
+    """Копия данных ответа без ссылок на сериализаторы (ReturnDict/ReturnList)"""
+    if isinstance(data, dict):
+        return {key: _plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_plain(value) for value in data]
+    return data
+
+
+_task_cache = None
+
+
+def get_task_cache():
+    """Экземпляр кэша по настройке TASKS_CACHE или None, если кэш выключен"""
+    global _task_cache
+    if _task_cache is None:
+        config = {**DEFAULTS, **getattr(settings, 'TASKS_CACHE', {})}
+        if not config['ENABLED']:
+            return None
+        backend_class = import_string(config['BACKEND'])
+        backend = backend_class(
+            ttl=config['TTL'],
+            max_entries=config['MAX_ENTRIES'],
+            **config['OPTIONS']
+        )
+        _task_cache = TaskResponseCache(backend)
+    return _task_cache
+
+
+def invalidate_task_cache():
+    """
+    Инвалидация кэша после записи в таблицу задач. Версия увеличивается после
+    фиксации транзакции: ответ, прочитанный другим запросом до фиксации, мог
+    сохраниться под версией, увеличенной внутри транзакции. Внутри транзакции
+    версия увеличивается и сразу - для чтений в той же транзакции.
+    """
+    cache = get_task_cache()
+    if cache is None or _invalidation_suspended.get():
+        return
+    if transaction.get_connection().in_atomic_block:
+        cache.invalidate()
+    # Вне транзакции вызывается сразу
+    transaction.on_commit(cache.backend.bump_version)
+
+
+async def ainvalidate_task_cache():
+    """Асинхронный вариант invalidate_task_cache"""
+    cache = get_task_cache()
+    if cache is not None:
+        await cache.arun(cache.invalidate)
+
+
+@contextmanager
+def invalidation_batch():
+    """
+    Одна инвалидация на весь блок вместо инвалидации на каждый объект
+    (например, при пакетном удалении, где post_delete приходит на каждую строку).
+    """
+    token = _invalidation_suspended.set(True)
+    try:
+        yield
+    finally:
+        _invalidation_suspended.reset(token)
+        invalidate_task_cache()
+
+
+def reset_task_cache(*, setting, **kwargs):
+    global _task_cache
+    if setting == 'TASKS_CACHE':
+        _task_cache = None
+
+
+setting_changed.connect(reset_task_cache)
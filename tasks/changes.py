@@ -0,0 +1,152 @@
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Task, TaskTombstone
+from .serializers import TaskListFastSerializer
+
+# СУБД, для которых миграция 0006 создает триггер записей об удалении
+TOMBSTONE_TRIGGER_VENDORS = ('sqlite', 'postgresql')
+
+# Потоки ленты: измененные задачи по (updated_at, id) и удаленные по (deleted_at, id)
+STREAMS = {
+    't': (Task.objects, 'updated_at'),
+    'd': (TaskTombstone.objects, 'deleted_at'),
+}
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class ChangeTokenExpired(APIException):
+    """Записи об удалениях после токена уже удалены, нужна полная синхронизация"""
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Токен устарел, выполните полную синхронизацию без параметра since'
+    default_code = 'token_expired'
+
+
+def encode_token(cursors):
+    """Непрозрачный токен из позиций потоков {поток: (время, id)}"""
+    data = {name: [moment.isoformat(), pk] for name, (moment, pk) in cursors.items()}
+    raw = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+
+def decode_token(token):
+    """Позиции потоков из токена, ValidationError для некорректного токена"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        cursors = {}
+        for name in STREAMS:
+            value, pk = data[name]
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError(value)
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment, datetime.timezone.utc)
+            cursors[name] = (moment, int(pk))
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeError):
+        raise ValidationError({'since': ['Некорректный токен']})
+    return cursors
+
+
+def exceeds_settle_window(seconds):
+    """
+    Транзакция записи длилась дольше TASKS_CHANGES['SETTLE_SECONDS']: ее строки
+    с updated_at из начала транзакции могут не попасть в ленту изменений
+    """
+    return seconds > settings.TASKS_CHANGES['SETTLE_SECONDS']
+
+
+def get_changes(token=None, limit=None):
+    """
+    Порция ленты изменений после токена: не больше limit задач, созданных
+    или измененных после него, и id удаленных задач, плюс новый токен.
+
+    Без токена возвращаются все задачи (первая синхронизация порциями),
+    а удаления - только начиная с этого момента. В ленту попадают изменения
+    старше TASKS_CHANGES['SETTLE_SECONDS']: запись с более ранним updated_at
+    может зафиксироваться позже соседней, и курсор не должен ее обогнать.
+    Транзакция записи дольше этого окна может быть пропущена, поэтому пакетные
+    записи (импорт, очередь отложенного создания) предупреждают о таких пакетах.
+    """
+    config = settings.TASKS_CHANGES
+    limit = limit or config['BATCH_SIZE']
+    now = timezone.now()
+    upper = now - datetime.timedelta(seconds=config['SETTLE_SECONDS'])
+    # Триггер SQLite пишет время удаления с точностью до миллисекунд
+    upper = upper.replace(microsecond=upper.microsecond // 1000 * 1000)
+    if token is None:
+        cursors = {'t': (EPOCH, 0), 'd': (upper, 0)}
+    else:
+        cursors = decode_token(token)
+        if cursors['d'][0] < now - datetime.timedelta(days=config['TOMBSTONE_RETENTION_DAYS']):
+            raise ChangeTokenExpired()
+
+    fetched = {name: fetch_stream(name, cursors[name], upper, limit + 1) for name in STREAMS}
+    # Слияние потоков по времени изменения, в порцию попадают первые limit событий
+    events = sorted(
+        (row[1], name, row[0], row[2])
+        for name, rows in fetched.items()
+        for row in rows
+    )[:limit]
+
+    updated, deleted = [], []
+    consumed = dict.fromkeys(STREAMS, 0)
+    for moment, name, pk, payload in events:
+        consumed[name] += 1
+        cursors[name] = (moment, pk)
+        if name == 't':
+            updated.append(payload)
+        else:
+            deleted.append(payload)
+
+    has_more = False
+    for name, rows in fetched.items():
+        if consumed[name] == len(rows):
+            # Поток прочитан до upper: следующая порция начинается с upper
+            cursors[name] = max(cursors[name], (upper, 0))
+        else:
+            has_more = True
+
+    return {
+        'token': encode_token(cursors),
+        'has_more': has_more,
+        'updated': TaskListFastSerializer(updated, many=True).data,
+        'deleted': deleted,
+    }
+
+
+def fetch_stream(name, cursor, upper, limit):
+    """Строки (id, время, данные) потока name после cursor и раньше upper"""
+    manager, field = STREAMS[name]
+    moment, pk = cursor
+    queryset = manager.filter(
+        Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}),
+        **{f'{field}__lt': upper}
+    ).order_by(field, 'id')
+    if name == 't':
+        rows = queryset.values_list(*TaskListFastSerializer.query_fields, named=True)[:limit]
+        return [(row.id, row.updated_at, row) for row in rows]
+    return list(queryset.values_list('id', field, 'task_id')[:limit])
+
+
+def tombstones_by_trigger(vendor):
+    """Создает ли записи об удалении триггер БД (иначе - сигнал post_delete)"""
+    return vendor in TOMBSTONE_TRIGGER_VENDORS
+
+
+def purge_tombstones(days=None):
+    """Удаление записей об удалении старше days (по умолчанию TOMBSTONE_RETENTION_DAYS)"""
+    if days is None:
+        days = settings.TASKS_CHANGES['TOMBSTONE_RETENTION_DAYS']
+    boundary = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=boundary).delete()
+    return deleted
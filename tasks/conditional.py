@@ -0,0 +1,103 @@
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def detail_etag(task_id, updated_at):
+    """Строгий ETag задачи по паре (id, updated_at)"""
+    return quote_etag(f'{task_id}-{int(updated_at.timestamp() * 1_000_000)}')
+
+
+def get_instance_validators(task):
+    """ETag и Last-Modified загруженной задачи"""
+    return {
+        'etag': detail_etag(task.pk, task.updated_at),
+        'last_modified': int(task.updated_at.timestamp()),
+    }
+
+
+def get_detail_validators(queryset, pk):
+    """ETag и Last-Modified задачи одним запросом по первичному ключу"""
+    return build_detail_validators(queryset.filter(pk=pk).values_list('pk', 'updated_at').first())
+
+
+async def aget_detail_validators(queryset, pk):
+    """Асинхронный вариант get_detail_validators"""
+    return build_detail_validators(await queryset.filter(pk=pk).values_list('pk', 'updated_at').afirst())
+
+
+def build_detail_validators(row):
+    if row is None:
+        return None
+    task_id, updated_at = row
+    return {'etag': detail_etag(task_id, updated_at), 'last_modified': int(updated_at.timestamp())}
+
+
+def get_list_validators(queryset, request):
+    """
+    ETag списка по агрегату MAX(updated_at), COUNT(*) и хэшу параметров
+    запроса, без выборки и сериализации строк. Удаление меняет COUNT, поэтому
+    ETag меняется и при удалениях; Last-Modified у списков не отдается:
+    MAX(updated_at) удаления не учитывает.
+    """
+    aggregate = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return build_list_validators(aggregate, request)
+
+
+async def aget_list_validators(queryset, request):
+    """Асинхронный вариант get_list_validators"""
+    aggregate = await queryset.order_by().aaggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return build_list_validators(aggregate, request)
+
+
+def build_list_validators(aggregate, request):
+    last_modified = aggregate['last_modified']
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    source = '|'.join([
+        request.get_host(),
+        repr(params),
+        str(aggregate['count']),
+        last_modified.isoformat() if last_modified else '',
+    ])
+    return {
+        'etag': 'W/' + quote_etag(hashlib.sha1(source.encode('utf-8')).hexdigest()),
+        'last_modified': None,
+    }
+
+
+def get_content_validators(content):
+    """
+    ETag по телу уже отрендеренного ответа: для списков без полного агрегата
+    (?count=false, ?count=estimate, режим курсора)
+    """
+    return {'etag': 'W/' + quote_etag(hashlib.sha1(content).hexdigest()), 'last_modified': None}
+
+
+def conditional_response(request, validators):
+    """
+    Ответ 304/412 по заголовкам If-None-Match, If-Modified-Since, If-Match
+    и If-Unmodified-Since или None, если запрос нужно обработать полностью.
+    """
+    response = get_conditional_response(
+        request,
+        etag=validators['etag'],
+        last_modified=validators['last_modified'],
+    )
+    if response is not None:
+        set_validator_headers(response, validators)
+    return response
+
+
+def set_validator_headers(response, validators):
+    """Заголовки ETag и Last-Modified ответа"""
+    response['ETag'] = validators['etag']
+    if validators['last_modified'] is not None:
+        response['Last-Modified'] = http_date(validators['last_modified'])
+    return response
@@ -0,0 +1,193 @@
+
+import datetime
+import json
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from .cache import LocalMemoryBackend
+from .models import Task, TaskDailyCounter, TaskStatus, TaskStatusCounter
+
+
+# СУБД, для которых миграции 0004 и 0010 создают триггеры счетчиков
+COUNTER_VENDORS = ('sqlite', 'postgresql')
+
+
+def counters_supported():
+    """Ведутся ли счетчики триггерами для текущей СУБД"""
+    return connection.vendor in COUNTER_VENDORS
+
+
+def compute_status_counts():
+    """Точное количество задач по статусам агрегатом по tasks_task"""
+    return dict(Task.objects.order_by().values_list('status').annotate(count=Count('id')))
+
+
+def compute_daily_counts():
+    """Точное количество задач по (день создания UTC, статус) агрегатом по tasks_task"""
+    rows = (
+        Task.objects.order_by()
+        .annotate(day=TruncDate('created_at', tzinfo=datetime.timezone.utc))
+        .values_list('day', 'status')
+        .annotate(count=Count('id'))
+    )
+    return {(day, task_status): count for day, task_status, count in rows}
+
+
+def read_status_counters():
+    """Значения счетчиков по статусам - сумма по шардам"""
+    return dict(
+        TaskStatusCounter.objects.order_by().values_list('status').annotate(total=Sum('count'))
+    )
+
+
+def read_daily_counters():
+    """Значения счетчиков по (день, статус) - сумма по шардам, queryset троек (день, статус, количество)"""
+    return TaskDailyCounter.objects.order_by().values_list('day', 'status').annotate(total=Sum('count'))
+
+
+def get_status_counts():
+    """Количество задач по статусам: чтение счетчиков или агрегат для остальных СУБД"""
+    counts = dict.fromkeys(TaskStatus.values, 0)
+    if counters_supported():
+        counts.update(read_status_counters())
+    else:
+        counts.update(compute_status_counts())
+    return counts
+
+
+def get_daily_counts(date_from=None, date_to=None):
+    """Количество задач по дням создания в диапазоне [date_from, date_to]"""
+    if counters_supported():
+        rows = read_daily_counters().filter(total__gt=0)
+        if date_from is not None:
+            rows = rows.filter(day__gte=date_from)
+        if date_to is not None:
+            rows = rows.filter(day__lte=date_to)
+    else:
+        rows = [
+            (day, task_status, count)
+            for (day, task_status), count in compute_daily_counts().items()
+            if (date_from is None or day >= date_from) and (date_to is None or day <= date_to)
+        ]
+
+    days = {}
+    for day, task_status, count in rows:
+        days.setdefault(day, dict.fromkeys(TaskStatus.values, 0))[task_status] = count
+    return [
+        {'day': day.isoformat(), 'total': sum(counts.values()), **counts}
+        for day, counts in sorted(days.items())
+    ]
+
+
+def rebuild_counters(dry_run=False):
+    """
+    Пересчет счетчиков с нуля в одной транзакции: шарды сворачиваются в одну
+    строку (шард 0). На PostgreSQL запись в tasks_task блокируется до конца
+    пересчета (LOCK ... IN SHARE MODE).
+    Возвращает расхождения: {'status': {статус: (было, стало)}, 'daily': {(день, статус): (было, стало)}}.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {Task._meta.db_table} IN SHARE MODE')
+
+        status_counts = compute_status_counts()
+        daily_counts = compute_daily_counts()
+        current_status = read_status_counters()
+        current_daily = {
+            (day, task_status): count
+            for day, task_status, count in read_daily_counters()
+        }
+        diff = {
+            'status': _diff(current_status, status_counts),
+            'daily': _diff(current_daily, daily_counts),
+        }
+        if not dry_run:
+            TaskStatusCounter.objects.all().delete()
+            TaskDailyCounter.objects.all().delete()
+            TaskStatusCounter.objects.bulk_create(
+                TaskStatusCounter(status=task_status, count=count)
+                for task_status, count in status_counts.items()
+            )
+            TaskDailyCounter.objects.bulk_create(
+                TaskDailyCounter(day=day, status=task_status, count=count)
+                for (day, task_status), count in daily_counts.items()
+            )
+    return diff
+
+
+def _diff(current, expected):
+    return {
+        key: (current.get(key, 0), expected.get(key, 0))
+        for key in current.keys() | expected.keys()
+        if current.get(key, 0) != expected.get(key, 0)
+    }
+
+
+_count_cache = None
+
+
+def get_count_cache():
+    """
+    Кэш точных COUNT(*) по тексту запроса. Не сбрасывается при записи,
+    поэтому значение из него - оценка с задержкой до TASKS_COUNT_CACHE_TTL секунд.
+    """
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = LocalMemoryBackend(ttl=settings.TASKS_COUNT_CACHE_TTL, max_entries=1024)
+    return _count_cache
+
+
+def explain_row_estimate(queryset):
+    """Оценка количества строк планировщиком PostgreSQL (EXPLAIN, без выполнения запроса)"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset, statuses=None):
+    """
+    Количество строк queryset без обязательного COUNT(*), возвращает (количество, оценка ли это).
+
+    statuses - статусы, сумма счетчиков которых равна количеству (список без
+    фильтров или только с фильтром по статусу), тогда ответ точный из счетчиков.
+    Иначе: значение из кэша COUNT(*) (оценка), оценка планировщика PostgreSQL
+    (если не меньше TASKS_COUNT_EXACT_THRESHOLD), и только затем точный COUNT(*)
+    с сохранением в кэш.
+    """
+    if statuses is not None and counters_supported():
+        counts = get_status_counts()
+        return sum(counts.get(task_status, 0) for task_status in statuses), False
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = (connection.alias, sql, tuple(params))
+    cache = get_count_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    if connection.vendor == 'postgresql':
+        estimate = explain_row_estimate(queryset)
+        if estimate >= settings.TASKS_COUNT_EXACT_THRESHOLD:
+            return estimate, True
+
+    count = queryset.count()
+    cache.set(key, count)
+    return count, False
+
+
+def reset_count_cache(*, setting, **kwargs):
+    global _count_cache
+    if setting == 'TASKS_COUNT_CACHE_TTL':
+        _count_cache = None
+
+
+setting_changed.connect(reset_count_cache)
@@ -0,0 +1,63 @@
+
+import csv
+import json
+
+from .serializers import TaskListFastSerializer
+
+
+EXPORT_FIELDS = ['id', 'title', 'status', 'status_display', 'is_active',
+                 'is_completed', 'created_at', 'updated_at']
+QUERY_FIELDS = TaskListFastSerializer.query_fields
+# Количество строк в одном фрагменте потокового ответа
+LINES_PER_CHUNK = 500
+
+
+def export_rows(rows):
+    """Словари в формате TaskSerializer из кортежей QUERY_FIELDS"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield from TaskListFastSerializer(chunk).data
+            chunk = []
+    if chunk:
+        yield from TaskListFastSerializer(chunk).data
+
+
+def iter_ndjson(rows):
+    """Поток NDJSON: одна задача - одна строка JSON"""
+    lines = []
+    for item in export_rows(rows):
+        lines.append(json.dumps(item, ensure_ascii=False))
+        if len(lines) >= LINES_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer, возвращающий записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Поток CSV с заголовком"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    lines = []
+    for item in export_rows(rows):
+        lines.append(writer.writerow([item[field] for field in EXPORT_FIELDS]))
+        if len(lines) >= LINES_PER_CHUNK:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+EXPORT_STREAMS = {
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+}
@@ -1,6 +1,9 @@
 
 import django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
+
 from .models import Task, TaskStatus
+from .search import get_search_backend
 
 
 class TaskFilter(django_filters.FilterSet):
@@ -11,7 +14,7 @@ class TaskFilter(django_filters.FilterSet):
         help_text='Фильтр по статусу задачи'
     )
     title = django_filters.CharFilter(
-        lookup_expr='icontains',
+        method='filter_title',
         help_text='Поиск по названию (без учета регистра)'
     )
     created_after = django_filters.DateTimeFilter(
@@ -29,3 +32,32 @@ class TaskFilter(django_filters.FilterSet):
         model = Task
         fields = ['status', 'title']
 
+    def filter_title(self, queryset, name, value):
+        """Поиск по названию через настроенный бэкенд (TASKS_SEARCH_BACKEND)"""
+        return get_search_backend().filter(queryset, value)
+
+
+class TaskSearchFilter(SearchFilter):
+    """
+    Поиск по названию через настроенный бэкенд. В полнотекстовом режиме
+    результаты дополнительно аннотируются релевантностью search_rank.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        if not backend.ranked:
+            return super().filter_queryset(request, queryset, view)
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        term = ' '.join(terms)
+        return backend.annotate_rank(backend.filter(queryset, term), term)
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """Сортировка по релевантности поиска, если ordering не задан явно"""
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('-search_rank', *self.get_default_ordering(view))
+        return super().filter_queryset(request, queryset, view)
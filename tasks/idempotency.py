@@ -0,0 +1,123 @@
+
+import datetime
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .sqlite import run_write
+
+HEADER = 'Idempotency-Key'
+# Заголовок ответа, отданного из сохраненной записи
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class IdempotencyKeyReused(APIException):
+    """Ключ уже использован для запроса с другим методом, путем или телом"""
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Ключ Idempotency-Key уже использован для другого запроса'
+    default_code = 'idempotency_key_reused'
+
+
+def get_idempotency_key(request):
+    """Значение заголовка Idempotency-Key (None - заголовка нет или поддержка выключена)"""
+    key = request.headers.get(HEADER)
+    if key is None or not settings.TASKS_IDEMPOTENCY['ENABLED']:
+        return None
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise ValidationError({HEADER: [f'Ключ должен содержать от 1 до {MAX_KEY_LENGTH} символов']})
+    return key
+
+
+def request_fingerprint(request):
+    """Хэш метода, пути и данных запроса"""
+    data = json.dumps(request.data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{data}'.encode('utf-8')).hexdigest()
+
+
+def expiry_boundary():
+    return timezone.now() - datetime.timedelta(hours=settings.TASKS_IDEMPOTENCY['TTL_HOURS'])
+
+
+def find_record(key):
+    return IdempotencyKey.objects.filter(key=key).first()
+
+
+def replay_response(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+    return Response(record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+@transaction.atomic
+def execute_once(func, view, request, args, kwargs, key, fingerprint, expired):
+    """
+    Выполнение действия и сохранение успешного ответа в одной транзакции.
+    Параллельный запрос с тем же ключом получает IntegrityError на уникальном
+    ключе, и его изменения откатываются вместе с транзакцией. Устаревшая
+    запись expired перезаписывается, если ее не перезаписал другой запрос.
+    """
+    response = func(view, request, *args, **kwargs)
+    if status.is_success(response.status_code):
+        values = {
+            'fingerprint': fingerprint,
+            'status_code': response.status_code,
+            'response': response.data,
+            'created_at': timezone.now(),
+        }
+        if expired is None:
+            IdempotencyKey.objects.create(key=key, **values)
+        elif not IdempotencyKey.objects.filter(pk=expired.pk, created_at=expired.created_at).update(**values):
+            raise IntegrityError(f'Ключ {key!r} уже использован другим запросом')
+    return response
+
+
+def idempotent(func):
+    """
+    Поддержка заголовка Idempotency-Key у действия ViewSet:
+
+        @idempotent
+        def create(self, request, *args, **kwargs): ...
+
+    Успешный ответ сохраняется в IdempotencyKey вместе с записью задачи,
+    повтор с тем же ключом получает его одним запросом к БД (заголовок
+    Idempotent-Replayed). Ключ от запроса с другим методом, путем или телом - 422.
+    Ошибки не сохраняются: запрос с тем же ключом можно повторить.
+    """
+    @functools.wraps(func)
+    def wrapper(self, request, *args, **kwargs):
+        key = get_idempotency_key(request)
+        if key is None:
+            return func(self, request, *args, **kwargs)
+        fingerprint = request_fingerprint(request)
+        record = find_record(key)
+        if record is not None and record.created_at >= expiry_boundary():
+            return replay_response(record, fingerprint)
+        try:
+            return run_write(execute_once, func, self, request, args, kwargs, key, fingerprint, record)
+        except IntegrityError:
+            # Запрос с тем же ключом завершился раньше: отдается его ответ
+            record = find_record(key)
+            if record is None:
+                raise
+            return replay_response(record, fingerprint)
+
+    wrapper.idempotent = True
+    return wrapper
+
+
+def purge_idempotency_keys(hours=None):
+    """Удаление ключей старше hours (по умолчанию TASKS_IDEMPOTENCY['TTL_HOURS'])"""
+    if hours is None:
+        hours = settings.TASKS_IDEMPOTENCY['TTL_HOURS']
+    boundary = timezone.now() - datetime.timedelta(hours=hours)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=boundary).delete()
+    return deleted
@@ -0,0 +1,115 @@
+
+import json
+
+from django.conf import settings
+from django.core.signals import setting_changed
+
+
+class StdlibJSONBackend:
+    """Стандартный модуль json с параметрами JSONRenderer по умолчанию"""
+
+    name = 'stdlib'
+
+    def dumps(self, data, default):
+        return json.dumps(
+            data, default=default, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode('utf-8')
+
+    def loads(self, content):
+        return json.loads(content, parse_constant=json.strict_constant)
+
+
+class OrjsonBackend:
+    """
+    orjson: datetime, UUID и dataclass сериализуются нативно,
+    остальное (Decimal, lazy строки) - через default рендерера.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        # Ключи-подклассы str (ErrorDetail) и 'Z' для UTC, как у JSONEncoder DRF
+        self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(self, data, default):
+        return self.orjson.dumps(data, default=default, option=self.options)
+
+    def loads(self, content):
+        return self.orjson.loads(content)
+
+
+class MsgspecBackend:
+    """
+    msgspec.json: datetime в RFC 3339 с 'Z' для UTC, подклассы str через default.
+    Decimal сериализуется строкой, а не числом (сериализаторы API Decimal не отдают).
+    """
+
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+
+        self.msgspec = msgspec
+        self.decoder = msgspec.json.Decoder()
+
+    def dumps(self, data, default):
+        def enc_hook(obj):
+            if isinstance(obj, str):
+                return str(obj)
+            return default(obj)
+
+        return self.msgspec.json.encode(data, enc_hook=enc_hook)
+
+    def loads(self, content):
+        return self.decoder.decode(content)
+
+
+JSON_BACKENDS = {
+    'orjson': OrjsonBackend,
+    'msgspec': MsgspecBackend,
+    'stdlib': StdlibJSONBackend,
+}
+
+# Порядок выбора для TASKS_JSON_BACKEND = 'auto'
+AUTO_ORDER = ('orjson', 'msgspec', 'stdlib')
+
+
+def load_json_backend(name):
+    """Экземпляр бэкенда по имени или None, если библиотека не установлена"""
+    try:
+        return JSON_BACKENDS[name]()
+    except ImportError:
+        return None
+
+
+_json_backend = None
+
+
+def get_json_backend():
+    """
+    Бэкенд JSON по настройке TASKS_JSON_BACKEND ('auto', 'orjson', 'msgspec',
+    'stdlib'). Если выбранная библиотека не установлена, используется stdlib.
+    """
+    global _json_backend
+    if _json_backend is None:
+        name = getattr(settings, 'TASKS_JSON_BACKEND', 'auto')
+        if name not in JSON_BACKENDS and name != 'auto':
+            raise ValueError(f'Неизвестный TASKS_JSON_BACKEND: {name!r}')
+        candidates = AUTO_ORDER if name == 'auto' else (name, 'stdlib')
+        for candidate in candidates:
+            _json_backend = load_json_backend(candidate)
+            if _json_backend is not None:
+                break
+    return _json_backend
+
+
+def reset_json_backend(*, setting, **kwargs):
+    global _json_backend
+    if setting == 'TASKS_JSON_BACKEND':
+        _json_backend = None
+
+
+setting_changed.connect(reset_json_backend)
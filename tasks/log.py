@@ -0,0 +1,215 @@
+
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+
+# Атрибуты LogRecord, которые не считаются полями extra
+RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'taskName'}
+
+
+class JSONMessage:
+    """
+    Сообщение-словарь: строка JSON собирается только при форматировании записи
+    (в фоновом потоке QueueLogHandler), JSONFormatter выводит поля словаря как есть.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return json.dumps(self.data, ensure_ascii=False, default=str)
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна строка JSON на запись: время (UTC), уровень, логгер, сообщение и поля extra"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+        }
+        if isinstance(record.msg, JSONMessage) and not record.args:
+            data.update(record.msg.data)
+        else:
+            data['message'] = record.getMessage()
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DeferredFlushMixin:
+    """
+    Сброс буфера потока не после каждой записи, а один раз на пачку записей
+    (QueueLogHandler выставляет deferred на время пачки и вызывает flush в конце).
+    """
+
+    deferred = False
+
+    def flush(self):
+        if not self.deferred:
+            super().flush()
+
+
+class BatchStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchRotatingFileHandler(DeferredFlushMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchTimedRotatingFileHandler(DeferredFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+def get_handler(name):
+    """Обработчик из конфигурации logging по имени"""
+    if hasattr(logging, 'getHandlerByName'):
+        return logging.getHandlerByName(name)
+    # Python < 3.12
+    return logging._handlers.get(name)
+
+
+class QueueLogHandler(logging.Handler):
+    """
+    Неблокирующий журнал: запрос только кладет запись в ограниченную очередь,
+    форматирование и запись в обработчики handlers (имена из LOGGING или объекты)
+    выполняет фоновый поток пачками до batch_size записей.
+
+    Не наследует logging.handlers.QueueHandler: с Python 3.12 dictConfig сам
+    настраивает наследников QueueHandler (ключи queue, listener, handlers) и
+    передал бы в handlers объект очереди вместо списка обработчиков.
+
+    Под нагрузкой запрос не ждет журнал: при заполнении очереди больше чем на
+    shed_at записи ниже WARNING сохраняются с вероятностью sample_rate, в полную
+    очередь записи не добавляются. Количество пропущенных записей поток
+    пишет отдельным предупреждением.
+    """
+
+    def __init__(self, handlers=(), queue_size=10000, batch_size=256, shed_at=0.8, sample_rate=0.1):
+        super().__init__()
+        self.queue = queue.Queue(queue_size)
+        self.targets = [self.resolve_target(target) for target in handlers]
+        self.batch_size = batch_size
+        self.shed_at = shed_at
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.start_lock = threading.Lock()
+        self.thread = None
+
+    def emit(self, record):
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        """
+        Запись для очереди. В отличие от QueueHandler.prepare сообщение не
+        форматируется здесь: в очередь попадают msg и args, строка собирается
+        в фоновом потоке (args должны быть неизменяемыми значениями).
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            # traceback не передается в другой поток, текст собирается сразу
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.start()
+        size = self.queue.qsize()
+        if (
+            record.levelno < logging.WARNING
+            and size >= self.queue.maxsize * self.shed_at
+            and random.random() >= self.sample_rate
+        ):
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.work, name='tasks-log-writer', daemon=True)
+                self.thread.start()
+
+    @staticmethod
+    def resolve_target(target):
+        """
+        Обработчик по имени из LOGGING. Имена ищутся при создании: dictConfig
+        создает обработчики в алфавитном порядке, имена целевых обработчиков
+        должны быть раньше имени очереди, а ссылку на них хранит только очередь.
+        """
+        if not isinstance(target, str):
+            return target
+        handler = get_handler(target)
+        if handler is None:
+            raise ValueError(f'Обработчик журнала {target!r} не найден или создается позже очереди')
+        return handler
+
+    def work(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self.write_batch([record for record in batch if record is not None])
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def write_batch(self, records):
+        """Передача пачки записей обработчикам с одним flush на обработчик"""
+        dropped, self.dropped = self.dropped, 0
+        if dropped:
+            records.append(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': 'Пропущено записей журнала под нагрузкой: %d', 'args': (dropped,),
+            }))
+        targets = self.targets
+        for handler in targets:
+            handler.deferred = True
+        try:
+            for record in records:
+                for handler in targets:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+        finally:
+            for handler in targets:
+                handler.deferred = False
+                handler.flush()
+
+    def stop(self):
+        """Запись оставшихся в очереди записей и остановка потока"""
+        with self.start_lock:
+            thread, self.thread = self.thread, None
+        if thread is not None and thread.is_alive():
+            self.queue.put(None)
+            thread.join(timeout=5)
+
+    def close(self):
+        # Вызывается и из logging.shutdown при завершении процесса
+        self.stop()
+        super().close()
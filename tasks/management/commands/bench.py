@@ -0,0 +1,129 @@
+
+import argparse
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from tasks.bench import SCENARIOS, compare_reports, seed_tasks
+
+
+def row_count(value):
+    """Количество строк: число или с суффиксом k/M (10k, 1M)"""
+    multipliers = {'k': 1000, 'm': 1000000}
+    suffix = value[-1:].lower()
+    try:
+        if suffix in multipliers:
+            return int(float(value[:-1]) * multipliers[suffix])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Некорректное количество строк: {value!r}')
+
+
+def git_revision():
+    """Текущий коммит (с пометкой -dirty при незакоммиченных изменениях) или None"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{revision}-dirty' if dirty else revision
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеры производительности API задач на отдельной тестовой БД. '
+        'Результат выводится в JSON для сравнения между коммитами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help=f'Сценарии для запуска (по умолчанию все): {", ".join(SCENARIOS)}'
+        )
+        parser.add_argument(
+            '--rows', type=row_count, default=10000,
+            help='Количество задач в тестовой БД, можно с суффиксом: 10k, 100k, 1M'
+        )
+        parser.add_argument('--repeat', type=int, default=50, help='Количество замеров на операцию')
+        parser.add_argument('--page-size', type=int, default=100, help='Размер страницы списка')
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Одновременных запросов в нагрузочных сценариях'
+        )
+        parser.add_argument('--output', help='Файл для результатов (по умолчанию stdout)')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую БД между запусками (для файловой TEST NAME)'
+        )
+        parser.add_argument('--compare', help='JSON с результатами предыдущего запуска для сравнения')
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Допустимый рост p50 относительно --compare (доля, по умолчанию 0.2)'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой, если при сравнении найдены регрессии'
+        )
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(unknown)}')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Не удалось прочитать {options["compare"]}: {exc}')
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            with override_settings(DEBUG=False):
+                rows = seed_tasks(options['rows'])
+                results = {name: SCENARIOS[name](options) for name in names}
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        report = {
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'revision': git_revision(),
+            },
+            'rows': rows,
+            'repeat': options['repeat'],
+            'page_size': options['page_size'],
+            'scenarios': results,
+        }
+        if baseline is not None:
+            report['comparison'] = {
+                'baseline': baseline.get('environment', {}).get('revision'),
+                'max_regression': options['max_regression'],
+                **compare_reports(baseline, report, options['max_regression']),
+            }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Результаты записаны в {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+        regressions = report.get('comparison', {}).get('regressions')
+        if regressions and options['fail_on_regression']:
+            raise CommandError(
+                f'Регрессии относительно {options["compare"]}: '
+                + ', '.join(item['path'] for item in regressions)
+            )
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит OpenAPI схему API задач и записывает openapi.json и openapi.yaml '
+        '(по умолчанию в TASKS_SCHEMA["DIR"]); /swagger.json и /swagger.yaml отдают эти файлы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Каталог для файлов схемы')
+
+    def handle(self, *args, **options):
+        if not apps.is_installed('drf_yasg'):
+            raise CommandError('drf_yasg не подключен (TASKAPI_PROFILE=api), схема не строится')
+        from taskapi.schema import write_schema_files
+
+        for path in write_schema_files(options['output_dir']):
+            self.stdout.write(self.style.SUCCESS(f'Схема записана: {path}'))
@@ -0,0 +1,101 @@
+
+import itertools
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tasks.views import TaskViewSet
+
+# Комбинации параметров TaskFilter (значения только для построения плана)
+FILTER_CASES = {
+    'none': {},
+    'status': {'status': 'active'},
+    'created_after': {'created_after': '2024-01-01T00:00:00'},
+    'created_range': {'created_after': '2024-01-01T00:00:00', 'created_before': '2024-02-01T00:00:00'},
+    'status_created_after': {'status': 'completed', 'created_after': '2024-01-01T00:00:00'},
+    'title': {'title': 'отчет'},
+}
+ORDERINGS = ('', 'created_at', '-updated_at', 'updated_at', 'title', '-title')
+# Действия со своим queryset (фильтр по статусу без параметров)
+STATUS_ACTIONS = ('active', 'completed')
+
+SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+POSTGRES_INDEX = re.compile(r'Index (?:Only )?Scan(?: Backward)? using (\w+)')
+
+
+def analyze_plan(plan):
+    """Индексы из плана, признак полного просмотра таблицы и сортировки вне индекса"""
+    if connection.vendor == 'postgresql':
+        return {
+            'indexes': sorted(set(POSTGRES_INDEX.findall(plan))),
+            'full_scan': 'Seq Scan' in plan,
+            'sort': bool(re.search(r'(?<!Incremental )Sort\b', plan)),
+        }
+    return {
+        'indexes': sorted(set(SQLITE_INDEX.findall(plan))),
+        'full_scan': bool(re.search(r'\bSCAN (?:TABLE )?tasks_task\b(?! USING)', plan)),
+        'sort': 'USE TEMP B-TREE FOR' in plan,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN запросов списка задач для всех комбинаций фильтров TaskFilter и сортировок: '
+        'какие индексы используются, есть ли полный просмотр таблицы и сортировка вне индекса. '
+        'Планы зависят от статистики, запускайте на БД с реальными данными (после ANALYZE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help='LIMIT запроса страницы')
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+        parser.add_argument('--verbose-plan', action='store_true', help='Выводить план целиком')
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Ошибка, если запрос без поиска по названию просматривает всю таблицу '
+                 '(сортировка вне индекса только отмечается: ее дает сочетание фильтра и сортировки по другому полю)'
+        )
+
+    def handle(self, *args, **options):
+        results = [self.explain_case(*case, options['page_size']) for case in self.get_cases()]
+
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            for result in results:
+                flags = [flag for flag in ('full_scan', 'sort') if result[flag]]
+                line = (
+                    f'{result["case"]:<45} {", ".join(result["indexes"]) or "-":<45} '
+                    f'{" ".join(flags) or "ok"}'
+                )
+                self.stdout.write(self.style.WARNING(line) if result['full_scan'] and not result['search'] else line)
+                if options['verbose_plan']:
+                    self.stdout.write(result['plan'] + '\n')
+
+        failed = [result['case'] for result in results if not result['search'] and result['full_scan']]
+        if options['strict'] and failed:
+            raise CommandError(f'Запросы без подходящего индекса: {", ".join(failed)}')
+
+    def get_cases(self):
+        """Пары (название, действие, query параметры)"""
+        for (filter_name, params), ordering in itertools.product(FILTER_CASES.items(), ORDERINGS):
+            query = dict(params, ordering=ordering) if ordering else params
+            yield f'list {filter_name} {ordering or "-created_at"}', 'list', query
+        for action in STATUS_ACTIONS:
+            yield f'{action}', action, {}
+
+    def explain_case(self, name, action, params, page_size):
+        request = Request(APIRequestFactory().get('/api/tasks/', params))
+        viewset = TaskViewSet(action=action, request=request, format_kwarg=None, kwargs={})
+        queryset = viewset.get_read_queryset()[:page_size]
+        plan = queryset.explain()
+        return {
+            'case': name,
+            'params': params,
+            'search': 'title' in params,
+            **analyze_plan(plan),
+            'plan': plan,
+        }
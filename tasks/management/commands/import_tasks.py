@@ -0,0 +1,251 @@
+
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connections, router, transaction
+from rest_framework import serializers
+
+from tasks.cache import invalidate_task_cache
+from tasks.changes import exceeds_settle_window
+from tasks.models import Task, TaskStatus
+from tasks.serializers import TaskCreateSerializer
+
+
+class RowError(Exception):
+    """Ошибка валидации строки импорта"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковый импорт задач из NDJSON или CSV (файл или stdin) '
+        'пакетами bulk_create с контрольной точкой для продолжения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу или "-" для чтения из stdin')
+        parser.add_argument(
+            '--format', choices=['ndjson', 'csv'],
+            help='Формат входных данных (по умолчанию по расширению файла, для stdin - ndjson)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Строк в одной транзакции')
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять существующие задачи с тем же id вместо ошибки'
+        )
+        parser.add_argument('--checkpoint', help='Файл контрольной точки (номер последней записанной строки)')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с позиции из файла контрольной точки'
+        )
+        parser.add_argument('--progress-every', type=int, default=10000, help='Интервал вывода прогресса в строках')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if options['resume'] and not options['checkpoint']:
+            raise CommandError('--resume требует --checkpoint')
+
+        self.options = options
+        self.title_serializer = TaskCreateSerializer()
+        self.valid_statuses = set(TaskStatus.values)
+        self.max_title_length = Task._meta.get_field('title').max_length
+        skip = self.read_checkpoint() if options['resume'] else 0
+
+        stream = self.open_source(options['source'])
+        try:
+            records = self.read_records(stream, self.detect_format(options))
+            self.import_records(records, skip)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def detect_format(self, options):
+        if options['format']:
+            return options['format']
+        if options['source'].lower().endswith('.csv'):
+            return 'csv'
+        return 'ndjson'
+
+    def open_source(self, source):
+        if source == '-':
+            return sys.stdin
+        try:
+            return open(source, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть {source}: {e}')
+
+    def read_records(self, stream, input_format):
+        """Поток словарей из входных данных без чтения файла целиком"""
+        if input_format == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield RowError(f'некорректный JSON: {e}')
+
+    def validate_record(self, record):
+        """Задача из записи по правилам TaskCreateSerializer и Task.status"""
+        if isinstance(record, RowError):
+            raise record
+        if not isinstance(record, dict):
+            raise RowError('ожидается объект')
+        title = record.get('title')
+        if not isinstance(title, str):
+            raise RowError('title: ожидается строка')
+        try:
+            title = self.title_serializer.validate_title(title)
+        except serializers.ValidationError as e:
+            raise RowError(f'title: {" ".join(e.detail)}')
+        if len(title) > self.max_title_length:
+            raise RowError(f'title: длина больше {self.max_title_length} символов')
+
+        task_status = record.get('status') or TaskStatus.ACTIVE
+        if task_status not in self.valid_statuses:
+            raise RowError(f'status: недопустимое значение {task_status!r}')
+
+        task_id = record.get('id')
+        if task_id in (None, ''):
+            task_id = None
+        else:
+            try:
+                task_id = int(task_id)
+            except (TypeError, ValueError):
+                raise RowError(f'id: ожидается целое число, получено {task_id!r}')
+        return Task(id=task_id, title=title, status=task_status)
+
+    def import_records(self, records, skip):
+        batch_size = self.options['batch_size']
+        progress_every = self.options['progress_every']
+        started = time.monotonic()
+        position = 0
+        imported = 0
+        failed = 0
+        explicit_ids = False
+        batch = []
+
+        for record in records:
+            position += 1
+            if position <= skip:
+                continue
+            try:
+                task = self.validate_record(record)
+            except RowError as e:
+                failed += 1
+                self.stderr.write(f'Строка {position}: {e}')
+            else:
+                batch.append((position, task))
+                explicit_ids = explicit_ids or task.id is not None
+            if len(batch) >= batch_size:
+                written = self.write_batch(batch, position)
+                imported += written
+                failed += len(batch) - written
+                batch = []
+            if progress_every and position % progress_every == 0:
+                self.report_progress(position - skip, imported, failed, started)
+
+        if batch:
+            written = self.write_batch(batch, position)
+            imported += written
+            failed += len(batch) - written
+        elif position > skip:
+            self.write_checkpoint(position)
+        if imported:
+            if explicit_ids:
+                self.reset_sequences()
+            invalidate_task_cache()
+
+        elapsed = time.monotonic() - started
+        rate = (position - skip) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен: обработано {position - skip}, записано {imported}, '
+            f'с ошибками {failed}, {elapsed:.1f} c, {rate:.0f} строк/с'
+        ))
+
+    def write_batch(self, batch, position):
+        """
+        Запись пакета (номер строки, задача) в отдельной транзакции и сохранение
+        контрольной точки. Если пакет нарушает ограничение БД (без --upsert -
+        повторный id), он записывается по одной строке, а конфликтующие строки
+        выводятся в stderr как некорректные. Возвращает число записанных задач.
+        """
+        options = {}
+        if self.options['upsert']:
+            options = {
+                'update_conflicts': True,
+                'unique_fields': ['id'],
+                'update_fields': ['title', 'status', 'updated_at'],
+            }
+        tasks = [task for _, task in batch]
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                Task.objects.bulk_create(tasks, batch_size=len(tasks), **options)
+            written = len(tasks)
+        except IntegrityError:
+            written = 0
+            with transaction.atomic():
+                for line, task in batch:
+                    try:
+                        with transaction.atomic():
+                            Task.objects.bulk_create([task], **options)
+                    except IntegrityError as e:
+                        self.stderr.write(f'Строка {line}: конфликт с существующей задачей: {e}')
+                    else:
+                        written += 1
+        elapsed = time.monotonic() - started
+        if exceeds_settle_window(elapsed):
+            self.stderr.write(
+                f'Пакет до строки {position} записывался {elapsed:.1f} c, дольше '
+                'TASKS_CHANGES_SETTLE_SECONDS: уменьшите --batch-size или увеличьте окно, '
+                'иначе лента изменений может пропустить задачи пакета'
+            )
+        self.write_checkpoint(position)
+        return written
+
+    def reset_sequences(self):
+        """
+        Сдвиг последовательности id после вставки явных id (PostgreSQL), чтобы
+        следующие задачи без id не получили занятый номер. На SQLite не нужен.
+        """
+        connection = connections[router.db_for_write(Task)]
+        statements = connection.ops.sequence_reset_sql(no_style(), [Task])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def report_progress(self, processed, imported, failed, started):
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Обработано {processed}, записано {imported}, с ошибками {failed}, {rate:.0f} строк/с'
+        )
+
+    def read_checkpoint(self):
+        path = self.options['checkpoint']
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, encoding='utf-8') as f:
+                return int(json.load(f)['position'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise CommandError(f'Некорректный файл контрольной точки {path}: {e}')
+
+    def write_checkpoint(self, position):
+        path = self.options['checkpoint']
+        if not path:
+            return
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': self.options['source'], 'position': position}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tasks.idempotency import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Удаляет сохраненные ответы Idempotency-Key старше срока хранения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=None,
+            help='Срок хранения в часах (по умолчанию TASKS_IDEMPOTENCY["TTL_HOURS"])'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_idempotency_keys(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено ключей идемпотентности: {deleted}'))
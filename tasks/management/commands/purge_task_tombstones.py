@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tasks.changes import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет записи об удаленных задачах старше срока хранения ленты изменений; '
+        'клиенты с более старым токеном получат 410 и выполнят полную синхронизацию'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Срок хранения в днях (по умолчанию TASKS_CHANGES["TOMBSTONE_RETENTION_DAYS"])'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей об удалении: {deleted}'))
@@ -0,0 +1,20 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.search import get_fulltext_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс полнотекстового поиска по названиям задач'
+
+    def handle(self, *args, **options):
+        backend = get_fulltext_backend()
+        if backend is None:
+            raise CommandError(
+                'Полнотекстовый индекс недоступен для текущей СУБД '
+                '(нужен SQLite с FTS5 или PostgreSQL и примененная миграция 0003)'
+            )
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс поиска перестроен ({type(backend).__name__})'
+        ))
@@ -0,0 +1,31 @@
+
+from django.core.management.base import BaseCommand
+
+from tasks.counters import counters_supported, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики задач по статусам и дням из таблицы задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести расхождения, не изменяя счетчики'
+        )
+
+    def handle(self, *args, **options):
+        if not counters_supported():
+            self.stderr.write(
+                'Для текущей СУБД счетчики не ведутся, статистика считается агрегатом'
+            )
+        diff = rebuild_counters(dry_run=options['dry_run'])
+        for task_status, (current, expected) in sorted(diff['status'].items()):
+            self.stdout.write(f'Статус {task_status}: {current} -> {expected}')
+        for (day, task_status), (current, expected) in sorted(diff['daily'].items()):
+            self.stdout.write(f'{day} {task_status}: {current} -> {expected}')
+
+        mismatches = len(diff['status']) + len(diff['daily'])
+        if options['dry_run']:
+            self.stdout.write(f'Расхождений: {mismatches}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Счетчики пересчитаны, исправлено расхождений: {mismatches}'))
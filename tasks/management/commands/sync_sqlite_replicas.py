@@ -0,0 +1,39 @@
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную БД SQLite в файлы реплик (DATABASE_REPLICAS) через backup API. '
+        'Для локальной проверки чтения с реплик: между запусками реплики отстают от основной БД.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('Команда только для SQLite, реплики PostgreSQL обновляет репликация')
+        replicas = [
+            alias for alias in settings.TASKS_REPLICA_DATABASES
+            if connections[alias].vendor == 'sqlite'
+        ]
+        if not replicas:
+            raise CommandError('Реплики SQLite не настроены (DATABASE_REPLICAS)')
+
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(
+                    f'{alias}: {connections[alias].settings_dict["NAME"]} обновлена'
+                ))
+        finally:
+            source.close()
@@ -0,0 +1,187 @@
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('tasks.perf')
+
+# Метрики текущего запроса; contextvar переносится и в потоки sync_to_async
+_current = contextvars.ContextVar('tasks_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Время запроса по фазам: запросы к БД, сериализация, рендеринг"""
+
+    def __init__(self, slow_query_ms=None):
+        self.start = time.perf_counter()
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.db = 0.0
+        # Тексты запросов, если их собирает QueryBudgetMiddleware
+        self.statements = None
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def start_request_metrics(slow_query_ms=None):
+    """Начало учета метрик запроса, возвращает (метрики, токен для reset_request_metrics)"""
+    metrics = RequestMetrics(slow_query_ms)
+    return metrics, _current.set(metrics)
+
+
+def reset_request_metrics(token):
+    _current.reset(token)
+
+
+def get_request_metrics():
+    """Метрики текущего запроса или None вне PerformanceMiddleware"""
+    return _current.get()
+
+
+@contextmanager
+def timed(phase):
+    """Учет времени блока (или функции, как декоратор) в фазе phase текущего запроса"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[phase] = metrics.phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def query_timer(execute, sql, params, many, context):
+    """
+    Обертка connection.execute_wrapper: количество и время запросов к БД
+    в метриках текущего запроса и журнал медленных запросов.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        metrics.queries += 1
+        metrics.db += duration
+        if metrics.statements is not None:
+            metrics.statements.append(sql)
+        if metrics.slow_query_ms is not None and duration * 1000 >= metrics.slow_query_ms:
+            logger.warning(
+                'Медленный запрос к БД %s (%.1f мс): %s',
+                context['connection'].alias, duration * 1000, sql
+            )
+
+
+def install_query_timer(connection):
+    """Постоянная обертка запросов соединения (один раз на объект соединения)"""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+class Histogram:
+    """Гистограмма с кумулятивными корзинами, как в Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Пары (верхняя граница, количество наблюдений <= границы), последняя - +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+# Корзины в секундах для длительностей и в штуках для количества запросов
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'tasks_http_request_duration_seconds': ('Время обработки запроса', DURATION_BUCKETS),
+    'tasks_http_request_db_seconds': ('Суммарное время запросов к БД за запрос', DURATION_BUCKETS),
+    'tasks_http_request_db_queries': ('Количество запросов к БД за запрос', QUERY_COUNT_BUCKETS),
+    'tasks_http_request_serialize_seconds': ('Время сериализации ответа', DURATION_BUCKETS),
+    'tasks_http_request_render_seconds': ('Время рендеринга ответа', DURATION_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """Гистограммы метрик запросов процесса по наборам меток"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(METRICS[name][1])
+            histogram.observe(value)
+
+    def observe_request(self, labels, metrics, duration):
+        """Все гистограммы для завершенного запроса"""
+        self.observe('tasks_http_request_duration_seconds', labels, duration)
+        self.observe('tasks_http_request_db_seconds', labels, metrics.db)
+        self.observe('tasks_http_request_db_queries', labels, metrics.queries)
+        self.observe('tasks_http_request_serialize_seconds', labels, metrics.phases['serialize'])
+        self.observe('tasks_http_request_render_seconds', labels, metrics.phases['render'])
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render_prometheus(self):
+        """Текстовый формат Prometheus (exposition format 0.0.4)"""
+        with self.lock:
+            items = sorted(
+                (key, histogram.cumulative(), histogram.sum, histogram.count)
+                for key, histogram in self.histograms.items()
+            )
+        lines = []
+        for name, (help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, labels), cumulative, total, count in items:
+                if metric != name:
+                    continue
+                for bound, value in cumulative:
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", le),))} {value}')
+                lines.append(f'{name}_sum{format_labels(labels)} {total!r}')
+                lines.append(f'{name}_count{format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,212 @@
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .log import JSONMessage
+from .metrics import (
+    REGISTRY, get_request_metrics, install_query_timer, reset_request_metrics,
+    start_request_metrics,
+)
+from .query_budget import QueryBudgetExceeded, get_view_budget
+from .routers import pinned_to_primary, replicas_configured
+
+logger = logging.getLogger('tasks.perf')
+
+
+class PerformanceMiddleware:
+    """
+    Метрики каждого запроса (настройка TASKS_PERF): общее время, количество
+    и время запросов к БД (обертка connection.execute_wrapper, устанавливается
+    на каждое соединение), время сериализации и рендеринга ответа.
+
+    Результат - заголовок Server-Timing, строка JSON в логгере tasks.perf (DEBUG),
+    гистограммы для /metrics и журнал медленных запросов (SLOW_QUERY_MS).
+    Работает и под WSGI, и под ASGI (вместе с tasks.async_views).
+    Для потоковых ответов время учитывается до начала отдачи тела.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TASKS_PERF['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Соединения, открытые до загрузки middleware (новые - через сигнал connection_created)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token = start_request_metrics(settings.TASKS_PERF['SLOW_QUERY_MS'])
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_metrics(token)
+        return self.process_metrics(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_request_metrics(settings.TASKS_PERF['SLOW_QUERY_MS'])
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_request_metrics(token)
+        return self.process_metrics(request, response, metrics)
+
+    def process_metrics(self, request, response, metrics):
+        duration = metrics.elapsed
+        labels = {
+            'method': request.method,
+            'view': self.get_view_label(request),
+            'status': response.status_code,
+        }
+        REGISTRY.observe_request(labels, metrics, duration)
+
+        if settings.TASKS_PERF['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={duration * 1000:.2f}',
+                f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} queries"',
+                f'serialize;dur={metrics.phases["serialize"] * 1000:.2f}',
+                f'render;dur={metrics.phases["render"] * 1000:.2f}',
+            ])
+        # Строка на каждый запрос - на уровне DEBUG, включается уровнем логгера tasks.perf
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(JSONMessage({
+                'method': request.method,
+                'path': request.path,
+                'view': labels['view'],
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': metrics.queries,
+                'db_ms': round(metrics.db * 1000, 2),
+                'serialize_ms': round(metrics.phases['serialize'] * 1000, 2),
+                'render_ms': round(metrics.phases['render'] * 1000, 2),
+            }))
+        return response
+
+    @staticmethod
+    def get_view_label(request):
+        """Имя маршрута (ограниченный набор значений для меток гистограмм)"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        # У маршрутов без имени (tasks.async_views) view_name - путь к классу представления
+        return match.view_name if match.url_name else match.route
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверка бюджета запросов к БД (TASKS_QUERY_BUDGET, по умолчанию при DEBUG):
+    не больше max_queries запросов из @query_budget действия и не больше
+    MAX_REPEATS запросов одной формы. В режиме 'warn' нарушение пишется
+    в логгер tasks.perf, в режиме 'raise' запрос завершается QueryBudgetExceeded.
+
+    Подключается после PerformanceMiddleware и использует его метрики запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TASKS_QUERY_BUDGET['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                reset_request_metrics(token)
+        self.check(request, metrics.statements)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                reset_request_metrics(token)
+        self.check(request, metrics.statements)
+        return response
+
+    def start(self, request):
+        """Сбор текстов запросов в метриках текущего запроса (или в новых, без PerformanceMiddleware)"""
+        metrics, token = get_request_metrics(), None
+        if metrics is None:
+            metrics, token = start_request_metrics()
+        metrics.statements = []
+        return metrics, token
+
+    def check(self, request, statements):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return
+        violations = get_view_budget(match.func, request.method).check(statements)
+        if not violations:
+            return
+        message = f'{request.method} {request.path}: ' + '; '.join(violations)
+        if settings.TASKS_QUERY_BUDGET['MODE'] == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes между запросами при чтении с реплик (TASKS_REPLICA_DATABASES):
+    после успешного небезопасного запроса (POST, PUT, PATCH, DELETE) клиент получает
+    cookie, и его чтения TASKS_REPLICA_PIN_SECONDS секунд идут в основную БД,
+    пока реплики догоняют запись.
+    """
+
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'tasks_pin_primary'
+
+    def __init__(self, get_response):
+        if not replicas_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with pinned_to_primary(self.cookie_name in request.COOKIES):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        with pinned_to_primary(self.cookie_name in request.COOKIES):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.TASKS_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,95 @@
+# Generated migration: full-text search index for task titles
+
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title,
+        content='tasks_task',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update AFTER UPDATE OF title ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO tasks_task_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_fts_insert',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_delete',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_update',
+    'DROP TABLE IF EXISTS tasks_task_fts',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS tasks_task_title_fts_idx ON tasks_task
+    USING gin (to_tsvector('simple'::regconfig, COALESCE(title, '')))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS tasks_task_title_fts_idx',
+]
+
+
+def sqlite_has_fts5(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def run_statements(schema_editor, sqlite_statements, postgres_statements):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite' and sqlite_has_fts5(cursor):
+            statements = sqlite_statements
+        elif vendor == 'postgresql':
+            statements = postgres_statements
+        else:
+            # Для остальных СУБД остается поиск через icontains
+            statements = []
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    run_statements(schema_editor, SQLITE_FORWARD, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    run_statements(schema_editor, SQLITE_BACKWARD, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+    """
+    Индекс полнотекстового поиска по названию задачи.
+
+    SQLite: внешняя (content=) таблица FTS5, синхронизируемая триггерами.
+    Миграции, пересоздающие tasks_task на SQLite (изменение полей),
+    удаляют триггеры - после них нужно повторно выполнить SQLITE_FORWARD.
+    """
+
+    dependencies = [
+        ('tasks', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
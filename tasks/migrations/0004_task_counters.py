@@ -0,0 +1,158 @@
+# Generated migration: per-status and per-day task counters maintained by triggers
+
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_taskstatuscounter(status, count) VALUES (new.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+        INSERT INTO tasks_taskdailycounter(day, status, count) VALUES (date(new.created_at), new.status, 1)
+            ON CONFLICT(day, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_delete AFTER DELETE ON tasks_task BEGIN
+        UPDATE tasks_taskstatuscounter SET count = count - 1 WHERE status = old.status;
+        UPDATE tasks_taskdailycounter SET count = count - 1
+            WHERE day = date(old.created_at) AND status = old.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_update AFTER UPDATE OF status ON tasks_task
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE tasks_taskstatuscounter SET count = count - 1 WHERE status = old.status;
+        UPDATE tasks_taskdailycounter SET count = count - 1
+            WHERE day = date(old.created_at) AND status = old.status;
+        INSERT INTO tasks_taskstatuscounter(status, count) VALUES (new.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+        INSERT INTO tasks_taskdailycounter(day, status, count) VALUES (date(new.created_at), new.status, 1)
+            ON CONFLICT(day, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    INSERT INTO tasks_taskstatuscounter(status, count)
+    SELECT status, COUNT(*) FROM tasks_task GROUP BY status
+    """,
+    """
+    INSERT INTO tasks_taskdailycounter(day, status, count)
+    SELECT date(created_at), status, COUNT(*) FROM tasks_task GROUP BY date(created_at), status
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_counters_insert',
+    'DROP TRIGGER IF EXISTS tasks_task_counters_delete',
+    'DROP TRIGGER IF EXISTS tasks_task_counters_update',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION tasks_task_counters() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE tasks_taskstatuscounter SET count = count - 1 WHERE status = OLD.status;
+            UPDATE tasks_taskdailycounter SET count = count - 1
+                WHERE day = (OLD.created_at AT TIME ZONE 'UTC')::date AND status = OLD.status;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO tasks_taskstatuscounter(status, count) VALUES (NEW.status, 1)
+                ON CONFLICT (status) DO UPDATE SET count = tasks_taskstatuscounter.count + 1;
+            INSERT INTO tasks_taskdailycounter(day, status, count)
+                VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.status, 1)
+                ON CONFLICT (day, status) DO UPDATE SET count = tasks_taskdailycounter.count + 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_counters AFTER INSERT OR DELETE ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_counters()
+    """,
+    """
+    CREATE TRIGGER tasks_task_counters_update AFTER UPDATE OF status ON tasks_task
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION tasks_task_counters()
+    """,
+    """
+    INSERT INTO tasks_taskstatuscounter(status, count)
+    SELECT status, COUNT(*) FROM tasks_task GROUP BY status
+    """,
+    """
+    INSERT INTO tasks_taskdailycounter(day, status, count)
+    SELECT (created_at AT TIME ZONE 'UTC')::date AS day, status, COUNT(*)
+    FROM tasks_task GROUP BY day, status
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_counters ON tasks_task',
+    'DROP TRIGGER IF EXISTS tasks_task_counters_update ON tasks_task',
+    'DROP FUNCTION IF EXISTS tasks_task_counters()',
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+}
+
+
+def create_counter_triggers(apps, schema_editor):
+    forward, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    # Для остальных СУБД счетчики не ведутся, статистика считается агрегатом
+    with schema_editor.connection.cursor() as cursor:
+        for statement in forward:
+            cursor.execute(statement)
+
+
+def drop_counter_triggers(apps, schema_editor):
+    _, backward = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    with schema_editor.connection.cursor() as cursor:
+        for statement in backward:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """
+    Счетчики задач по статусу и по дню создания (UTC).
+
+    Триггеры обновляют счетчики в той же транзакции, что и запись в tasks_task,
+    поэтому учитываются save, bulk_create, QuerySet.update и delete.
+    Миграции, пересоздающие tasks_task на SQLite, удаляют триггеры - после них
+    нужно повторно создать триггеры из SQLITE_FORWARD.
+    """
+
+    dependencies = [
+        ('tasks', '0003_title_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCounter',
+            fields=[
+                ('status', models.CharField(choices=[('active', 'Активна'), ('completed', 'Завершена')], max_length=20, primary_key=True, serialize=False, verbose_name='Состояние')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик задач по статусу',
+                'verbose_name_plural': 'Счетчики задач по статусу',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День создания')),
+                ('status', models.CharField(choices=[('active', 'Активна'), ('completed', 'Завершена')], max_length=20, verbose_name='Состояние')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик задач по дням',
+                'verbose_name_plural': 'Счетчики задач по дням',
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='tasks_daily_counter_day_status_uniq')],
+            },
+        ),
+        migrations.RunPython(create_counter_triggers, drop_counter_triggers),
+    ]
@@ -0,0 +1,37 @@
+# Generated migration: composite and partial indexes matched to list query shapes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='tasks_task_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-updated_at', '-id'], name='tasks_task_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['-created_at', '-id'], name='tasks_task_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['-created_at', '-id'], name='tasks_task_done_created_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated migration: tombstones of deleted tasks for the change feed
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_tombstone_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_tasktombstone(task_id, deleted_at)
+            VALUES (old.id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_tombstone_delete',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION tasks_task_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO tasks_tasktombstone(task_id, deleted_at) VALUES (OLD.id, now());
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_tombstone AFTER DELETE ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_tombstone()
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_tombstone ON tasks_task',
+    'DROP FUNCTION IF EXISTS tasks_task_tombstone()',
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+}
+
+
+def create_tombstone_trigger(apps, schema_editor):
+    forward, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    # Для остальных СУБД записи об удалении создает сигнал post_delete (tasks.signals)
+    with schema_editor.connection.cursor() as cursor:
+        for statement in forward:
+            cursor.execute(statement)
+
+
+def drop_tombstone_trigger(apps, schema_editor):
+    _, backward = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    with schema_editor.connection.cursor() as cursor:
+        for statement in backward:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """
+    Записи об удаленных задачах для ленты изменений.
+
+    Триггер пишет запись в той же транзакции, что и удаление, поэтому
+    учитываются и destroy, и пакетное удаление через QuerySet.delete.
+    Как и для 0004: миграции, пересоздающие tasks_task на SQLite, удаляют
+    триггер, его нужно создать повторно из SQLITE_FORWARD.
+    """
+
+    dependencies = [
+        ('tasks', '0005_reviewed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField(verbose_name='ID задачи')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленная задача',
+                'verbose_name_plural': 'Удаленные задачи',
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='tasks_tombstone_deleted_idx')],
+            },
+        ),
+        migrations.RunPython(create_tombstone_trigger, drop_tombstone_trigger),
+    ]
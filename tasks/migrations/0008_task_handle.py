@@ -0,0 +1,22 @@
+# Generated migration: handle of tasks created through the write-behind queue
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='handle',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Ключ отложенного создания'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('handle__isnull', False)), fields=('handle',), name='tasks_task_handle_uniq'),
+        ),
+    ]
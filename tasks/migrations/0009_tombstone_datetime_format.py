@@ -0,0 +1,66 @@
+# Generated migration: tombstone trigger writes deleted_at in Django's SQLite format
+
+from django.db import migrations
+
+# Django хранит datetime в SQLite текстом str(datetime): 'YYYY-MM-DD HH:MM:SS.ffffff',
+# без дробной части при нулевых микросекундах. Курсор ленты изменений сравнивается
+# с deleted_at как текст, поэтому триггер пишет время в том же виде
+# ('now' внутри одного оператора возвращает одно и то же время)
+DELETED_AT_SQL = (
+    "CASE WHEN strftime('%f', 'now') LIKE '%.000' "
+    "THEN strftime('%Y-%m-%d %H:%M:%S', 'now') "
+    "ELSE strftime('%Y-%m-%d %H:%M:%f', 'now') || '000' END"
+)
+
+SQLITE_FORWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_tombstone_delete',
+    f"""
+    CREATE TRIGGER tasks_task_tombstone_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_tasktombstone(task_id, deleted_at) VALUES (old.id, {DELETED_AT_SQL});
+    END
+    """,
+    # Записи, созданные прежним триггером (миллисекунды, три знака)
+    """
+    UPDATE tasks_tasktombstone SET deleted_at = CASE
+        WHEN deleted_at LIKE '%.000' THEN substr(deleted_at, 1, 19)
+        ELSE deleted_at || '000' END
+    WHERE length(deleted_at) = 23
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS tasks_task_tombstone_delete',
+    """
+    CREATE TRIGGER tasks_task_tombstone_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_tasktombstone(task_id, deleted_at)
+            VALUES (old.id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        # На PostgreSQL deleted_at - timestamptz, формат не важен
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """
+    Время удаления из триггера SQLite в формате Django. Прежний триггер писал
+    три знака миллисекунд, и сравнение с курсором '...SS.ffffff' не находило
+    записи той же миллисекунды: пакетное удаление больше порции ленты терялось.
+    """
+
+    dependencies = [
+        ('tasks', '0008_task_handle'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(SQLITE_FORWARD), run_statements(SQLITE_BACKWARD)),
+    ]
@@ -0,0 +1,174 @@
+# Generated migration: task counters split into shard rows
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Прежние триггеры и функция счетчиков, восстанавливаются при откате
+counters_0004 = import_module('tasks.migrations.0004_task_counters')
+
+# Число шардов на PostgreSQL. Шард выбирается по pid соединения: все строки
+# счетчиков одной транзакции в одном шарде, и параллельные соединения
+# (кроме совпавших по модулю) не блокируют друг друга
+COUNTER_SHARDS = 16
+
+# SQLite выполняет записи по одной, шарды ничего не дают - всегда шард 0
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (new.status, 0, 1)
+            ON CONFLICT(status, shard) DO UPDATE SET count = count + 1;
+        INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+            VALUES (date(new.created_at), new.status, 0, 1)
+            ON CONFLICT(day, status, shard) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (old.status, 0, -1)
+            ON CONFLICT(status, shard) DO UPDATE SET count = count - 1;
+        INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+            VALUES (date(old.created_at), old.status, 0, -1)
+            ON CONFLICT(day, status, shard) DO UPDATE SET count = count - 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_counters_update AFTER UPDATE OF status ON tasks_task
+    WHEN old.status IS NOT new.status BEGIN
+        INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (old.status, 0, -1)
+            ON CONFLICT(status, shard) DO UPDATE SET count = count - 1;
+        INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+            VALUES (date(old.created_at), old.status, 0, -1)
+            ON CONFLICT(day, status, shard) DO UPDATE SET count = count - 1;
+        INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (new.status, 0, 1)
+            ON CONFLICT(status, shard) DO UPDATE SET count = count + 1;
+        INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+            VALUES (date(new.created_at), new.status, 0, 1)
+            ON CONFLICT(day, status, shard) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    INSERT INTO tasks_taskstatuscounter(status, shard, count)
+    SELECT status, 0, COUNT(*) FROM tasks_task GROUP BY status
+    """,
+    """
+    INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+    SELECT date(created_at), status, 0, COUNT(*) FROM tasks_task GROUP BY date(created_at), status
+    """,
+]
+
+POSTGRES_FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION tasks_task_counters() RETURNS trigger AS $$
+    DECLARE
+        counter_shard smallint := pg_backend_pid() % {COUNTER_SHARDS};
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (OLD.status, counter_shard, -1)
+                ON CONFLICT (status, shard) DO UPDATE SET count = tasks_taskstatuscounter.count - 1;
+            INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+                VALUES ((OLD.created_at AT TIME ZONE 'UTC')::date, OLD.status, counter_shard, -1)
+                ON CONFLICT (day, status, shard) DO UPDATE SET count = tasks_taskdailycounter.count - 1;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO tasks_taskstatuscounter(status, shard, count) VALUES (NEW.status, counter_shard, 1)
+                ON CONFLICT (status, shard) DO UPDATE SET count = tasks_taskstatuscounter.count + 1;
+            INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+                VALUES ((NEW.created_at AT TIME ZONE 'UTC')::date, NEW.status, counter_shard, 1)
+                ON CONFLICT (day, status, shard) DO UPDATE SET count = tasks_taskdailycounter.count + 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_counters AFTER INSERT OR DELETE ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_counters()
+    """,
+    """
+    CREATE TRIGGER tasks_task_counters_update AFTER UPDATE OF status ON tasks_task
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION tasks_task_counters()
+    """,
+    """
+    INSERT INTO tasks_taskstatuscounter(status, shard, count)
+    SELECT status, 0, COUNT(*) FROM tasks_task GROUP BY status
+    """,
+    """
+    INSERT INTO tasks_taskdailycounter(day, status, shard, count)
+    SELECT (created_at AT TIME ZONE 'UTC')::date AS day, status, 0, COUNT(*)
+    FROM tasks_task GROUP BY day, status
+    """,
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, counters_0004.SQLITE_BACKWARD),
+    'postgresql': (POSTGRES_FORWARD, counters_0004.POSTGRES_BACKWARD),
+}
+
+
+def create_counter_triggers(apps, schema_editor):
+    forward, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    with schema_editor.connection.cursor() as cursor:
+        for statement in forward:
+            cursor.execute(statement)
+
+
+def drop_counter_triggers(apps, schema_editor):
+    _, backward = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    with schema_editor.connection.cursor() as cursor:
+        for statement in backward:
+            cursor.execute(statement)
+
+
+STATUS_CHOICES = [('active', 'Активна'), ('completed', 'Завершена')]
+
+
+class Migration(migrations.Migration):
+    """
+    Счетчики задач разбиты на шарды (status, shard) и (day, status, shard).
+
+    Прежний триггер PostgreSQL обновлял одну строку на статус, и все пишущие
+    транзакции ждали ее блокировку до коммита. Таблицы счетчиков пересоздаются
+    (данные в них производные) и заполняются агрегатом по tasks_task в шард 0.
+    """
+
+    dependencies = [
+        ('tasks', '0009_tombstone_datetime_format'),
+    ]
+
+    operations = [
+        migrations.RunPython(counters_0004.drop_counter_triggers, counters_0004.create_counter_triggers),
+        migrations.DeleteModel(name='TaskStatusCounter'),
+        migrations.DeleteModel(name='TaskDailyCounter'),
+        migrations.CreateModel(
+            name='TaskStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=STATUS_CHOICES, max_length=20, verbose_name='Состояние')),
+                ('shard', models.PositiveSmallIntegerField(default=0, verbose_name='Шард')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик задач по статусу',
+                'verbose_name_plural': 'Счетчики задач по статусу',
+                'constraints': [models.UniqueConstraint(fields=('status', 'shard'), name='tasks_status_counter_status_shard_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDailyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День создания')),
+                ('status', models.CharField(choices=STATUS_CHOICES, max_length=20, verbose_name='Состояние')),
+                ('shard', models.PositiveSmallIntegerField(default=0, verbose_name='Шард')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик задач по дням',
+                'verbose_name_plural': 'Счетчики задач по дням',
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'shard'), name='tasks_daily_counter_day_status_shard_uniq')],
+            },
+        ),
+        migrations.RunPython(create_counter_triggers, drop_counter_triggers),
+    ]
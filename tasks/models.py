@@ -1,5 +1,6 @@
 
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
 
@@ -40,14 +41,50 @@ class Task(models.Model):
         auto_now=True,
         verbose_name='Дата обновления'
     )
+    # Ключ ответа 202 отложенного создания (tasks.write_behind), у остальных задач NULL
+    handle = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Ключ отложенного создания'
+    )
 
     class Meta:
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
         ordering = ['-created_at']
+        # Проверка планов запросов списка: manage.py explain_task_queries
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['-created_at']),
+            # Составные индексы для keyset-пагинации (поле сортировки, id),
+            # они же для диапазонов created_after/created_before
+            models.Index(fields=['-created_at', '-id'], name='tasks_task_created_id_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='tasks_task_updated_id_idx'),
+            models.Index(fields=['title', 'id'], name='tasks_task_title_id_idx'),
+            # status = ? ORDER BY created_at/updated_at без сортировки вне индекса
+            # (заменяют одиночные индексы по status и -created_at)
+            models.Index(fields=['status', '-created_at', '-id'], name='tasks_task_status_created_idx'),
+            models.Index(fields=['status', '-updated_at', '-id'], name='tasks_task_status_updated_idx'),
+            # Частичные индексы для active/completed: меньше составного, планировщик
+            # выбирает их, когда статус известен при планировании (PostgreSQL)
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='active'),
+                name='tasks_task_active_created_idx',
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(status='completed'),
+                name='tasks_task_done_created_idx',
+            ),
+        ]
+        constraints = [
+            # Частичный уникальный индекс: только задачи из очереди отложенного создания,
+            # на SQLite создается без пересборки таблицы (и ее триггеров)
+            models.UniqueConstraint(
+                fields=['handle'],
+                condition=models.Q(handle__isnull=False),
+                name='tasks_task_handle_uniq',
+            ),
         ]
 
     def __str__(self):
@@ -61,3 +98,99 @@ class Task(models.Model):
         """Проверка, завершена ли задача"""
         return self.status == TaskStatus.COMPLETED
 
+
+
+class TaskStatusCounter(models.Model):
+    """
+    Количество задач по статусу. Поддерживается триггерами БД на tasks_task
+    (миграции 0004 и 0010), пересчитывается командой reconcile_task_counters.
+
+    Счетчик разбит на строки-шарды: на PostgreSQL каждое соединение пишет в свой
+    шард, чтобы параллельные транзакции не ждали блокировку одной строки.
+    Значение счетчика - сумма по шардам, отдельный шард может быть отрицательным.
+    """
+    status = models.CharField(
+        max_length=20,
+        choices=TaskStatus.choices,
+        verbose_name='Состояние'
+    )
+    shard = models.PositiveSmallIntegerField(default=0, verbose_name='Шард')
+    count = models.BigIntegerField(default=0, verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Счетчик задач по статусу'
+        verbose_name_plural = 'Счетчики задач по статусу'
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'shard'], name='tasks_status_counter_status_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.status} [{self.shard}]: {self.count}'
+
+
+class TaskDailyCounter(models.Model):
+    """
+    Количество задач по дню создания (UTC) и статусу, поддерживается теми же
+    триггерами и так же разбито на шарды
+    """
+    day = models.DateField(verbose_name='День создания')
+    status = models.CharField(
+        max_length=20,
+        choices=TaskStatus.choices,
+        verbose_name='Состояние'
+    )
+    shard = models.PositiveSmallIntegerField(default=0, verbose_name='Шард')
+    count = models.BigIntegerField(default=0, verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Счетчик задач по дням'
+        verbose_name_plural = 'Счетчики задач по дням'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'shard'], name='tasks_daily_counter_day_status_shard_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.status} [{self.shard}]: {self.count}'
+
+
+class TaskTombstone(models.Model):
+    """
+    Запись об удаленной задаче для ленты изменений /api/tasks/changes/.
+    Создается триггером БД на удаление из tasks_task (миграции 0006 и 0009),
+    старые записи удаляет команда purge_task_tombstones.
+    """
+    task_id = models.BigIntegerField(verbose_name='ID задачи')
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name='Дата удаления')
+
+    class Meta:
+        verbose_name = 'Удаленная задача'
+        verbose_name_plural = 'Удаленные задачи'
+        indexes = [
+            # Keyset-выборка ленты изменений по (deleted_at, id)
+            models.Index(fields=['deleted_at', 'id'], name='tasks_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} ({self.deleted_at})'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Ответ на запрос с заголовком Idempotency-Key (tasks.idempotency): повтор
+    запроса с тем же ключом получает сохраненный ответ без обращения к задачам.
+    Записи старше TASKS_IDEMPOTENCY['TTL_HOURS'] удаляет команда purge_idempotency_keys.
+    """
+    key = models.CharField(max_length=255, unique=True, verbose_name='Ключ')
+    fingerprint = models.CharField(max_length=64, verbose_name='Отпечаток запроса')
+    status_code = models.PositiveSmallIntegerField(verbose_name='Код ответа')
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder, verbose_name='Тело ответа')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+
+    def __str__(self):
+        return f'{self.key} ({self.status_code})'
@@ -1,17 +1,287 @@
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+import math
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counters import estimate_count
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Keyset-пагинация по паре (поле сортировки, id).
+
+    Вместо OFFSET страница выбирается условием
+    `(field, id) < (value, id)`, которое обслуживается составными
+    индексами из Task.Meta.indexes, поэтому время ответа не зависит
+    от глубины страницы. Общее количество считается только по запросу
+    (`?count=true`).
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    default_ordering = '-created_at'
+    # Поля, для которых есть составные индексы (поле, id)
+    keyset_fields = ('created_at', 'updated_at', 'title')
+    datetime_fields = ('created_at', 'updated_at')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выборка одной страницы по курсору"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request)
+        position = self.decode_cursor(request)
+        self.reverse = position is not None and position['r']
+        # Общее количество - по queryset до условия курсора
+        self.count = queryset.count() if self.include_count(request) else None
+
+        # При движении назад сортировка и условие разворачиваются
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+        if position is not None:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': position['v']}) |
+                Q(**{self.field: position['v'], f'id__{lookup}': position['id']})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_following = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        """Ответ в формате, совместимом с TaskPagination"""
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        """Размер страницы с учетом ограничения max_page_size"""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        """Поле сортировки и направление для keyset-выборки"""
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        field = ordering.lstrip('-')
+        if ',' in ordering or field not in self.keyset_fields:
+            raise ValidationError({
+                self.ordering_query_param: (
+                    'В режиме курсора поддерживается сортировка только по одному полю: '
+                    f'{", ".join(self.keyset_fields)}'
+                )
+            })
+        return field, ordering.startswith('-')
+
+    def include_count(self, request):
+        """Нужно ли считать общее количество записей"""
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def decode_cursor(self, request):
+        """Разбор курсора из query параметров"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = {'v': data['v'], 'id': int(data['id']), 'r': bool(data.get('r'))}
+        except (binascii.Error, ValueError, TypeError, KeyError, UnicodeError):
+            raise NotFound('Некорректный курсор')
+        if data.get('f') != self.field:
+            raise NotFound('Курсор не соответствует текущей сортировке')
+        if self.field in self.datetime_fields:
+            position['v'] = parse_datetime(position['v']) if isinstance(position['v'], str) else None
+            if position['v'] is None:
+                raise NotFound('Некорректный курсор')
+        return position
+
+    def encode_cursor(self, row, reverse):
+        """Курсор, указывающий на позицию строки row"""
+        value = getattr(row, self.field)
+        if self.field in self.datetime_fields:
+            value = value.isoformat()
+        data = {'f': self.field, 'v': value, 'id': row.id}
+        if reverse:
+            data['r'] = 1
+        raw = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.rows[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.rows:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.rows[0], True))
 
 
 class TaskPagination(PageNumberPagination):
-    """Пагинация для списка задач"""
-    
+    """
+    Пагинация для списка задач.
+
+    По умолчанию постраничная (`?page=`), режим курсора включается
+    параметром `?pagination=cursor` или наличием `?cursor=`.
+
+    Общее количество в постраничном режиме задается `?count=`:
+    точное (по умолчанию), `false` - без COUNT(*), `estimate` - из счетчиков,
+    кэша или оценки планировщика с пометкой `count_estimated`. Без точного
+    количества наличие следующей страницы определяется выборкой page_size + 1 строк.
+    """
+
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
-    
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    count_modes = {
+        'true': 'exact', '1': 'exact', 'yes': 'exact', 'exact': 'exact',
+        'false': 'none', '0': 'none', 'no': 'none',
+        'estimate': 'estimate',
+    }
+    cursor_pagination_class = TaskCursorPagination
+
+    def is_cursor_mode(self, request):
+        """Выбран ли режим курсора для текущего запроса"""
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor_param in request.query_params
+        )
+
+    def get_count_mode(self, request):
+        """Режим подсчета общего количества: exact, none или estimate"""
+        value = request.query_params.get(self.count_query_param)
+        if not value:
+            return 'exact'
+        try:
+            return self.count_modes[value.lower()]
+        except KeyError:
+            raise ValidationError({self.count_query_param: ['Допустимые значения: true, false, estimate']})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбор режима пагинации для запроса"""
+        self.cursor_paginator = None
+        self.count_mode = 'exact'
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.count_mode = self.get_count_mode(request)
+        if self.count_mode != 'exact':
+            return self.paginate_without_count(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_without_count(self, queryset, request, view=None):
+        """
+        Страница без точного COUNT(*): выбирается page_size + 1 строк,
+        лишняя строка показывает, есть ли следующая страница.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError(page_number)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=''))
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=''))
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        self.count = self.count_estimated = None
+        if self.count_mode == 'estimate':
+            statuses = view.get_count_statuses() if hasattr(view, 'get_count_statuses') else None
+            if self.has_next:
+                self.count, self.count_estimated = estimate_count(queryset, statuses)
+                # Оценка не может быть меньше количества уже увиденных строк
+                self.count = max(self.count, offset + len(rows) + 1)
+            else:
+                # На последней странице точное количество известно без запроса
+                self.count, self.count_estimated = offset + len(rows), False
+        return rows
+
+    def get_probe_link(self, page_number):
+        """Ссылка на страницу page_number в режиме без точного количества"""
+        url = self.request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Постраничная выборка через асинхронный ORM (acount и async for),
+        в остальном повторяет PageNumberPagination.paginate_queryset.
+        Режим курсора и ?count=false|estimate асинхронные представления
+        отдают синхронному ViewSet.
+        """
+        self.cursor_paginator = None
+        self.count_mode = 'exact'
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Количество считается заранее, дальше Paginator не обращается к БД
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        self.request = request
+        return [row async for row in self.page.object_list]
+
     def get_paginated_response(self, data):
         """Кастомный формат ответа с пагинацией"""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if self.count_mode != 'exact':
+            return self.get_probe_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
@@ -22,3 +292,17 @@ class TaskPagination(PageNumberPagination):
             'results': data
         })
 
+    def get_probe_paginated_response(self, data):
+        """Ответ без точного количества: count и total_pages только в режиме estimate"""
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_estimated'] = self.count_estimated
+        payload['next'] = self.get_probe_link(self.page_number + 1) if self.has_next else None
+        payload['previous'] = self.get_probe_link(self.page_number - 1) if self.page_number > 1 else None
+        payload['page_size'] = self.page_size
+        if self.count is not None:
+            payload['total_pages'] = max(1, math.ceil(self.count / self.get_page_size(self.request)))
+        payload['current_page'] = self.page_number
+        payload['results'] = data
+        return Response(payload)
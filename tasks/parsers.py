@@ -0,0 +1,30 @@
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .json_backends import get_json_backend
+from .renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson/msgspec (TASKS_JSON_BACKEND), тело разбирается целиком из байтов"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        backend = get_json_backend()
+        if backend.name == 'stdlib' or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                content = content.decode(encoding)
+            return backend.loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,75 @@
+
+import re
+from collections import Counter
+
+from django.conf import settings
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к API превысил бюджет запросов к БД"""
+
+
+class QueryBudget:
+    """
+    Бюджет запросов к БД на один HTTP запрос: не больше max_queries запросов
+    и не больше max_repeats запросов одной формы (признак N+1).
+    """
+
+    def __init__(self, max_queries=None, max_repeats=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def check(self, statements):
+        """Описания нарушений бюджета для списка SQL (пустой список - бюджет соблюден)"""
+        violations = []
+        if self.max_queries is not None and len(statements) > self.max_queries:
+            violations.append(f'{len(statements)} запросов к БД при бюджете {self.max_queries}')
+        max_repeats = self.max_repeats
+        if max_repeats is None:
+            max_repeats = settings.TASKS_QUERY_BUDGET['MAX_REPEATS']
+        for shape, count in Counter(map(sql_shape, statements)).items():
+            if count > max_repeats:
+                violations.append(f'{count} запросов одной формы (возможен N+1): {shape}')
+        return violations
+
+
+def query_budget(max_queries=None, max_repeats=None):
+    """
+    Объявление бюджета запросов у действия ViewSet:
+
+        @query_budget(3)
+        def list(self, request): ...
+
+    Может стоять выше или ниже @action.
+    """
+    def decorator(func):
+        func.query_budget = QueryBudget(max_queries, max_repeats)
+        return func
+    return decorator
+
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_in_lists = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_spaces = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """SQL без значений: литералы и параметры заменены на ?, списки IN (?, ?, ...) - на (...)"""
+    shape = _literals.sub('?', sql)
+    shape = _in_lists.sub('(...)', shape)
+    return _spaces.sub(' ', shape).strip()
+
+
+def get_view_budget(view_func, method):
+    """
+    Бюджет действия, которое обслуживает view_func для HTTP метода, или
+    бюджет по умолчанию (только проверка повторов). Для tasks.async_views
+    берется бюджет того же действия TaskViewSet.
+    """
+    view_func = getattr(view_func, 'view_initkwargs', {}).get('sync_view', view_func)
+    viewset_class = getattr(view_func, 'cls', None)
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    if method.lower() == 'head' and action is None:
+        action = (getattr(view_func, 'actions', None) or {}).get('get')
+    budget = getattr(getattr(viewset_class, action, None), 'query_budget', None) if action else None
+    return budget or QueryBudget()
@@ -0,0 +1,64 @@
+
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .json_backends import get_json_backend
+from .metrics import timed
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Рендерер для согласования формата выгрузки (application/x-ndjson).
+    Сами строки выгрузки отдаются потоком, через рендерер проходят только ошибки.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Рендерер для согласования формата выгрузки (text/csv), ошибки отдаются текстом"""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson/msgspec (TASKS_JSON_BACKEND) с тем же результатом,
+    что и у стандартного рендерера DRF.
+
+    Отступы (browsable API, ?indent) и ensure_ascii, а также данные, которые
+    быстрая библиотека не умеет сериализовать, обрабатываются стандартным json.
+    """
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        backend = get_json_backend()
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if backend.name == 'stdlib' or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = backend.dumps(data, default=self.encoder_class().default)
+        except (TypeError, ValueError, OverflowError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и JSONRenderer, экранируем U+2028 и U+2029 для совместимости с JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
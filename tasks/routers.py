@@ -0,0 +1,93 @@
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Разрешено ли читать с реплики в текущем контексте (безопасные действия чтения TaskViewSet)
+_replica_reads = ContextVar('tasks_replica_reads', default=False)
+# Чтение с основной БД: в запросе уже была запись или клиент недавно писал (cookie)
+_pinned_to_primary = ContextVar('tasks_pinned_to_primary', default=False)
+# Реплика, выбранная для блока replica_reads(): все чтения ответа идут в одну реплику
+_replica_alias = ContextVar('tasks_replica_alias', default=None)
+
+
+def replicas_configured():
+    return bool(settings.TASKS_REPLICA_DATABASES)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Блок, чтения в котором могут идти на реплики (если контекст не закреплен
+    за основной БД). Реплика выбирается один раз на блок, чтобы ответ не
+    собирался из реплик с разным отставанием. Закрепление после записи внутри
+    блока действует до его конца.
+    """
+    replicas = settings.TASKS_REPLICA_DATABASES
+    token = _replica_reads.set(enabled)
+    alias_token = _replica_alias.set(random.choice(replicas) if enabled and replicas else None)
+    pinned_token = _pinned_to_primary.set(_pinned_to_primary.get())
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(pinned_token)
+        _replica_alias.reset(alias_token)
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    """Блок, все чтения в котором идут в основную БД"""
+    token = _pinned_to_primary.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+def get_read_alias():
+    """БД, в которую сейчас пойдет чтение: реплика блока replica_reads() или ReplicaRouter.primary"""
+    alias = _replica_alias.get()
+    if _replica_reads.get() and not _pinned_to_primary.get() and alias is not None:
+        return alias
+    return ReplicaRouter.primary
+
+
+def reads_from_primary():
+    return get_read_alias() == ReplicaRouter.primary
+
+
+class ReplicaRouter:
+    """
+    Чтение с реплик TASKS_REPLICA_DATABASES (случайная реплика на блок
+    replica_reads(), то есть на HTTP-запрос) только внутри replica_reads(),
+    запись - всегда в default.
+
+    После записи чтения в том же контексте идут в default (read-your-writes
+    внутри запроса); между запросами закрепление за default ведет
+    ReplicaPinningMiddleware по cookie.
+    """
+
+    primary = 'default'
+
+    def db_for_read(self, model, **hints):
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        if _replica_reads.get():
+            _pinned_to_primary.set(True)
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *settings.TASKS_REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит с репликацией (или sync_sqlite_replicas)
+        if db in settings.TASKS_REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,162 @@
+
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'tasks_task_fts'
+POSTGRES_INDEX = 'tasks_task_title_fts_idx'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SimpleSearchBackend:
+    """Поиск подстроки без учета регистра (LIKE '%term%', без индекса)"""
+
+    ranked = False
+
+    def filter(self, queryset, term):
+        return queryset.filter(title__icontains=term)
+
+    def annotate_rank(self, queryset, term):
+        return queryset
+
+    def rebuild(self):
+        return False
+
+
+class SQLiteFTSSearchBackend(SimpleSearchBackend):
+    """
+    Полнотекстовый поиск по виртуальной таблице FTS5 tasks_task_fts.
+
+    Таблица синхронизируется с tasks_task триггерами (миграция 0003),
+    поэтому учитывает и bulk_create, и QuerySet.update. Каждое слово
+    запроса ищется как префикс, результаты ранжируются по bm25.
+    """
+
+    ranked = True
+
+    def build_match(self, term):
+        """Выражение MATCH: все слова запроса как префиксы"""
+        tokens = TOKEN_RE.findall(term)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, term):
+        match = self.build_match(term)
+        if not match:
+            return super().filter(queryset, term)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+
+    def annotate_rank(self, queryset, term):
+        match = self.build_match(term)
+        if not match:
+            return queryset
+        # bm25 тем меньше, чем выше релевантность, поэтому знак меняется
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = tasks_task.id',
+            [match]
+        ))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        return True
+
+
+class PostgresSearchBackend(SimpleSearchBackend):
+    """
+    Полнотекстовый поиск PostgreSQL по to_tsvector('simple', title)
+    с GIN индексом (миграция 0003), префиксные запросы и ранжирование ts_rank.
+    """
+
+    ranked = True
+
+    def build_query(self, term):
+        from django.contrib.postgres.search import SearchQuery
+
+        tokens = TOKEN_RE.findall(term)
+        if not tokens:
+            return None
+        return SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens),
+            search_type='raw',
+            config='simple'
+        )
+
+    def filter(self, queryset, term):
+        from django.contrib.postgres.search import SearchVector
+
+        query = self.build_query(term)
+        if query is None:
+            return super().filter(queryset, term)
+        return queryset.alias(
+            search_vector=SearchVector('title', config='simple')
+        ).filter(search_vector=query)
+
+    def annotate_rank(self, queryset, term):
+        from django.contrib.postgres.search import SearchRank, SearchVector
+
+        query = self.build_query(term)
+        if query is None:
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(SearchVector('title', config='simple'), query)
+        )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {POSTGRES_INDEX}')
+        return True
+
+
+FULLTEXT_BACKENDS = {
+    'sqlite': SQLiteFTSSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+_fts_tables = {}
+
+
+def fts_table_exists():
+    """Создана ли таблица FTS5 (SQLite может быть собран без FTS5)"""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+async def awarm_search_backend():
+    """
+    Проверка таблицы FTS5 до фильтрации в асинхронном коде: introspection
+    синхронная, дальше get_search_backend берет результат из памяти.
+    """
+    if (
+        getattr(settings, 'TASKS_SEARCH_BACKEND', 'simple') == 'fulltext'
+        and connection.vendor == 'sqlite'
+        and connection.settings_dict['NAME'] not in _fts_tables
+    ):
+        await sync_to_async(fts_table_exists)()
+
+
+def get_fulltext_backend():
+    """Полнотекстовый бэкенд для текущей СУБД или None, если он недоступен"""
+    backend_class = FULLTEXT_BACKENDS.get(connection.vendor)
+    if backend_class is SQLiteFTSSearchBackend and not fts_table_exists():
+        return None
+    return backend_class() if backend_class else None
+
+
+def get_search_backend():
+    """Бэкенд поиска по настройке TASKS_SEARCH_BACKEND ('simple' или 'fulltext')"""
+    if getattr(settings, 'TASKS_SEARCH_BACKEND', 'simple') == 'fulltext':
+        backend = get_fulltext_backend()
+        if backend is not None:
+            return backend
+    return SimpleSearchBackend()
@@ -1,9 +1,39 @@
 
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .metrics import timed
 from .models import Task, TaskStatus
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """
+    Пакетный сериализатор: ошибки валидации собираются по каждому элементу,
+    не отклоняя весь пакет. validated_data содержит пары (данные, ошибки).
+    """
+
+    def run_child_validation(self, data):
+        try:
+            return super().run_child_validation(data), None
+        except serializers.ValidationError as exc:
+            return None, exc.detail
+
+
+class TimedDataMixin:
+    """Время получения .data учитывается в метриках запроса (фаза serialize)"""
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TaskListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """Список TaskSerializer (many=True) с учетом времени сериализации"""
+
+
+class TaskSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Сериализатор для модели Task"""
     
     status_display = serializers.CharField(
@@ -19,6 +49,7 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'status', 'status_display', 'is_active', 
                   'is_completed', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = TaskListSerializer
         extra_kwargs = {
             'title': {
                 'help_text': 'Название задачи (обязательное поле)',
@@ -55,6 +86,7 @@ class TaskCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['title', 'status']
+        list_serializer_class = TaskBulkListSerializer
         extra_kwargs = {
             'title': {'required': True},
             'status': {'required': False, 'default': TaskStatus.ACTIVE}
@@ -73,6 +105,7 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['title', 'status']
+        list_serializer_class = TaskBulkListSerializer
         extra_kwargs = {
             'title': {'required': False},
             'status': {'required': False}
@@ -86,3 +119,59 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
             return value.strip()
         return value
 
+
+
+class TaskListFastSerializer:
+    """
+    Быстрая сериализация списка задач только для чтения.
+
+    Работает с кортежами из values_list(*query_fields, named=True) вместо
+    экземпляров модели и DRF полей, а результат совпадает с TaskSerializer
+    поле в поле (порядок ключей, форматы дат, подписи статусов).
+    """
+
+    query_fields = ('id', 'title', 'status', 'created_at', 'updated_at')
+    status_labels = dict(TaskStatus.choices)
+
+    def __init__(self, instance=None, many=True, **kwargs):
+        self.instance = instance
+
+    @property
+    @timed('serialize')
+    def data(self):
+        format_datetime = self.get_datetime_formatter()
+        labels = self.status_labels
+        active = TaskStatus.ACTIVE.value
+        completed = TaskStatus.COMPLETED.value
+        return [
+            {
+                'id': task_id,
+                'title': title,
+                'status': task_status,
+                'status_display': labels.get(task_status, task_status),
+                'is_active': task_status == active,
+                'is_completed': task_status == completed,
+                'created_at': format_datetime(created_at),
+                'updated_at': format_datetime(updated_at),
+            }
+            for task_id, title, task_status, created_at, updated_at in self.instance
+        ]
+
+    @staticmethod
+    def get_datetime_formatter():
+        """Форматирование дат как у serializers.DateTimeField"""
+        if str(api_settings.DATETIME_FORMAT).lower() != 'iso-8601':
+            return serializers.DateTimeField().to_representation
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def format_datetime(value):
+            if not value:
+                return None
+            if tz is not None:
+                value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+            value = value.isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return format_datetime
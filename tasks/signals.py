@@ -0,0 +1,32 @@
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_task_cache
+from .changes import tombstones_by_trigger
+from .metrics import install_query_timer
+from .models import Task, TaskTombstone
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_cache_on_write(sender, **kwargs):
+    """Инвалидация кэша ответов при любой записи задачи через ORM"""
+    invalidate_task_cache()
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone(sender, instance, using, **kwargs):
+    """Запись об удалении для ленты изменений на СУБД без триггера из миграции 0006"""
+    if not tombstones_by_trigger(connections[using].vendor):
+        TaskTombstone.objects.using(using).create(task_id=instance.pk)
+
+
+@receiver(connection_created)
+def install_query_timer_on_connect(sender, connection, **kwargs):
+    """Учет запросов к БД для PerformanceMiddleware и QueryBudgetMiddleware на каждом новом соединении"""
+    if settings.TASKS_PERF['ENABLED'] or settings.TASKS_QUERY_BUDGET['ENABLED']:
+        install_query_timer(connection)
@@ -0,0 +1,94 @@
+
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+
+
+class WriteQueue:
+    """
+    Очередь единственного писателя: функции выполняются по одной в отдельном
+    потоке в порядке поступления, вызывающий поток ждет результата.
+
+    SQLite допускает одну пишущую транзакцию за раз, остальные ждут
+    busy_timeout и могут получить "database is locked". Очередь убирает
+    конкуренцию за блокировку между потоками одного процесса.
+    """
+
+    def __init__(self, name='tasks-sqlite-writer'):
+        self.name = name
+        self.jobs = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def run(self, func, *args, **kwargs):
+        """Выполнение func(*args, **kwargs) в потоке писателя с контекстом вызывающего"""
+        self.start()
+        future = Future()
+        self.jobs.put((contextvars.copy_context(), future, func, args, kwargs))
+        return future.result()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.work, name=self.name, daemon=True)
+                self.thread.start()
+
+    def work(self):
+        while True:
+            context, future, func, args, kwargs = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = context.run(func, *args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+_write_queue = None
+
+
+def get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
+
+
+def _write_job(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Соединение потока писателя живет по тем же правилам CONN_MAX_AGE, что и в запросах
+        connection.close_if_unusable_or_obsolete()
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Выполнение записи func (транзакции - внутри func). При TASKS_SQLITE_WRITE_QUEUE
+    на SQLite запись идет через очередь единственного писателя, иначе - в текущем
+    потоке. Внутри уже открытой транзакции запись всегда выполняется в текущем
+    потоке: писатель ждал бы блокировку, которую держит вызывающий.
+    """
+    if (
+        not settings.TASKS_SQLITE_WRITE_QUEUE
+        or connection.vendor != 'sqlite'
+        or connection.in_atomic_block
+    ):
+        return func(*args, **kwargs)
+    return get_write_queue().run(_write_job, func, args, kwargs)
+
+
+def reset_write_queue(*, setting, **kwargs):
+    global _write_queue
+    if setting == 'TASKS_SQLITE_WRITE_QUEUE':
+        _write_queue = None
+
+
+setting_changed.connect(reset_write_queue)
@@ -1,9 +1,73 @@
 
-from django.test import TestCase
-from django.urls import reverse
+import csv
+import datetime
+import json
+import logging
+import logging.config
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve, reverse
+from django.utils import timezone
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Task, TaskStatus
+from .bench import compare_reports, is_write_operation, measure_request, seed_tasks, summarize
+from .cache import LocalMemoryBackend, get_task_cache
+from .metrics import REGISTRY
+from .query_budget import QueryBudget, QueryBudgetExceeded, get_view_budget, sql_shape
+from .log import BatchStreamHandler, JSONFormatter, JSONMessage, QueueLogHandler, get_handler
+from .json_backends import JSON_BACKENDS, get_json_backend, load_json_backend
+from .counters import (
+    compute_daily_counts, compute_status_counts, get_count_cache, get_daily_counts,
+    get_status_counts, read_status_counters,
+)
+from .idempotency import REPLAYED_HEADER, find_record
+from .models import IdempotencyKey, Task, TaskDailyCounter, TaskStatus, TaskStatusCounter, TaskTombstone
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, replica_reads
+from .serializers import TaskListFastSerializer, TaskSerializer
+from .sqlite import run_write
+from .urls import async_urlpatterns, sync_urlpatterns
+from .write_behind import WriteBehindQueue, get_write_behind_queue, resolve_handle
+
+# URL конфигурация с асинхронными обработчиками (как при TASKS_ASYNC_VIEWS=True)
+ASYNC_URLCONF = (path('api/', include(async_urlpatterns + sync_urlpatterns)),)
+# Кэш ответов выключен по умолчанию (TASKS_CACHE), тесты кэша включают его
+CACHE_ENABLED = {'ENABLED': True}
+
+
+class QueryBudgetClient(APIClient):
+    """
+    Тестовый клиент, проверяющий бюджет запросов к БД (@query_budget действия
+    TaskViewSet) для каждого ответа: при превышении тест падает со списком SQL.
+    """
+
+    def request(self, **request):
+        with CaptureQueriesContext(connection) as queries:
+            response = super().request(**request)
+        budget = get_view_budget(response.resolver_match.func, request['REQUEST_METHOD'])
+        statements = [query['sql'] for query in queries.captured_queries]
+        violations = budget.check(statements)
+        if violations:
+            raise AssertionError(
+                f'{request["REQUEST_METHOD"]} {request["PATH_INFO"]}: ' + '; '.join(violations)
+                + '\n' + '\n'.join(statements)
+            )
+        return response
 
 
 class TaskModelTest(TestCase):
@@ -40,7 +104,7 @@ class TaskAPITest(TestCase):
 
     def setUp(self):
         """Настройка тестовых данных"""
-        self.client = APIClient()
+        self.client = QueryBudgetClient()
         self.task = Task.objects.create(
             title='Тестовая задача',
             status=TaskStatus.ACTIVE
@@ -163,3 +227,1592 @@ class TaskAPITest(TestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['title'], 'Тестовая задача')
 
+
+
+class TaskCursorPaginationTest(TestCase):
+    """Тесты keyset-пагинации"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.tasks = [
+            Task.objects.create(title=f'Задача {i:02d}', status=TaskStatus.ACTIVE)
+            for i in range(5)
+        ]
+
+    def test_cursor_walks_all_pages(self):
+        """Тест обхода всех страниц по курсору без пропусков и повторов"""
+        url = reverse('task-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        seen = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(item['id'] for item in response.data['results'])
+        expected = list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_previous_link(self):
+        """Тест возврата на предыдущую страницу"""
+        url = reverse('task-list')
+        first = self.client.get(url, {'pagination': 'cursor', 'page_size': 2, 'ordering': 'title'})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+        self.assertEqual(
+            [item['title'] for item in first.data['results']],
+            ['Задача 00', 'Задача 01']
+        )
+
+    def test_cursor_optional_count(self):
+        """Тест подсчета количества только по запросу"""
+        url = reverse('task-active')
+        response = self.client.get(url, {'pagination': 'cursor', 'count': 'true', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        # Общее количество, а не число строк после курсора, в обе стороны
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['count'], 5)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['count'], 5)
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['count'], 5)
+
+    def test_cursor_unsupported_ordering(self):
+        """Тест отказа для сортировки без составного индекса"""
+        url = reverse('task-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'ordering': 'status'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskBulkAPITest(TestCase):
+    """Тесты пакетных операций"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.url = reverse('task-bulk')
+        self.task = Task.objects.create(title='Тестовая задача', status=TaskStatus.ACTIVE)
+
+    def test_bulk_create(self):
+        """Тест пакетного создания задач"""
+        data = [{'title': 'Первая'}, {'title': 'Вторая', 'status': TaskStatus.COMPLETED}]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(response.data['results'][1]['data']['status'], TaskStatus.COMPLETED)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Тест ошибок по отдельным элементам без отказа всего пакета"""
+        data = [{'title': 'Первая'}, {'title': '   '}, {'title': 'Третья', 'status': 'unknown'}]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['succeeded'], 1)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['created', 'error', 'error']
+        )
+        self.assertIn('title', response.data['results'][1]['errors'])
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_bulk_update(self):
+        """Тест пакетного обновления задач"""
+        data = [
+            {'id': self.task.pk, 'status': TaskStatus.COMPLETED},
+            {'id': 999999, 'title': 'Нет такой'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, TaskStatus.COMPLETED)
+        self.assertEqual(self.task.title, 'Тестовая задача')
+
+    def test_bulk_delete(self):
+        """Тест пакетного удаления задач"""
+        other = Task.objects.create(title='Другая задача')
+        response = self.client.delete(self.url, [self.task.pk, other.pk], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_limit(self):
+        """Тест ограничения размера пакета"""
+        with self.settings(TASKS_BULK_MAX_ITEMS=1):
+            response = self.client.post(self.url, [{'title': 'a'}, {'title': 'b'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.count(), 1)
+
+
+class TaskBulkStatusAPITest(TestCase):
+    """Тесты массовой смены статуса"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.first = Task.objects.create(title='Первая', status=TaskStatus.ACTIVE)
+        self.second = Task.objects.create(title='Вторая', status=TaskStatus.ACTIVE)
+        self.done = Task.objects.create(title='Готовая', status=TaskStatus.COMPLETED)
+
+    def test_bulk_complete_by_filter(self):
+        """Тест завершения всех активных задач по фильтру"""
+        url = reverse('task-bulk-complete')
+        response = self.client.post(f'{url}?status={TaskStatus.ACTIVE}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertFalse(Task.objects.filter(status=TaskStatus.ACTIVE).exists())
+
+    def test_bulk_activate_by_ids(self):
+        """Тест активации задач по списку id"""
+        url = reverse('task-bulk-activate')
+        before = self.done.updated_at
+        response = self.client.post(url, {'ids': [self.done.pk, self.first.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 1)
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.status, TaskStatus.ACTIVE)
+        self.assertGreater(self.done.updated_at, before)
+
+    def test_bulk_status_requires_criteria(self):
+        """Тест отказа без фильтров и списка id"""
+        response = self.client.post(reverse('task-bulk-complete'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.filter(status=TaskStatus.ACTIVE).count(), 2)
+
+    def test_complete_updates_only_status(self):
+        """Тест, что действие complete не перезаписывает название"""
+        url = reverse('task-complete', kwargs={'pk': self.first.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, TaskStatus.COMPLETED)
+
+
+@override_settings(TASKS_CACHE=CACHE_ENABLED)
+class TaskResponseCacheTest(TestCase):
+    """Тесты кэширования ответов"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.cache = get_task_cache()
+        self.cache.clear()
+        self.task = Task.objects.create(title='Тестовая задача', status=TaskStatus.ACTIVE)
+
+    def test_list_served_from_cache(self):
+        """Тест повторного запроса списка без обращения к БД"""
+        url = reverse('task-list')
+        first = self.client.get(url, {'status': TaskStatus.ACTIVE, 'page': 1})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {'page': 1, 'status': TaskStatus.ACTIVE})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_write_invalidates_cache(self):
+        """Тест сброса кэша после записи через API"""
+        list_url = reverse('task-list')
+        detail_url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        self.client.post(reverse('task-complete', kwargs={'pk': self.task.pk}))
+        response = self.client.get(detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['status'], TaskStatus.COMPLETED)
+        self.client.post(list_url, {'title': 'Новая задача'}, format='json')
+        response = self.client.get(list_url)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_bulk_status_invalidates_cache(self):
+        """Тест сброса кэша после массовой смены статуса"""
+        url = reverse('task-active')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        self.client.post(reverse('task-bulk-complete'), {'ids': [self.task.pk]}, format='json')
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+    def test_local_backend_lru_and_ttl(self):
+        """Тест вытеснения LRU и истечения TTL в локальном бэкенде"""
+        backend = LocalMemoryBackend(ttl=60, max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('a'), 1)
+        backend.ttl = -1
+        backend.set('d', 4)
+        self.assertIsNone(backend.get('d'))
+
+    def test_invalidation_after_commit(self):
+        """Версия кэша увеличивается и при записи в транзакции, и после ее фиксации"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Task.objects.create(title='В транзакции')
+                inside = self.cache.backend.get_version()
+            self.assertEqual(self.cache.backend.get_version(), inside)
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(self.cache.backend.get_version(), inside)
+
+    @override_settings(TASKS_CACHE={'ENABLED': False})
+    def test_cache_disabled(self):
+        """Тест работы без кэша"""
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Cache', response)
+
+
+class TaskConditionalRequestTest(TestCase):
+    """Тесты условных запросов (ETag / Last-Modified)"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.task = Task.objects.create(title='Тестовая задача', status=TaskStatus.ACTIVE)
+        self.detail_url = reverse('task-detail', kwargs={'pk': self.task.pk})
+
+    def test_detail_not_modified(self):
+        """Тест ответа 304 на If-None-Match для задачи"""
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(self.detail_url, {'title': 'Новое название'}, format='json')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_not_modified(self):
+        """Тест ответа 304 для списка и смены ETag после записи"""
+        url = reverse('task-list')
+        etag = self.client.get(url, {'status': TaskStatus.ACTIVE})['ETag']
+        response = self.client.get(url, {'status': TaskStatus.ACTIVE}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        other = self.client.get(url, {'status': TaskStatus.COMPLETED})
+        self.assertNotEqual(other['ETag'], etag)
+        Task.objects.create(title='Другая задача')
+        response = self.client.get(url, {'status': TaskStatus.ACTIVE}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_only(self):
+        """У списка нет Last-Modified, удаление задачи меняет ETag"""
+        url = reverse('task-active')
+        Task.objects.create(title='Вторая задача')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.task.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(TASKS_CACHE={'ENABLED': False})
+    def test_list_without_full_aggregate(self):
+        """?count=false и режим курсора не выполняют агрегат по всему списку"""
+        url = reverse('task-list')
+        for params in ({'count': 'false'}, {'pagination': 'cursor'}):
+            with CaptureQueriesContext(connection) as queries:
+                etag = self.client.get(url, params)['ETag']
+            self.assertFalse([q['sql'] for q in queries if 'MAX(' in q['sql'] or 'COUNT(' in q['sql']])
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            Task.objects.create(title='Еще одна')
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(TASKS_CACHE={'ENABLED': False})
+    def test_list_not_modified_before_page_query(self):
+        """В режиме страниц 304 отдается по агрегату, без выборки и сериализации страницы"""
+        url = reverse('task-list')
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('MAX(', queries[0]['sql'])
+
+    def test_update_if_match(self):
+        """Тест оптимистичной блокировки через If-Match"""
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.patch(
+            self.detail_url, {'title': 'Первое изменение'}, format='json', HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.put(
+            self.detail_url, {'title': 'Второе изменение'}, format='json', HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Первое изменение')
+
+
+@override_settings(TASKS_SEARCH_BACKEND='fulltext')
+class TaskFullTextSearchTest(TestCase):
+    """Тесты полнотекстового поиска (FTS5)"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        Task.objects.create(title='Важное совещание по проекту')
+        Task.objects.create(title='Купить молоко')
+        Task.objects.create(title='Проект: важное важное ревью')
+
+    def test_prefix_search(self):
+        """Тест поиска по префиксам слов без учета регистра"""
+        response = self.client.get(reverse('task-list'), {'search': 'ВАЖН проек'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_ranked_results(self):
+        """Тест сортировки по релевантности при отсутствии ordering"""
+        response = self.client.get(reverse('task-list'), {'search': 'важное'})
+        self.assertEqual(
+            [item['title'] for item in response.data['results']],
+            ['Проект: важное важное ревью', 'Важное совещание по проекту']
+        )
+
+    def test_title_filter_and_sync_on_update(self):
+        """Тест фильтра title и синхронизации индекса при изменении названия"""
+        url = reverse('task-list')
+        Task.objects.filter(title='Купить молоко').update(title='Купить хлеб')
+        self.assertEqual(self.client.get(url, {'title': 'молоко'}).data['count'], 0)
+        self.assertEqual(self.client.get(url, {'title': 'хлеб'}).data['count'], 1)
+
+    def test_rebuild_command(self):
+        """Тест команды перестроения индекса"""
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('SQLiteFTSSearchBackend', out.getvalue())
+
+
+class TaskExportAPITest(TestCase):
+    """Тесты потоковой выгрузки"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.url = reverse('task-export')
+        self.task = Task.objects.create(title='Тестовая задача', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Завершенная задача', status=TaskStatus.COMPLETED)
+
+    def test_export_ndjson_matches_serializer(self):
+        """Тест выгрузки NDJSON в формате TaskSerializer"""
+        response = self.client.get(self.url, {'ordering': '-title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), dict(TaskSerializer(self.task).data))
+
+    def test_export_csv_with_filter(self):
+        """Тест выгрузки CSV с учетом фильтров"""
+        response = self.client.get(self.url, {'format': 'csv', 'status': TaskStatus.COMPLETED})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'title', 'status'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Завершенная задача')
+
+
+class ImportTasksCommandTest(TestCase):
+    """Тесты команды потокового импорта"""
+
+    def setUp(self):
+        """Временный каталог для входных файлов"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_import_ndjson_with_invalid_rows(self):
+        """Тест импорта NDJSON с пропуском некорректных строк"""
+        path = self.write_file('tasks.ndjson', '\n'.join([
+            json.dumps({'title': ' Первая '}),
+            json.dumps({'title': '   '}),
+            '{broken',
+            json.dumps({'title': 'Вторая', 'status': 'completed'}),
+            json.dumps({'title': 'Третья', 'status': 'unknown'}),
+        ]))
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', path, '--batch-size', '1', stdout=out, stderr=err)
+        self.assertEqual(
+            list(Task.objects.order_by('id').values_list('title', 'status')),
+            [('Первая', TaskStatus.ACTIVE), ('Вторая', TaskStatus.COMPLETED)]
+        )
+        self.assertEqual(err.getvalue().count('Строка'), 3)
+        self.assertIn('записано 2', out.getvalue())
+
+    def test_import_csv_upsert(self):
+        """Тест импорта CSV с обновлением по id"""
+        task = Task.objects.create(title='Старое название')
+        path = self.write_file('tasks.csv', (
+            'id,title,status\n'
+            f'{task.pk},Новое название,completed\n'
+            ',Новая задача,\n'
+        ))
+        call_command('import_tasks', path, '--upsert', stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'Новое название')
+        self.assertEqual(task.status, TaskStatus.COMPLETED)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_duplicate_id_without_upsert(self):
+        """Тест импорта без --upsert: строки с занятым id пропускаются, остальные из пакета записываются"""
+        task = Task.objects.create(title='Существующая')
+        path = self.write_file('tasks.csv', (
+            'id,title,status\n'
+            f'{task.pk},Дубликат,\n'
+            ',Новая задача,\n'
+            f'{task.pk + 10},С явным id,\n'
+            f'{task.pk + 10},Повтор в файле,\n'
+        ))
+        checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', path, '--checkpoint', checkpoint, stdout=out, stderr=err)
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)),
+            ['Новая задача', 'С явным id', 'Существующая']
+        )
+        self.assertIn('Строка 1:', err.getvalue())
+        self.assertIn('Строка 4:', err.getvalue())
+        self.assertIn('записано 2, с ошибками 2', out.getvalue())
+        with open(checkpoint, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['position'], 4)
+
+    @override_settings(TASKS_CHANGES={**settings.TASKS_CHANGES, 'SETTLE_SECONDS': 0})
+    def test_warns_about_batch_longer_than_settle_window(self):
+        """Пакет, записанный дольше окна ленты изменений, отмечается в stderr"""
+        path = self.write_file('tasks.ndjson', json.dumps({'title': 'Задача'}))
+        err = StringIO()
+        call_command('import_tasks', path, stdout=StringIO(), stderr=err)
+        self.assertIn('TASKS_CHANGES_SETTLE_SECONDS', err.getvalue())
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_resume_from_checkpoint(self):
+        """Тест продолжения импорта с контрольной точки"""
+        path = self.write_file('tasks.ndjson', '\n'.join(
+            json.dumps({'title': f'Задача {i}'}) for i in range(5)
+        ))
+        checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        with open(checkpoint, 'w', encoding='utf-8') as f:
+            json.dump({'position': 3}, f)
+        call_command(
+            'import_tasks', path, '--checkpoint', checkpoint, '--resume', stdout=StringIO()
+        )
+        self.assertEqual(
+            list(Task.objects.order_by('id').values_list('title', flat=True)),
+            ['Задача 3', 'Задача 4']
+        )
+        with open(checkpoint, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['position'], 5)
+
+
+class TaskListFastSerializerTest(TestCase):
+    """Тесты быстрой сериализации списков"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        Task.objects.create(title='Активная "задача"', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Завершенная задача', status=TaskStatus.COMPLETED)
+
+    def test_output_identical_to_task_serializer(self):
+        """Тест побайтового совпадения с TaskSerializer"""
+        queryset = Task.objects.order_by('-created_at')
+        rows = queryset.values_list(*TaskListFastSerializer.query_fields, named=True)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(TaskListFastSerializer(rows).data),
+            renderer.render(TaskSerializer(queryset, many=True).data)
+        )
+
+    def test_list_response_identical_to_slow_path(self):
+        """Тест совпадения ответа списка с сериализацией через TaskSerializer"""
+        url = reverse('task-list')
+        fast = self.client.get(url)
+        with self.settings(TASKS_FAST_LIST_SERIALIZER=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.content, slow.content)
+
+
+class TaskFastJSONTest(TestCase):
+    """Тесты быстрого JSON рендерера и парсера"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        Task.objects.create(title='Задача \u2028 с "кавычками"', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Завершенная задача', status=TaskStatus.COMPLETED)
+        self.backends = [name for name in JSON_BACKENDS if load_json_backend(name) is not None]
+
+    def test_paginated_envelope_identical(self):
+        """Тест побайтового совпадения конверта пагинации со стандартным JSONRenderer"""
+        data = self.client.get(reverse('task-list')).data
+        task = Task.objects.first()
+        extra = {
+            'created_at': task.created_at,
+            'errors': ErrorDetail('ошибка', code='invalid'),
+        }
+        for name in self.backends:
+            with self.subTest(backend=name), self.settings(TASKS_JSON_BACKEND=name):
+                self.assertEqual(get_json_backend().name, name)
+                for payload in (data, extra):
+                    self.assertEqual(
+                        FastJSONRenderer().render(payload),
+                        JSONRenderer().render(payload)
+                    )
+
+    def test_indent_uses_stdlib(self):
+        """Тест отступов через стандартный json"""
+        data = {'title': 'Задача'}
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context={'indent': 4}),
+            JSONRenderer().render(data, renderer_context={'indent': 4})
+        )
+
+    def test_parser(self):
+        """Тест разбора тела запроса и ошибки некорректного JSON"""
+        url = reverse('task-list')
+        for name in self.backends:
+            with self.subTest(backend=name), self.settings(TASKS_JSON_BACKEND=name):
+                response = self.client.post(url, {'title': f'Задача {name}'}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(response.data['title'], f'Задача {name}')
+
+                response = self.client.post(url, '{"title": ', content_type='application/json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('JSON parse error', str(response.data['detail']))
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class TaskAsyncAPITest(TaskAPITest):
+    """Тесты API задач через асинхронные обработчики"""
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF, TASKS_CACHE=CACHE_ENABLED)
+class TaskAsyncViewsTest(TestCase):
+    """Тесты совместимости асинхронных обработчиков с TaskViewSet"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        get_task_cache().clear()
+        self.task = Task.objects.create(title='Первая задача', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Вторая задача', status=TaskStatus.COMPLETED)
+
+    def test_responses_identical_to_sync(self):
+        """Тест совпадения тел и заголовков ответов с синхронным TaskViewSet"""
+        requests = [
+            (reverse('task-list'), {'page_size': 1, 'page': 2}),
+            (reverse('task-list'), {'search': 'перв', 'ordering': 'title'}),
+            (reverse('task-completed'), {}),
+            (reverse('task-detail', kwargs={'pk': self.task.pk}), {}),
+            (reverse('task-detail', kwargs={'pk': 999}), {}),
+            (reverse('task-list'), {'page': 5}),
+        ]
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                get_task_cache().clear()
+                async_response = self.client.get(url, params)
+                get_task_cache().clear()
+                with override_settings(ROOT_URLCONF='taskapi.urls'):
+                    sync_response = self.client.get(url, params)
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(async_response.content, sync_response.content)
+                # Vary: Cookie не добавляется, асинхронный путь не обращается к сессии
+                for header in ('Content-Type', 'ETag', 'Allow', 'X-Cache'):
+                    self.assertEqual(async_response.get(header), sync_response.get(header))
+
+    def test_csrf_exempt_like_viewset(self):
+        """Запись без CSRF токена проходит, как у TaskViewSet (тестовый клиент по умолчанию не проверяет CSRF)"""
+        client = APIClient(enforce_csrf_checks=True)
+        response = client.post(reverse('task-list'), {'title': 'Без CSRF'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        response = client.patch(url, {'title': 'Обновлена'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.post(reverse('task-bulk'), [{'title': 'Пакет'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_if_match_conflict(self):
+        """Тест 412 при обновлении с устаревшим ETag"""
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {'title': 'Новое'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.patch(url, {'title': 'Снова'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Новое')
+
+    def test_update_invalidates_cache(self):
+        """Тест сброса кэша после обновления одним UPDATE"""
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        self.client.get(url)
+        self.client.patch(url, {'title': 'Новое'}, format='json')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Новое')
+
+    def test_delegates_to_sync_viewset(self):
+        """Тест передачи режима курсора и browsable API синхронному TaskViewSet"""
+        response = self.client.get(reverse('task-list'), {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', response['Content-Type'])
+
+    async def test_async_client(self):
+        """Тест обработки через AsyncClient"""
+        client = AsyncClient()
+        response = await client.post(
+            reverse('task-list'), {'title': 'Асинхронная'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task_id = response.json()['id']
+        response = await client.post(reverse('task-complete', kwargs={'pk': task_id}))
+        self.assertEqual(response.json()['status'], TaskStatus.COMPLETED)
+        response = await client.delete(reverse('task-detail', kwargs={'pk': task_id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Task.objects.filter(pk=task_id).aexists())
+
+
+class TaskCountersTest(TestCase):
+    """Тесты счетчиков задач и эндпоинта статистики"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.task = Task.objects.create(title='Первая задача', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Вторая задача', status=TaskStatus.COMPLETED)
+
+    def assertCountersExact(self):
+        status_counts = {key: count for key, count in read_status_counters().items() if count}
+        self.assertEqual(status_counts, compute_status_counts())
+        daily = {
+            (row['day'], task_status): row[task_status]
+            for row in self.client.get(reverse('task-stats'), {'by_day': 'true'}).data['by_day']
+            for task_status in TaskStatus.values
+            if row[task_status]
+        }
+        self.assertEqual(daily, {
+            (day.isoformat(), task_status): count
+            for (day, task_status), count in compute_daily_counts().items()
+        })
+
+    def test_counters_follow_writes(self):
+        """Тест обновления счетчиков при записи через API и ORM"""
+        self.client.post(reverse('task-complete', kwargs={'pk': self.task.pk}))
+        self.assertCountersExact()
+        self.client.patch(
+            reverse('task-detail', kwargs={'pk': self.task.pk}),
+            {'status': TaskStatus.ACTIVE}, format='json'
+        )
+        self.assertCountersExact()
+        self.client.post(reverse('task-bulk'), [{'title': 'A'}, {'title': 'B', 'status': 'completed'}], format='json')
+        self.assertCountersExact()
+        self.client.post(reverse('task-bulk-complete') + '?status=active')
+        self.assertCountersExact()
+        self.client.delete(reverse('task-detail', kwargs={'pk': self.task.pk}))
+        self.assertCountersExact()
+        Task.objects.all().delete()
+        self.assertCountersExact()
+
+    def test_stats_endpoint(self):
+        """Тест ответа /api/tasks/stats/ без запросов к таблице задач"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'total': 2, 'by_status': {'active': 1, 'completed': 1}})
+        self.assertFalse(any('"tasks_task"' in query['sql'] for query in queries.captured_queries))
+
+        response = self.client.get(reverse('task-stats'), {'by_day': 'true'})
+        today = self.task.created_at.date().isoformat()
+        self.assertEqual(response.data['by_day'], [{'day': today, 'total': 2, 'active': 1, 'completed': 1}])
+        response = self.client.get(reverse('task-stats'), {'by_day': 'true', 'date_to': '2000-01-01'})
+        self.assertEqual(response.data['by_day'], [])
+        response = self.client.get(reverse('task-stats'), {'by_day': 'true', 'date_from': 'вчера'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_command(self):
+        """Тест пересчета счетчиков командой reconcile_task_counters"""
+        TaskStatusCounter.objects.filter(status=TaskStatus.ACTIVE).update(count=100)
+        out = StringIO()
+        call_command('reconcile_task_counters', '--dry-run', stdout=out)
+        self.assertIn('Расхождений: 1', out.getvalue())
+        self.assertEqual(TaskStatusCounter.objects.get(status=TaskStatus.ACTIVE).count, 100)
+
+        call_command('reconcile_task_counters', stdout=StringIO())
+        self.assertCountersExact()
+
+    def test_counters_summed_across_shards(self):
+        """Тест чтения счетчиков как суммы шардов и их сворачивания при пересчете"""
+        day = self.task.created_at.date()
+        TaskStatusCounter.objects.create(status=TaskStatus.ACTIVE, shard=3, count=2)
+        TaskStatusCounter.objects.create(status=TaskStatus.ACTIVE, shard=5, count=-2)
+        TaskStatusCounter.objects.create(status=TaskStatus.COMPLETED, shard=7, count=4)
+        TaskDailyCounter.objects.create(day=day, status=TaskStatus.COMPLETED, shard=7, count=4)
+        TaskDailyCounter.objects.create(day=day, status=TaskStatus.ACTIVE, shard=2, count=-1)
+
+        self.assertEqual(get_status_counts(), {'active': 1, 'completed': 5})
+        self.assertEqual(get_daily_counts(), [{'day': day.isoformat(), 'total': 5, 'active': 0, 'completed': 5}])
+
+        out = StringIO()
+        call_command('reconcile_task_counters', stdout=out)
+        self.assertIn('исправлено расхождений: 3', out.getvalue())
+        self.assertCountersExact()
+        self.assertEqual(set(TaskStatusCounter.objects.values_list('shard', flat=True)), {0})
+
+
+class TaskOptionalCountTest(TestCase):
+    """Тесты режимов ?count=false и ?count=estimate"""
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = APIClient()
+        self.url = reverse('task-list')
+        get_count_cache().clear()
+        for i in range(3):
+            Task.objects.create(title=f'Отчет {i}', status=TaskStatus.ACTIVE)
+        Task.objects.create(title='Другая задача', status=TaskStatus.COMPLETED)
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counted = any('__count' in query['sql'] for query in queries.captured_queries)
+        return response.data, counted
+
+    def test_count_false(self):
+        """Тест страницы без COUNT(*) с определением следующей страницы по лишней строке"""
+        data, counted = self.get({'count': 'false', 'page_size': 3})
+        self.assertFalse(counted)
+        self.assertEqual(list(data), ['next', 'previous', 'page_size', 'current_page', 'results'])
+        self.assertEqual(len(data['results']), 3)
+        self.assertIn('page=2', data['next'])
+        self.assertIsNone(data['previous'])
+
+        data, _ = self.get({'count': 'false', 'page_size': 3, 'page': 2})
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+        self.assertNotIn('page=', data['previous'])
+
+        response = self.client.get(self.url, {'count': 'false', 'page': 3, 'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.url, {'count': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_count_estimate_from_counters(self):
+        """Тест точного количества из счетчиков для списка без фильтров и с фильтром статуса"""
+        data, counted = self.get({'count': 'estimate', 'page_size': 1})
+        self.assertFalse(counted)
+        self.assertEqual((data['count'], data['count_estimated'], data['total_pages']), (4, False, 4))
+
+        data, counted = self.get({'count': 'estimate', 'page_size': 1, 'status': TaskStatus.ACTIVE})
+        self.assertFalse(counted)
+        self.assertEqual((data['count'], data['count_estimated']), (3, False))
+
+    def test_count_estimate_from_cache(self):
+        """Тест кэша COUNT(*) для фильтров: после записи значение помечается как оценка"""
+        params = {'count': 'estimate', 'page_size': 1, 'search': 'Отчет'}
+        data, counted = self.get(params)
+        self.assertTrue(counted)
+        self.assertEqual((data['count'], data['count_estimated']), (3, False))
+
+        Task.objects.create(title='Отчет 3', status=TaskStatus.ACTIVE)
+        data, counted = self.get(params)
+        self.assertFalse(counted)
+        self.assertEqual((data['count'], data['count_estimated']), (3, True))
+
+        # На последней странице количество известно точно
+        data, counted = self.get({**params, 'page': 4})
+        self.assertEqual((data['count'], data['count_estimated']), (4, False))
+        self.assertIsNone(data['next'])
+
+
+class BenchHelpersTest(TestCase):
+    """Тесты вспомогательных функций manage.py bench"""
+
+    def test_seed_tasks_keeps_counters(self):
+        """Наполнение через INSERT учитывается триггерами счетчиков"""
+        self.assertEqual(seed_tasks(30, batch_size=7), 30)
+        self.assertEqual(seed_tasks(10), 30)
+        self.assertEqual(Task.objects.filter(status=TaskStatus.COMPLETED).count(), 10)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            counters = read_status_counters()
+            self.assertEqual(counters, compute_status_counts())
+
+    @override_settings(ALLOWED_HOSTS=['testserver'], TASKS_CACHE={'ENABLED': False})
+    def test_measure_request(self):
+        """Замер запроса содержит количество SQL-запросов и код ответа"""
+        result = measure_request(APIClient(), 'get', '/api/tasks/', repeat=2)
+        self.assertEqual(result['runs'], 2)
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['queries'], 0)
+
+    def test_compare_reports(self):
+        """Регрессия - рост p50 выше порога или рост числа SQL-запросов"""
+        baseline = {'scenarios': {'list': {
+            'page_1': {'p50_ms': 10.0, 'queries': 2},
+            'page_10': {'p50_ms': 10.0, 'queries': 2},
+            'page_100': {'p50_ms': 10.0, 'queries': 2},
+        }}}
+        current = {'scenarios': {'list': {
+            'page_1': {'p50_ms': 11.0, 'queries': 2},
+            'page_10': {'p50_ms': 13.0, 'queries': 2},
+            'page_100': {'p50_ms': 9.0, 'queries': 3},
+            'page_1000': {'p50_ms': 50.0, 'queries': 2},
+        }}}
+        comparison = compare_reports(baseline, current, max_regression=0.2)
+        self.assertEqual(comparison['compared'], 3)
+        self.assertEqual(
+            [item['path'] for item in comparison['regressions']],
+            ['list.page_10', 'list.page_100']
+        )
+
+    def test_short_load_has_reads_and_writes(self):
+        """Записи распределены по короткому запуску, пустая сводка не падает"""
+        writes = [number for number in range(12) if is_write_operation(number, 0.2)]
+        self.assertEqual(writes, [4, 9])
+        self.assertEqual(summarize([])['runs'], 0)
+        self.assertIsNone(summarize([])['p50_ms'])
+
+
+@override_settings(
+    TASKS_CACHE={'ENABLED': False},
+    TASKS_PERF={**settings.TASKS_PERF, 'SERVER_TIMING': True, 'METRICS_ENABLED': True},
+)
+class PerformanceMiddlewareTest(TestCase):
+    """Тесты метрик запросов PerformanceMiddleware"""
+
+    def setUp(self):
+        self.client = APIClient()
+        REGISTRY.clear()
+        Task.objects.create(title='Задача')
+
+    def server_timing(self, response):
+        return dict(
+            (item.split(';')[0], item.split(';', 1)[1])
+            for item in response['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing_header(self):
+        """Заголовок Server-Timing с фазами запроса и количеством запросов к БД"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/')
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'total', 'db', 'serialize', 'render'})
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', timing['db'])
+
+    def test_request_log_line(self):
+        """Строка JSON с метриками запроса в логгере tasks.perf на уровне DEBUG"""
+        with self.assertNoLogs('tasks.perf', level='INFO'):
+            self.client.get('/api/tasks/')
+        with self.assertLogs('tasks.perf', level='DEBUG') as logs:
+            self.client.get('/api/tasks/')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'task-list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+
+    @override_settings(TASKS_PERF={**settings.TASKS_PERF, 'SERVER_TIMING': True, 'SLOW_QUERY_MS': 0})
+    def test_slow_query_log(self):
+        """Запросы дольше SLOW_QUERY_MS попадают в журнал"""
+        with self.assertLogs('tasks.perf', level='WARNING') as logs:
+            APIClient().get('/api/tasks/')
+        self.assertIn('tasks_task', logs.records[0].getMessage())
+
+    def test_prometheus_metrics(self):
+        """Гистограммы доступны на /metrics в формате Prometheus"""
+        self.client.get('/api/tasks/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = response.content.decode()
+        self.assertIn('# TYPE tasks_http_request_duration_seconds histogram', content)
+        self.assertIn(
+            'tasks_http_request_duration_seconds_count{method="GET",status="200",view="task-list"} 1',
+            content
+        )
+        self.assertIn('tasks_http_request_db_queries_bucket{method="GET",status="200",view="task-list",le="+Inf"} 1', content)
+
+    def test_prometheus_metrics_local_only(self):
+        """С других адресов /metrics недоступен"""
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_metrics_and_server_timing_off(self):
+        """Без METRICS_ENABLED /metrics недоступен, без SERVER_TIMING заголовка нет"""
+        with self.settings(TASKS_PERF={**settings.TASKS_PERF, 'SERVER_TIMING': False, 'METRICS_ENABLED': False}):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+            self.assertNotIn('Server-Timing', self.client.get('/api/tasks/'))
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_async_view_metrics(self):
+        """Запросы к БД асинхронных обработчиков учитываются в метриках"""
+        response = await AsyncClient().get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+
+class QueryBudgetTest(TestCase):
+    """Тесты бюджета запросов к БД"""
+
+    def setUp(self):
+        Task.objects.create(title='Задача')
+
+    def test_sql_shape(self):
+        """Форма SQL не зависит от значений параметров и длины списков IN"""
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (1, 2, 3) AND title = \'a\'\'b\''),
+            sql_shape('SELECT * FROM t WHERE id IN (%s)  AND title = %s'),
+        )
+
+    def test_repeated_queries(self):
+        """Повтор запроса одной формы больше max_repeats - признак N+1"""
+        statements = [f'SELECT * FROM tasks_task WHERE id = {task_id}' for task_id in range(4)]
+        self.assertEqual(QueryBudget(max_repeats=4).check(statements), [])
+        self.assertEqual(len(QueryBudget(max_repeats=3).check(statements)), 1)
+        self.assertEqual(len(QueryBudget(max_queries=3, max_repeats=3).check(statements)), 2)
+
+    def test_view_budget(self):
+        """Бюджет берется из @query_budget действия, в том числе для асинхронных обработчиков"""
+        self.assertEqual(get_view_budget(resolve('/api/tasks/').func, 'GET').max_queries, 4)
+        self.assertEqual(get_view_budget(resolve('/api/tasks/1/').func, 'PATCH').max_queries, 4)
+        self.assertIsNone(get_view_budget(resolve('/api/tasks/1/').func, 'OPTIONS').max_queries)
+        with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+            self.assertEqual(get_view_budget(resolve('/api/tasks/1/').func, 'GET').max_queries, 2)
+
+    @override_settings(
+        TASKS_CACHE={'ENABLED': False},
+        TASKS_QUERY_BUDGET={'ENABLED': True, 'MODE': 'warn', 'MAX_REPEATS': 0},
+    )
+    def test_middleware_warns(self):
+        """В режиме warn нарушение бюджета пишется в журнал, ответ не меняется"""
+        with self.assertLogs('tasks.perf', level='WARNING') as logs:
+            response = APIClient().get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('возможен N+1', logs.records[0].getMessage())
+
+    @override_settings(
+        TASKS_CACHE={'ENABLED': False},
+        TASKS_QUERY_BUDGET={'ENABLED': True, 'MODE': 'raise', 'MAX_REPEATS': 0},
+    )
+    def test_middleware_raises(self):
+        """В режиме raise нарушение бюджета завершает запрос исключением"""
+        with self.assertRaises(QueryBudgetExceeded):
+            APIClient().get('/api/tasks/')
+
+
+class SQLiteTuningTest(TransactionTestCase):
+    """Тесты профиля SQLite и очереди единственного писателя"""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Только для SQLite')
+
+    def test_pragmas_applied_on_connect(self):
+        """Прагмы SQLITE_PRAGMAS выполняются при подключении"""
+        if not settings.SQLITE_TUNED:
+            self.skipTest('SQLITE_TUNED выключен')
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    @override_settings(TASKS_SQLITE_WRITE_QUEUE=True, TASKS_CACHE={'ENABLED': False})
+    def test_writes_through_queue(self):
+        """Записи API выполняются в потоке писателя"""
+        self.assertEqual(run_write(lambda: threading.current_thread().name), 'tasks-sqlite-writer')
+
+        client = APIClient()
+        response = client.post('/api/tasks/', {'title': 'Через очередь'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task_id = response.data['id']
+        response = client.post(f'/api/tasks/{task_id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.patch(f'/api/tasks/{task_id}/', {'title': 'Обновлена'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task = Task.objects.get(pk=task_id)
+        self.assertEqual((task.title, task.status), ('Обновлена', TaskStatus.COMPLETED))
+
+
+class RecordingReplicaRouter(ReplicaRouter):
+    """ReplicaRouter для тестов: запоминает выбранную для чтения БД, запросы выполняются в default"""
+
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append(super().db_for_read(model, **hints))
+        return self.primary
+
+
+@override_settings(
+    DATABASE_ROUTERS=['tasks.tests.RecordingReplicaRouter'],
+    TASKS_REPLICA_DATABASES=['replica'],
+    TASKS_CACHE={'ENABLED': False},
+)
+class TaskReplicaRoutingTest(TestCase):
+    """Тесты чтения с реплик и read-your-writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.task = Task.objects.create(title='Задача')
+        RecordingReplicaRouter.reads.clear()
+
+    def test_safe_reads_use_replica(self):
+        """list, retrieve, active и completed читают с реплики"""
+        for url in ('/api/tasks/', f'/api/tasks/{self.task.pk}/', '/api/tasks/active/', '/api/tasks/completed/'):
+            RecordingReplicaRouter.reads.clear()
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(set(RecordingReplicaRouter.reads), {'replica'}, url)
+
+    def test_other_actions_use_primary(self):
+        """Записи и остальные действия читают из основной БД"""
+        self.client.get('/api/tasks/stats/')
+        self.client.post(f'/api/tasks/{self.task.pk}/complete/')
+        self.assertEqual(set(RecordingReplicaRouter.reads), {'default'})
+
+    def test_read_your_writes(self):
+        """После записи клиент читает из основной БД до истечения cookie"""
+        response = self.client.post('/api/tasks/', {'title': 'Новая'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies['tasks_pin_primary']['max-age'], settings.TASKS_REPLICA_PIN_SECONDS)
+
+        RecordingReplicaRouter.reads.clear()
+        self.client.get('/api/tasks/')
+        self.assertEqual(set(RecordingReplicaRouter.reads), {'default'})
+
+        RecordingReplicaRouter.reads.clear()
+        APIClient().get('/api/tasks/')
+        self.assertEqual(set(RecordingReplicaRouter.reads), {'replica'})
+
+    def test_write_pins_context(self):
+        """Запись внутри контекста переводит следующие чтения на основную БД"""
+        router = ReplicaRouter()
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertEqual(router.db_for_write(Task), 'default')
+            self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertEqual(router.db_for_read(Task), 'default')
+
+    @override_settings(TASKS_REPLICA_DATABASES=['replica', 'replica2'])
+    def test_one_replica_per_request(self):
+        """Все чтения одного ответа идут в одну реплику"""
+        router = ReplicaRouter()
+        for _ in range(20):
+            with replica_reads():
+                self.assertEqual(len({router.db_for_read(Task) for _ in range(10)}), 1)
+
+    @override_settings(TASKS_CACHE=CACHE_ENABLED)
+    def test_replica_reads_not_cached(self):
+        """Ответ, прочитанный с реплики, не попадает в кэш; прочитанный из default - попадает"""
+        get_task_cache().clear()
+        self.assertNotIn('X-Cache', self.client.get('/api/tasks/'))
+        self.assertNotIn('X-Cache', self.client.get('/api/tasks/'))
+
+        pinned = APIClient()
+        pinned.cookies['tasks_pin_primary'] = '1'
+        self.assertEqual(pinned.get('/api/tasks/')['X-Cache'], 'MISS')
+        self.assertEqual(pinned.get('/api/tasks/')['X-Cache'], 'HIT')
+        # Закешированный ответ из default отдается и при чтении с реплики
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'HIT')
+
+
+class ExplainTaskQueriesCommandTest(TestCase):
+    """Тесты команды explain_task_queries"""
+
+    def explain(self, *args):
+        out = StringIO()
+        call_command('explain_task_queries', '--format', 'json', *args, stdout=out)
+        return {result['case']: result for result in json.loads(out.getvalue())}
+
+    def test_status_filter_uses_composite_index(self):
+        """Фильтр по статусу с сортировкой по дате идет по составному индексу без сортировки"""
+        results = self.explain()
+        for case in ('list status -created_at', 'list status_created_after -created_at', 'active', 'completed'):
+            self.assertIn('tasks_task_status_created_idx', results[case]['indexes'], case)
+            self.assertFalse(results[case]['sort'], case)
+        self.assertIn('tasks_task_status_updated_idx', results['list status -updated_at']['indexes'])
+
+    def test_strict_passes_without_full_scans(self):
+        """Ни один запрос без поиска не просматривает всю таблицу"""
+        results = self.explain('--strict')
+        self.assertFalse([case for case, result in results.items() if result['full_scan'] and not result['search']])
+
+
+@override_settings(TASKS_CHANGES=dict(settings.TASKS_CHANGES, SETTLE_SECONDS=0, BATCH_SIZE=2))
+class TaskChangesAPITest(TestCase):
+    """Тесты ленты изменений /api/tasks/changes/"""
+
+    def setUp(self):
+        self.client = QueryBudgetClient()
+        self.tasks = [Task.objects.create(title=f'Задача {i}') for i in range(3)]
+
+    def sync(self, token=None, **params):
+        """Все порции ленты после token: (id измененных, id удаленных, новый токен)"""
+        # Изменения текущей миллисекунды попадают только в следующую порцию
+        time.sleep(0.002)
+        updated, deleted = [], []
+        while True:
+            if token is not None:
+                params['since'] = token
+            response = self.client.get(reverse('task-changes'), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['updated']) + len(response.data['deleted']), 2)
+            updated += [task['id'] for task in response.data['updated']]
+            deleted += response.data['deleted']
+            token = response.data['token']
+            if not response.data['has_more']:
+                return updated, deleted, token
+
+    def test_full_then_incremental_sync(self):
+        """Первая синхронизация отдает все задачи порциями, следующая - только изменения"""
+        updated, deleted, token = self.sync()
+        self.assertEqual(updated, [task.pk for task in self.tasks])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync(token)[:2], ([], []))
+
+        self.client.post(reverse('task-complete', kwargs={'pk': self.tasks[1].pk}))
+        created = Task.objects.create(title='Новая')
+        self.client.delete(reverse('task-detail', kwargs={'pk': self.tasks[0].pk}))
+        updated, deleted, token = self.sync(token)
+        self.assertEqual(updated, [self.tasks[1].pk, created.pk])
+        self.assertEqual(deleted, [self.tasks[0].pk])
+        self.assertEqual(self.sync(token)[:2], ([], []))
+
+    def test_bulk_delete_writes_tombstones(self):
+        """Пакетное удаление оставляет записи об удалении"""
+        token = self.sync()[2]
+        ids = [task.pk for task in self.tasks[:2]]
+        self.client.delete(reverse('task-bulk'), ids, format='json')
+        self.assertEqual(sorted(TaskTombstone.objects.values_list('task_id', flat=True)), ids)
+        self.assertEqual(self.sync(token)[1], ids)
+
+    def test_bulk_delete_paged_past_limit(self):
+        """Записи об удалении с одним временем удаления отдаются порциями без потерь"""
+        self.tasks += [Task.objects.create(title=f'Задача {i}') for i in range(3, 7)]
+        token = self.sync()[2]
+        ids = [task.pk for task in self.tasks]
+        self.client.delete(reverse('task-bulk'), ids, format='json')
+        self.assertEqual(TaskTombstone.objects.values('deleted_at').distinct().count(), 1)
+        self.assertEqual(self.sync(token)[1], ids)
+
+    def test_invalid_and_expired_token(self):
+        """Некорректный токен - 400, токен старше срока хранения удалений - 410"""
+        response = self.client.get(reverse('task-changes'), {'since': 'мусор'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        token = self.sync()[2]
+        with override_settings(TASKS_CHANGES=dict(settings.TASKS_CHANGES, TOMBSTONE_RETENTION_DAYS=0)):
+            response = self.client.get(reverse('task-changes'), {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_purge_tombstones(self):
+        """purge_task_tombstones удаляет записи старше срока хранения"""
+        self.tasks[0].delete()
+        TaskTombstone.objects.update(deleted_at=timezone.now() - datetime.timedelta(days=31))
+        task_id = self.tasks[1].pk
+        self.tasks[1].delete()
+        call_command('purge_task_tombstones', stdout=StringIO())
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat=True)), [task_id])
+
+
+class LogPipelineTest(TestCase):
+    """Тесты асинхронного журнала tasks.log"""
+
+    def setUp(self):
+        self.stream = StringIO()
+        self.target = BatchStreamHandler(self.stream)
+        self.target.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.logger = logging.getLogger('tasks.tests.log')
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+
+    def attach(self, handler):
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_records_written_by_background_thread(self):
+        """Сообщение форматируется и пишется в фоновом потоке"""
+        class ThreadName:
+            def __str__(self):
+                return threading.current_thread().name
+
+        handler = self.attach(QueueLogHandler([self.target]))
+        self.logger.info('Задача %s, поток %s', 1, ThreadName())
+        self.logger.warning('Задача %s', 2)
+        handler.stop()
+        self.assertEqual(self.stream.getvalue().splitlines(), [
+            'INFO Задача 1, поток tasks-log-writer',
+            'WARNING Задача 2',
+        ])
+
+    def test_sheds_low_levels_under_load(self):
+        """При заполненной очереди записи ниже WARNING отбрасываются, отброшенные считаются"""
+        handler = self.attach(QueueLogHandler([self.target], queue_size=4, shed_at=0.5, sample_rate=0))
+        handler.start = lambda: None
+        for number in range(3):
+            self.logger.info('info %s', number)
+        for number in range(3):
+            self.logger.warning('warning %s', number)
+        self.assertEqual(handler.queue.qsize(), 4)
+        self.assertEqual(handler.dropped, 2)
+
+        del handler.start
+        handler.start()
+        handler.stop()
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual([line.split()[-1] for line in lines[:4]], ['0', '1', '0', '1'])
+        self.assertIn('Пропущено записей журнала под нагрузкой: 2', lines[-1])
+
+    def test_logging_settings_configure(self):
+        """LOGGING из settings применяется dictConfig (на Python 3.12+ - без особой обработки QueueHandler)"""
+        self.addCleanup(logging.config.dictConfig, settings.LOGGING)
+        logging.config.dictConfig(settings.LOGGING)
+        handler = get_handler('queue')
+        self.assertIsInstance(handler, QueueLogHandler)
+        self.assertEqual(handler.targets, [get_handler('console'), get_handler('file')])
+
+    def test_json_formatter(self):
+        """JSONFormatter выводит поля extra и словарь JSONMessage"""
+        self.target.setFormatter(JSONFormatter())
+        self.attach(self.target)
+        self.logger.info('Задача %s', 1, extra={'task_id': 1})
+        self.logger.info(JSONMessage({'status': 200, 'path': '/api/tasks/'}))
+        first, second = map(json.loads, self.stream.getvalue().splitlines())
+        self.assertEqual(first['message'], 'Задача 1')
+        self.assertEqual(first['task_id'], 1)
+        self.assertEqual(first['logger'], 'tasks.tests.log')
+        self.assertEqual(second['status'], 200)
+        self.assertNotIn('message', second)
+
+
+class TaskapiProfileTest(TestCase):
+    """Тесты профилей TASKAPI_PROFILE и ленивой схемы OpenAPI"""
+
+    PROFILE_SCRIPT = '''
+import json, sys
+import django
+django.setup()
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+def routed(url):
+    try:
+        resolve(url)
+    except Resolver404:
+        return False
+    return True
+
+print(json.dumps({
+    "apps": settings.INSTALLED_APPS,
+    "renderers": settings.REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"],
+    "routes": {url: routed(url) for url in ("/api/tasks/", "/admin/", "/swagger/", "/swagger.json")},
+    "schema_loaded": "drf_yasg.views" in sys.modules,
+}))
+'''
+
+    def load_profile(self, profile):
+        env = dict(os.environ, TASKAPI_PROFILE=profile, DJANGO_SETTINGS_MODULE='taskapi.settings')
+        output = subprocess.run(
+            [sys.executable, '-c', self.PROFILE_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_api_profile(self):
+        """Профиль api: без админки, документации и browsable API"""
+        result = self.load_profile('api')
+        for app in ('django.contrib.admin', 'django.contrib.sessions', 'drf_yasg'):
+            self.assertNotIn(app, result['apps'])
+        self.assertEqual(result['renderers'], ['tasks.renderers.FastJSONRenderer'])
+        self.assertEqual(result['routes'], {
+            '/api/tasks/': True, '/admin/': False, '/swagger/': False, '/swagger.json': False,
+        })
+        self.assertFalse(result['schema_loaded'])
+
+    def test_full_profile_loads_docs_lazily(self):
+        """Профиль full: маршруты документации есть, генератор схемы drf_yasg загружается при первом запросе"""
+        result = self.load_profile('full')
+        self.assertTrue(all(result['routes'].values()))
+        self.assertFalse(result['schema_loaded'])
+
+    def test_schema_json(self):
+        """Схема OpenAPI строится при обращении к /swagger.json"""
+        response = APIClient().get('/swagger.json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('/tasks/', json.loads(response.content)['paths'])
+
+
+class OpenAPISchemaArtifactTest(TestCase):
+    """Готовые файлы схемы OpenAPI: сборка командой и отдача с ETag"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_build_command_writes_files(self):
+        """build_openapi_schema записывает openapi.json и openapi.yaml"""
+        call_command('build_openapi_schema', output_dir=self.directory.name, stdout=StringIO())
+        with open(os.path.join(self.directory.name, 'openapi.json'), encoding='utf-8') as file:
+            self.assertIn('/tasks/', json.load(file)['paths'])
+        with open(os.path.join(self.directory.name, 'openapi.yaml'), encoding='utf-8') as file:
+            self.assertIn('/tasks/', file.read())
+
+    def test_serves_prebuilt_file_with_etag(self):
+        """/swagger.json отдает собранный файл с ETag, If-None-Match дает 304"""
+        path = os.path.join(self.directory.name, 'openapi.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"paths": {"/prebuilt/": {}}}')
+        client = APIClient()
+        with override_settings(TASKS_SCHEMA={'DIR': self.directory.name, 'LIVE': False}):
+            response = client.get('/swagger.json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), {'paths': {'/prebuilt/': {}}})
+            self.assertIn('ETag', response)
+
+            response = client.get('/swagger.json', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_generates_once_without_files(self):
+        """Без файлов схема строится при первом запросе и дальше отдается из памяти"""
+        client = APIClient()
+        with override_settings(TASKS_SCHEMA={'DIR': self.directory.name, 'LIVE': False}):
+            first = client.get('/swagger.yaml')
+            second = client.get('/swagger.yaml')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn(b'/tasks/', first.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+
+class IdempotencyKeyTest(TestCase):
+    """Тесты заголовка Idempotency-Key у создания и смены статуса задачи"""
+
+    def setUp(self):
+        self.client = QueryBudgetClient()
+
+    def post(self, url, data=None, key='key-1'):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_create_replay(self):
+        """Повтор создания с тем же ключом отдает сохраненный ответ без обращения к задачам"""
+        first = self.post('/api/tasks/', {'title': 'Один раз'})
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(REPLAYED_HEADER, first)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.post('/api/tasks/', {'title': 'Один раз'})
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second[REPLAYED_HEADER], 'true')
+        self.assertEqual(json.loads(second.content), json.loads(first.content))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('tasks_task', queries[0]['sql'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_without_key(self):
+        """Без заголовка каждый запрос создает задачу"""
+        for _ in range(2):
+            self.client.post('/api/tasks/', {'title': 'Без ключа'}, format='json')
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_other_request(self):
+        """Ключ от другого тела или другого действия - 422"""
+        self.post('/api/tasks/', {'title': 'Первая'})
+        response = self.post('/api/tasks/', {'title': 'Вторая'})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        task = Task.objects.get()
+        response = self.post(f'/api/tasks/{task.id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Task.objects.get().status, TaskStatus.ACTIVE)
+
+    def test_complete_replay(self):
+        """Повтор complete не меняет задачу, даже если ее успели активировать"""
+        task = Task.objects.create(title='Задача')
+        first = self.post(f'/api/tasks/{task.id}/complete/', key='complete-1')
+        self.assertEqual(first.data['status'], TaskStatus.COMPLETED)
+        self.post(f'/api/tasks/{task.id}/activate/', key='activate-1')
+
+        second = self.post(f'/api/tasks/{task.id}/complete/', key='complete-1')
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        task.refresh_from_db()
+        self.assertEqual(task.status, TaskStatus.ACTIVE)
+
+    def test_errors_not_stored(self):
+        """Ответ с ошибкой не сохраняется, запрос с тем же ключом можно повторить"""
+        response = self.post('/api/tasks/', {'title': ''}, key='retry')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.post('/api/tasks/', {'title': 'Исправлено'}, key='retry')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_invalid_key(self):
+        """Ключ длиннее 255 символов - 400"""
+        response = self.post('/api/tasks/', {'title': 'Задача'}, key='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+    def test_concurrent_request_rolled_back(self):
+        """
+        Запрос, не увидевший ключ при проверке, получает ошибку уникальности при
+        сохранении ответа: его задача откатывается, отдается ответ первого запроса
+        """
+        first = self.post('/api/tasks/', {'title': 'Гонка'})
+        with mock.patch('tasks.idempotency.find_record', side_effect=[None, find_record('key-1')]):
+            second = self.post('/api/tasks/', {'title': 'Гонка'})
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second[REPLAYED_HEADER], 'true')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_expired_key(self):
+        """Ключ старше TTL_HOURS не мешает новому запросу, purge_idempotency_keys удаляет старые ключи"""
+        self.post('/api/tasks/', {'title': 'Старая'})
+        IdempotencyKey.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        response = self.post('/api/tasks/', {'title': 'Новая'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.count(), 2)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+WRITE_BEHIND_SETTINGS = {'ENABLED': True, 'FLUSH_MS': 10, 'BATCH_SIZE': 100, 'MAX_PENDING': 100}
+
+
+@override_settings(TASKS_WRITE_BEHIND=WRITE_BEHIND_SETTINGS)
+class WriteBehindTest(TransactionTestCase):
+    """Тесты отложенного создания задач (Prefer: respond-async)"""
+
+    def setUp(self):
+        self.client = QueryBudgetClient()
+
+    def post(self, title, **headers):
+        return self.client.post(
+            '/api/tasks/', {'title': title}, format='json', HTTP_PREFER='respond-async', **headers
+        )
+
+    def test_accepted_then_created(self):
+        """Ответ 202 с ключом, после записи пачки ключ разрешается в id задачи"""
+        responses = [self.post(f'Отложенная {i}') for i in range(5)]
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response['Preference-Applied'], 'respond-async')
+            self.assertEqual(response.data['status'], 'pending')
+        get_write_behind_queue().join()
+
+        self.assertEqual(Task.objects.count(), 5)
+        for i, response in enumerate(responses):
+            resolved = self.client.get(response['Location'])
+            self.assertEqual(resolved.status_code, status.HTTP_200_OK)
+            self.assertEqual(resolved.data['status'], 'created')
+            self.assertEqual(Task.objects.get(pk=resolved.data['id']).title, f'Отложенная {i}')
+
+    def test_sync_create_without_preference(self):
+        """Без Prefer: respond-async или с выключенной настройкой задача создается сразу"""
+        response = self.client.post('/api/tasks/', {'title': 'Сразу'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with override_settings(TASKS_WRITE_BEHIND=dict(WRITE_BEHIND_SETTINGS, ENABLED=False)):
+            response = self.post('Тоже сразу')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_validation_before_queue(self):
+        """Данные проверяются до постановки в очередь"""
+        response = self.post('')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TASKS_WRITE_BEHIND=dict(WRITE_BEHIND_SETTINGS, MAX_PENDING=1))
+    def test_backpressure_and_drain(self):
+        """Полная очередь - 503 с Retry-After, stop() дописывает оставшиеся задачи"""
+        with mock.patch.object(WriteBehindQueue, 'start'):
+            accepted = self.post('В очереди')
+            rejected = self.post('Лишняя')
+            self.assertEqual(rejected.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(rejected['Retry-After'], '1')
+
+            pending = self.client.get(accepted['Location'])
+            self.assertEqual(pending.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(pending.data['status'], 'pending')
+
+            write_queue = get_write_behind_queue()
+            write_queue.stop()
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['В очереди'])
+        self.assertEqual(self.client.get(accepted['Location']).data['status'], 'created')
+
+    def test_failed_item_isolated(self):
+        """Ошибка записи одной задачи не мешает остальным задачам пачки"""
+        write_queue = WriteBehindQueue()
+        with mock.patch.object(WriteBehindQueue, 'start'):
+            good = write_queue.submit({'title': 'Хорошая'})
+            bad = write_queue.submit({'title': 'Плохая', 'status': None})
+            write_queue.stop()
+        self.assertTrue(Task.objects.filter(handle=good).exists())
+        self.assertIsNotNone(write_queue.get_error(bad))
+        self.assertIsNone(write_queue.get_error(good))
+
+    def test_rolled_back_submit_not_written(self):
+        """Задача из откаченной транзакции (проигравший запрос с тем же Idempotency-Key) не пишется"""
+        write_queue = WriteBehindQueue()
+        with mock.patch.object(WriteBehindQueue, 'start'):
+            try:
+                with transaction.atomic():
+                    lost = write_queue.submit({'title': 'Откаченная'})
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            with transaction.atomic():
+                kept = write_queue.submit({'title': 'Зафиксированная'})
+                self.assertEqual(write_queue.items.qsize(), 0)
+            write_queue.stop()
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Зафиксированная'])
+        self.assertIsNone(resolve_handle(lost))
+        self.assertEqual(resolve_handle(kept)[0], 'created')
+
+    def test_state_shared_between_workers(self):
+        """pending и failed видны процессу, не принимавшему задачу (общий кэш состояний)"""
+        other_worker = WriteBehindQueue()
+        with mock.patch.object(WriteBehindQueue, 'start'):
+            pending = other_worker.submit({'title': 'Чужая'})
+            bad = other_worker.submit({'title': 'Плохая', 'status': None})
+            response = self.client.get(reverse('task-accepted', kwargs={'handle': pending}))
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            other_worker.stop()
+        self.assertEqual(resolve_handle(pending)[0], 'created')
+        response = self.client.get(reverse('task-accepted', kwargs={'handle': bad}))
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertTrue(response.data['error'])
+
+    def test_unknown_handle(self):
+        """Неизвестный ключ - 404"""
+        response = self.client.get(reverse('task-accepted', kwargs={'handle': uuid.uuid4()}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,12 +1,33 @@
-
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncTaskView
 from .views import TaskViewSet
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
 
-urlpatterns = [
+sync_urlpatterns = [
     path('', include(router.urls)),
 ]
 
+# Асинхронные обработчики тех же URL (для запуска под ASGI), остальные
+# эндпоинты (bulk, export и т.д.) обслуживает роутер TaskViewSet
+async_urlpatterns = [
+    path('tasks/', AsyncTaskView.as_view({'get': 'list', 'post': 'create'})),
+    path('tasks/active/', AsyncTaskView.as_view({'get': 'active'})),
+    path('tasks/completed/', AsyncTaskView.as_view({'get': 'completed'})),
+    path('tasks/<int:pk>/', AsyncTaskView.as_view({
+        'get': 'retrieve',
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    }, detail=True)),
+    path('tasks/<int:pk>/complete/', AsyncTaskView.as_view({'post': 'complete'}, detail=True)),
+    path('tasks/<int:pk>/activate/', AsyncTaskView.as_view({'post': 'activate'}, detail=True)),
+]
+
+if settings.TASKS_ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + sync_urlpatterns
+else:
+    urlpatterns = sync_urlpatterns
@@ -1,16 +1,39 @@
 
 import logging
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import SAFE_METHODS, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
 
+from .cache import get_task_cache, invalidate_task_cache, invalidation_batch
+from .conditional import (
+    conditional_response, get_content_validators, get_detail_validators,
+    get_instance_validators, get_list_validators, set_validator_headers,
+)
+from .changes import get_changes
+from .counters import get_daily_counts, get_status_counts
+from .metrics import REGISTRY
 from .models import Task, TaskStatus
-from .serializers import TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer
-from .filters import TaskFilter
+from .serializers import (
+    TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer, TaskListFastSerializer,
+)
+from .export import EXPORT_STREAMS, QUERY_FIELDS
+from .filters import TaskFilter, TaskOrderingFilter, TaskSearchFilter
+from .idempotency import idempotent
 from .pagination import TaskPagination
+from .query_budget import query_budget
+from .routers import reads_from_primary, replica_reads
+from .sqlite import run_write
+from .write_behind import get_write_behind_queue, prefers_async, resolve_handle
+from .renderers import CSVRenderer, NDJSONRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +53,60 @@ class TaskViewSet(viewsets.ModelViewSet):
     - GET /api/tasks/completed/ - список завершенных задач
     - POST /api/tasks/{id}/complete/ - завершить задачу
     - POST /api/tasks/{id}/activate/ - активировать задачу
+
+    Пакетные операции (до TASKS_BULK_MAX_ITEMS элементов, одна транзакция):
+    - POST /api/tasks/bulk/ - создание списка задач
+    - PATCH /api/tasks/bulk/ - частичное обновление списка задач (с полем id)
+    - DELETE /api/tasks/bulk/ - удаление задач по списку id
+
+    Массовая смена статуса (один UPDATE ... WHERE по фильтрам TaskFilter и/или списку ids):
+    - POST /api/tasks/bulk-complete/ - завершить подходящие задачи
+    - POST /api/tasks/bulk-activate/ - активировать подходящие задачи
+
+    Выгрузка (поток, учитывает фильтры и сортировку списка):
+    - GET /api/tasks/export/?format=ndjson|csv - все подходящие задачи
+
+    Лента изменений для синхронизации (задачи, измененные и удаленные после токена):
+    - GET /api/tasks/changes/?since=<token>&limit= - порция изменений и новый токен
+
+    Статистика (счетчики, поддерживаемые триггерами БД):
+    - GET /api/tasks/stats/ - количество задач по статусам
+    - GET /api/tasks/stats/?by_day=true&date_from=&date_to= - и по дням создания (UTC)
+
+    Отложенное создание (TASKS_WRITE_BEHIND, tasks.write_behind):
+    - POST /api/tasks/ с Prefer: respond-async - 202 и ключ, задача пишется пачкой
+    - GET /api/tasks/accepted/{handle}/ - состояние и id созданной задачи
+
+    POST /api/tasks/, /complete/ и /activate/ с заголовком Idempotency-Key
+    выполняются один раз, повтор получает сохраненный ответ (tasks.idempotency).
+
+    Ответы на чтение содержат ETag (задачи - и Last-Modified) и поддерживают условные
+    запросы (304 Not Modified), PUT/PATCH учитывают If-Match (412 при конфликте).
+
+    У действий объявлен бюджет запросов к БД (@query_budget), его проверяют
+    QueryBudgetMiddleware (при DEBUG) и QueryBudgetClient в тестах.
     """
     queryset = Task.objects.all()
     permission_classes = [AllowAny]  # Для тестового задания разрешаем доступ всем
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, TaskOrderingFilter]
     filterset_class = TaskFilter
     search_fields = ['title']
     ordering_fields = ['created_at', 'updated_at', 'title', 'status']
     ordering = ['-created_at']
     pagination_class = TaskPagination
+    status_actions = {'active': TaskStatus.ACTIVE, 'completed': TaskStatus.COMPLETED}
+    # Действия, чтения которых могут идти на реплики (tasks.routers.ReplicaRouter)
+    replica_actions = ('list', 'retrieve', 'active', 'completed')
+    # ETag списка по телу ответа (выставляет _read_response, см. finalize_response)
+    etag_from_content = False
+
+    def dispatch(self, request, *args, **kwargs):
+        """Обработка запроса; безопасные действия из replica_actions читают с реплик"""
+        action = self.action_map.get(request.method.lower()) if self.action_map else None
+        if request.method == 'HEAD' and action is None:
+            action = self.action_map.get('get')
+        with replica_reads(action in self.replica_actions and request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия"""
@@ -51,6 +119,13 @@ class TaskViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Получние queryset с возможностью фильтрации"""
         queryset = super().get_queryset()
+        # Построение схемы OpenAPI без запроса (build_openapi_schema)
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset
+
+        # Блокировка строки на время проверки If-Match и сохранения
+        if self.action in ('update', 'partial_update'):
+            queryset = queryset.select_for_update()
         
         # Дополнительная фильтрация по статусу через query параметры
         status_filter = self.request.query_params.get('status', None)
@@ -59,13 +134,110 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @query_budget(4)  # с ?search в режиме fulltext: проверка таблицы FTS, один раз на процесс
+    def list(self, request, *args, **kwargs):
+        """Список задач (условный GET и кэширование ответа)"""
+        return self._read_response(request, self._list_response)
+
+    @query_budget(2)
+    def retrieve(self, request, *args, **kwargs):
+        """Получение задачи по ID (условный GET и кэширование ответа)"""
+        return self._read_response(request, super().retrieve, *args, **kwargs)
+
+    def get_read_queryset(self):
+        """Queryset, по которому строится ответ текущего действия чтения"""
+        if self.action in self.status_actions:
+            return self.queryset.filter(status=self.status_actions[self.action])
+        return self.filter_queryset(self.get_queryset())
+
+    def get_count_statuses(self):
+        """
+        Статусы, сумма счетчиков которых равна количеству строк списка
+        (для ?count=estimate), или None, если заданы другие фильтры.
+        """
+        if self.action in self.status_actions:
+            return [self.status_actions[self.action]]
+        filter_params = set(TaskFilter.base_filters) | {TaskSearchFilter.search_param}
+        used = {name for name in filter_params if self.request.query_params.get(name)}
+        if not used:
+            return list(TaskStatus.values)
+        if used == {'status'}:
+            return [self.request.query_params['status']]
+        return None
+
+    def get_validators(self, request):
+        """
+        ETag и Last-Modified задачи или ETag списка до выборки ответа. Агрегат
+        по всему списку выполняется только в режиме страниц с точным количеством
+        (COUNT там и так нужен); для ?count=false, ?count=estimate и режима курсора
+        возвращается None - ETag строится по телу ответа в finalize_response.
+        """
+        if self.detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return get_detail_validators(self.get_read_queryset(), self.kwargs[lookup_url_kwarg])
+        if self.paginator.is_cursor_mode(request) or self.paginator.get_count_mode(request) != 'exact':
+            return None
+        return get_list_validators(self.get_read_queryset(), request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Для списков без агрегата - ETag и 304 по отрендеренному телу ответа"""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag_from_content and response.status_code == status.HTTP_200_OK:
+            response.render()
+            validators = get_content_validators(response.content)
+            not_modified = conditional_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+            set_validator_headers(response, validators)
+        return response
+
+    def _read_response(self, request, handler, *args, **kwargs):
+        """
+        Ответ на чтение: 304 по валидаторам из кэша (или ETag/Last-Modified
+        задачи, агрегата списка), затем кэш, затем вызов обработчика с
+        сохранением результата в кэш. Список без агрегата получает ETag по телу
+        ответа после рендеринга (finalize_response). Ответ, прочитанный с реплики, в кэш не сохраняется: отстающая реплика
+        не должна отдавать устаревшие данные закрепленным за default клиентам.
+        """
+        cache = get_task_cache()
+        key = entry = None
+        if cache is not None:
+            key = cache.make_key(request, self.action, kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+            entry = cache.get(key)
+        # Валидаторы хранятся вместе с ответом, попадание в кэш не требует запросов к БД
+        validators = entry['validators'] if entry is not None else self.get_validators(request)
+        if validators is not None:
+            not_modified = conditional_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        if entry is not None:
+            response = Response(entry['data'], headers={'X-Cache': 'HIT'})
+        else:
+            # До обработчика: запись в нем закрепила бы контекст, хотя чтения до нее шли с реплики
+            cacheable = cache is not None and reads_from_primary()
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if cacheable:
+                cache.set(key, {'data': response.data, 'validators': validators})
+                response['X-Cache'] = 'MISS'
+        if validators is None:
+            self.etag_from_content = not self.detail
+            return response
+        return set_validator_headers(response, validators)
+
+    @query_budget(5)  # с Idempotency-Key: поиск ключа и сохранение ответа в транзакции
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Создание новой задачи"""
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            task = serializer.save()
-            logger.info(f'Создана новая задача: {task.id} - {task.title}')
+            if prefers_async(request):
+                return self._accepted_response(request, serializer.validated_data)
+            task = run_write(serializer.save)
+            logger.info('Создана новая задача: %s - %s', task.id, task.title)
             
             response_serializer = TaskSerializer(task)
             return Response(
@@ -73,77 +245,397 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_201_CREATED
             )
         except Exception as e:
-            logger.error(f'Ошибка при создании задачи: {str(e)}')
+            logger.error('Ошибка при создании задачи: %s', e)
             raise
 
+    def _accepted_response(self, request, validated_data):
+        """Постановка задачи в очередь отложенного создания, ответ 202 с ключом"""
+        handle = get_write_behind_queue().submit(validated_data)
+        logger.debug('Задача поставлена в очередь создания: %s', handle)
+        url = request.build_absolute_uri(reverse('task-accepted', kwargs={'handle': handle}))
+        return Response(
+            {'handle': str(handle), 'status': 'pending', 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url, 'Preference-Applied': 'respond-async'},
+        )
+
+    @query_budget(1)
+    @action(detail=False, methods=['get'], url_path=r'accepted/(?P<handle>[0-9a-f-]{36})')
+    def accepted(self, request, handle=None):
+        """
+        Состояние отложенного создания по ключу из ответа 202: pending (202),
+        created с id задачи или failed с ошибкой записи
+        """
+        try:
+            handle = uuid.UUID(handle)
+        except ValueError:
+            raise Http404
+        state = resolve_handle(handle)
+        if state is None:
+            raise Http404
+        state, value = state
+        data = {'handle': str(handle), 'status': state}
+        if state == 'pending':
+            return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '1'})
+        if state == 'created':
+            data['id'] = value
+            return Response(data, headers={'Location': reverse('task-detail', kwargs={'pk': value})})
+        data['error'] = value
+        return Response(data)
+
+    @query_budget(4)
     def update(self, request, *args, **kwargs):
         """Полное обновление задчи"""
         try:
             partial = kwargs.pop('partial', False)
-            instance = self.get_object()
-            serializer = self.get_serializer(instance, data=request.data, partial=partial)
-            serializer.is_valid(raise_exception=True)
-            task = serializer.save()
-            logger.info(f'Обновлена задача: {task.id} - {task.title}')
+
+            def save():
+                with transaction.atomic():
+                    instance = self.get_object()
+                    # Оптимистичная блокировка: If-Match с ETag из предыдущего ответа
+                    precondition = conditional_response(request, get_instance_validators(instance))
+                    if precondition is not None:
+                        return precondition
+                    serializer = self.get_serializer(instance, data=request.data, partial=partial)
+                    serializer.is_valid(raise_exception=True)
+                    return serializer.save()
+
+            task = run_write(save)
+            if not isinstance(task, Task):
+                # Ответ 412 из проверки If-Match
+                return task
+            logger.info('Обновлена задача: %s - %s', task.id, task.title)
             
             response_serializer = TaskSerializer(task)
-            return Response(response_serializer.data)
+            response = Response(response_serializer.data)
+            return set_validator_headers(response, get_instance_validators(task))
         except Exception as e:
-            logger.error(f'Ошибка при обновлении задачи: {str(e)}')
+            logger.error('Ошибка при обновлении задачи: %s', e)
             raise
 
+    @query_budget(4)
+    def partial_update(self, request, *args, **kwargs):
+        """Частичное обновление задачи"""
+        return super().partial_update(request, *args, **kwargs)
+
+    @query_budget(2)
     def destroy(self, request, *args, **kwargs):
         """Удаление задачи"""
         try:
             instance = self.get_object()
             task_id = instance.id
             task_title = instance.title
-            instance.delete()
-            logger.info(f'Удалена задача: {task_id} - {task_title}')
+            run_write(instance.delete)
+            logger.info('Удалена задача: %s - %s', task_id, task_title)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
-            logger.error(f'Ошибка при удалении задачи: {str(e)}')
+            logger.error('Ошибка при удалении задачи: %s', e)
             raise
 
+    @query_budget(12, max_repeats=8)
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """Пакетное создание, обновление и удаление задач"""
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Ожидается список элементов'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > settings.TASKS_BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'Не более {settings.TASKS_BULK_MAX_ITEMS} элементов в одном запросе'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.method == 'POST':
+            results = self._bulk_create(request.data)
+            success_status = status.HTTP_201_CREATED
+        elif request.method == 'PATCH':
+            results = self._bulk_update(request.data)
+            success_status = status.HTTP_200_OK
+        else:
+            results = self._bulk_destroy(request.data)
+            success_status = status.HTTP_200_OK
+
+        failed = sum(1 for item in results if item['status'] == 'error')
+        return Response(
+            {'succeeded': len(results) - failed, 'failed': failed, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if failed else success_status
+        )
+
+    def _bulk_create(self, items):
+        """Создание задач одним bulk_create"""
+        serializer = TaskCreateSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        tasks = []
+        for index, (data, errors) in enumerate(serializer.validated_data):
+            if errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors})
+            else:
+                task = Task(**data)
+                tasks.append(task)
+                results.append({'index': index, 'status': 'created', 'task': task})
+
+        run_write(transaction.atomic(Task.objects.bulk_create), tasks)
+        invalidate_task_cache()
+        logger.info('Пакетно создано задач: %s', len(tasks))
+        return self._bulk_results(results)
+
+    def _bulk_update(self, items):
+        """Частичное обновление задач одним bulk_update"""
+        serializer = TaskUpdateSerializer(data=items, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        results, tasks = run_write(self._bulk_update_rows, serializer.validated_data, ids)
+        invalidate_task_cache()
+        logger.info('Пакетно обновлено задач: %s', len(tasks))
+        return self._bulk_results(results)
+
+    @transaction.atomic
+    def _bulk_update_rows(self, validated_data, ids):
+        """Обновление строк пакета под блокировкой, возвращает (результаты, обновленные задачи)"""
+        instances = Task.objects.select_for_update().in_bulk(
+            [task_id for task_id in ids if isinstance(task_id, int)]
+        )
+        now = timezone.now()
+        results = []
+        tasks = {}
+        fields = {'updated_at'}
+        for index, (data, errors) in enumerate(validated_data):
+            task_id = ids[index]
+            if errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors})
+                continue
+            error = self._bulk_id_error(task_id, instances, tasks)
+            if error:
+                results.append({'index': index, 'status': 'error', 'errors': {'id': [error]}})
+                continue
+            task = instances[task_id]
+            for field, value in data.items():
+                setattr(task, field, value)
+                fields.add(field)
+            task.updated_at = now
+            tasks[task_id] = task
+            results.append({'index': index, 'status': 'updated', 'task': task})
+
+        if tasks:
+            Task.objects.bulk_update(list(tasks.values()), sorted(fields))
+        return results, tasks
+
+    def _bulk_destroy(self, items):
+        """Удаление задач одним DELETE ... WHERE id IN (...)"""
+        with invalidation_batch():
+            results, deleted = run_write(self._bulk_destroy_rows, items)
+        logger.info('Пакетно удалено задач: %s', len(deleted))
+        return results
+
+    @transaction.atomic
+    def _bulk_destroy_rows(self, items):
+        """Удаление строк пакета, возвращает (результаты, удаленные id)"""
+        existing = set(
+            Task.objects.filter(
+                id__in=[task_id for task_id in items if isinstance(task_id, int)]
+            ).values_list('id', flat=True)
+        )
+        results = []
+        deleted = {}
+        for index, task_id in enumerate(items):
+            error = self._bulk_id_error(task_id, existing, deleted)
+            if error:
+                results.append({'index': index, 'status': 'error', 'errors': {'id': [error]}})
+                continue
+            deleted[task_id] = True
+            results.append({'index': index, 'status': 'deleted', 'id': task_id})
+
+        if deleted:
+            Task.objects.filter(id__in=list(deleted)).delete()
+        return results, deleted
+
+    def _bulk_id_error(self, task_id, existing, processed):
+        """Проверка id элемента пакетного запроса"""
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            return 'Требуется целочисленный id задачи'
+        if task_id in processed:
+            return 'Повторяющийся id в запросе'
+        if task_id not in existing:
+            return 'Задача не найдена'
+        return None
+
+    def _bulk_results(self, results):
+        """Сериализация успешно обработанных задач в результатах пакета"""
+        for item in results:
+            task = item.pop('task', None)
+            if task is not None:
+                item['data'] = TaskSerializer(task).data
+        return results
+
+    @query_budget(1)
+    @action(detail=False, methods=['post'], url_path='bulk-complete')
+    def bulk_complete(self, request):
+        """Завершить все задачи, подходящие под фильтр"""
+        return self._bulk_set_status(request, TaskStatus.COMPLETED)
+
+    @query_budget(1)
+    @action(detail=False, methods=['post'], url_path='bulk-activate')
+    def bulk_activate(self, request):
+        """Активировать все задачи, подходящие под фильтр"""
+        return self._bulk_set_status(request, TaskStatus.ACTIVE)
+
+    @staticmethod
+    def _update_status(queryset, new_status):
+        # Время изменения берется в потоке писателя: ожидание в очереди не должно
+        # отодвигать updated_at от фиксации (лента изменений, SETTLE_SECONDS)
+        return queryset.update(status=new_status, updated_at=timezone.now())
+
+    def _bulk_set_status(self, request, new_status):
+        """Смена статуса набора задач одним UPDATE ... WHERE"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if ids is not None and (
+            not isinstance(ids, list)
+            or not all(isinstance(task_id, int) and not isinstance(task_id, bool) for task_id in ids)
+        ):
+            return Response(
+                {'ids': ['Ожидается список целочисленных id']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filter_params = set(TaskFilter.base_filters) | {TaskSearchFilter.search_param}
+        if ids is None and not filter_params.intersection(request.query_params):
+            # Защита от случайного изменения всей таблицы
+            return Response(
+                {'detail': 'Укажите фильтры в query параметрах или список ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        updated = run_write(self._update_status, queryset.exclude(status=new_status), new_status)
+        invalidate_task_cache()
+        logger.info('Статус %s установлен для задач: %s', new_status, updated)
+        return Response({'updated': updated})
+
+    @query_budget(1)
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        renderer_classes=[NDJSONRenderer, CSVRenderer]
+    )
+    def export(self, request):
+        """Потоковая выгрузка задач в NDJSON (по умолчанию) или CSV"""
+        export_format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*QUERY_FIELDS).iterator(
+            chunk_size=settings.TASKS_EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            EXPORT_STREAMS[export_format](rows),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        logger.info('Запущена выгрузка задач в формате %s', export_format)
+        return response
+
+    @query_budget(2)
+    @action(detail=False, methods=['get'], url_path='stats')
+    def stats(self, request):
+        """Количество задач по статусам (и по дням создания) из счетчиков"""
+        counts = get_status_counts()
+        data = {'total': sum(counts.values()), 'by_status': counts}
+        if request.query_params.get('by_day') in ('true', '1'):
+            dates = {}
+            for param in ('date_from', 'date_to'):
+                value = request.query_params.get(param)
+                try:
+                    dates[param] = parse_date(value) if value else None
+                except ValueError:
+                    dates[param] = None
+                if value and dates[param] is None:
+                    return Response(
+                        {param: ['Ожидается дата в формате YYYY-MM-DD']},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            data['by_day'] = get_daily_counts(**dates)
+        return Response(data)
+
+    @query_budget(2)
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """Задачи, созданные, измененные или удаленные после токена since"""
+        config = settings.TASKS_CHANGES
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = config['BATCH_SIZE']
+        limit = min(max(limit, 1), config['MAX_BATCH_SIZE'])
+        return Response(get_changes(request.query_params.get('since') or None, limit))
+
+    @query_budget(3)
     @action(detail=False, methods=['get'], url_path='active')
     def active(self, request):
         """Получить список активных задач"""
-        active_tasks = self.queryset.filter(status=TaskStatus.ACTIVE)
-        page = self.paginate_queryset(active_tasks)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(active_tasks, many=True)
-        return Response(serializer.data)
+        return self._read_response(request, self._list_response)
 
+    @query_budget(3)
     @action(detail=False, methods=['get'], url_path='completed')
     def completed(self, request):
         """Получить список завершенных задач"""
-        completed_tasks = self.queryset.filter(status=TaskStatus.COMPLETED)
-        page = self.paginate_queryset(completed_tasks)
+        return self._read_response(request, self._list_response)
+
+    def _list_response(self, request):
+        """Страница списка задач для list, active и completed"""
+        queryset = self.get_read_queryset()
+        if settings.TASKS_FAST_LIST_SERIALIZER:
+            # Кортежи вместо экземпляров модели, результат совпадает с TaskSerializer
+            queryset = queryset.values_list(*TaskListFastSerializer.query_fields, named=True)
+            serializer_class = TaskListFastSerializer
+        else:
+            serializer_class = self.get_serializer
+        page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            serializer = serializer_class(page, many=True)
             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(completed_tasks, many=True)
+        serializer = serializer_class(queryset, many=True)
         return Response(serializer.data)
 
+    @query_budget(6)  # с Idempotency-Key, как у create
     @action(detail=True, methods=['post'], url_path='complete')
+    @idempotent
     def complete(self, request, pk=None):
         """Завершить задачу"""
         task = self.get_object()
         task.status = TaskStatus.COMPLETED
-        task.save()
-        logger.info(f'Задача {task.id} помечена как завершенная')
+        run_write(task.save, update_fields=['status', 'updated_at'])
+        logger.info('Задача %s помечена как завершенная', task.id)
         serializer = self.get_serializer(task)
         return Response(serializer.data)
 
+    @query_budget(6)
     @action(detail=True, methods=['post'], url_path='activate')
+    @idempotent
     def activate(self, request, pk=None):
         """Активировать задачу"""
         task = self.get_object()
         task.status = TaskStatus.ACTIVE
-        task.save()
-        logger.info(f'Задача {task.id} помечена как активная')
+        run_write(task.save, update_fields=['status', 'updated_at'])
+        logger.info('Задача %s помечена как активная', task.id)
         serializer = self.get_serializer(task)
         return Response(serializer.data)
 
+
+
+def prometheus_metrics(request):
+    """
+    Гистограммы PerformanceMiddleware в текстовом формате Prometheus.
+    Только при METRICS_ENABLED и только с адресов METRICS_ALLOWED_IPS.
+    """
+    perf = settings.TASKS_PERF
+    if not perf['METRICS_ENABLED'] or request.META.get('REMOTE_ADDR') not in perf['METRICS_ALLOWED_IPS']:
+        raise Http404
+    return HttpResponse(
+        REGISTRY.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
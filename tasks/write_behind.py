@@ -0,0 +1,279 @@
+
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .cache import invalidate_task_cache
+from .changes import exceeds_settle_window
+from .models import Task
+from .sqlite import run_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'FLUSH_MS': 20,
+    'BATCH_SIZE': 500,
+    'MAX_PENDING': 10000,
+    'CACHE': 'default',
+    'STATE_TTL': 86400,
+}
+
+# Состояние ключа в кэше: {'status': 'pending'} или {'status': 'failed', 'error': ...}
+STATE_KEY_PREFIX = 'tasks:write-behind:'
+
+
+def get_config():
+    return {**DEFAULTS, **settings.TASKS_WRITE_BEHIND}
+
+
+def get_state_cache():
+    """Кэш CACHES[TASKS_WRITE_BEHIND['CACHE']] с состояниями ключей (pending и failed)"""
+    return caches[get_config()['CACHE']]
+
+
+def state_key(handle):
+    return f'{STATE_KEY_PREFIX}{handle}'
+
+
+class WriteBehindQueueFull(APIException):
+    """Очередь отложенного создания заполнена или останавливается"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Очередь создания задач заполнена, повторите запрос позже'
+    default_code = 'write_behind_queue_full'
+    # Retry-After (секунды) в ответе exception_handler DRF
+    wait = 1
+
+
+def prefers_async(request):
+    """Запрос с Prefer: respond-async при включенном TASKS_WRITE_BEHIND"""
+    if not settings.TASKS_WRITE_BEHIND['ENABLED']:
+        return False
+    preferences = request.headers.get('Prefer', '')
+    return any(
+        preference.split(';')[0].strip().lower() == 'respond-async'
+        for preference in preferences.split(',')
+    )
+
+
+class WriteBehindQueue:
+    """
+    Отложенное создание задач: запрос кладет проверенные данные в ограниченную
+    очередь и сразу получает ключ, фоновый поток пишет накопленное одним
+    bulk_create в одной транзакции - раз в flush_interval секунд или по
+    batch_size задач. Вместо INSERT и COMMIT на каждый запрос (на SQLite - по
+    очереди за блокировкой записи) пачка фиксируется одним коммитом.
+
+    Задача создается с полем handle = ключ, по нему ее находит любой процесс.
+    Пока задача в очереди (pending) и после ошибки записи (failed) состояние
+    ключа хранится в кэше states (Django cache) state_ttl секунд: с общим
+    кэшем (Redis, Memcached) его видят все процессы, с LocMemCache - только этот.
+
+    При заполнении очереди submit бросает WriteBehindQueueFull (503 с Retry-After).
+    stop() записывает оставшееся в очереди, вызывается и при завершении процесса.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=0.02, max_pending=10000, states=None,
+                 state_ttl=86400, name='tasks-write-behind'):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.items = queue.Queue(max_pending)
+        self.states = states if states is not None else get_state_cache()
+        self.state_ttl = state_ttl
+        self.start_lock = threading.Lock()
+        self.thread = None
+        self.closed = False
+
+    def submit(self, data):
+        """
+        Постановка validated_data TaskCreateSerializer в очередь, возвращает ключ (UUID).
+        Внутри транзакции (например, запрос с Idempotency-Key) задача ставится в
+        очередь после ее фиксации: при откате задача не создается.
+        """
+        self.start()
+        if self.items.full():
+            raise WriteBehindQueueFull()
+        handle = uuid.uuid4()
+        transaction.on_commit(lambda: self.enqueue(handle, data))
+        return handle
+
+    def enqueue(self, handle, data):
+        # До постановки в очередь: поток может записать задачу раньше, чем вернется put
+        self.states.set(state_key(handle), {'status': 'pending'}, self.state_ttl)
+        try:
+            self.items.put_nowait((handle, data))
+        except queue.Full:
+            # Очередь заполнилась между проверкой в submit и фиксацией транзакции
+            self.states.set(
+                state_key(handle), {'status': 'failed', 'error': WriteBehindQueueFull.default_detail},
+                self.state_ttl,
+            )
+
+    def get_error(self, handle):
+        """Текст ошибки записи задачи с ключом handle (None - ошибки не было или она забыта)"""
+        return get_handle_state(handle, self.states).get('error')
+
+    def start(self):
+        with self.start_lock:
+            if self.closed:
+                raise WriteBehindQueueFull()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.work, name=self.name, daemon=True)
+                self.thread.start()
+
+    def work(self):
+        while True:
+            batch = [self.items.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.items.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            try:
+                self.write_batch([item for item in batch if item is not None])
+            finally:
+                for _ in batch:
+                    self.items.task_done()
+            if stop:
+                return
+
+    def write_batch(self, items):
+        """
+        Запись пачки (ключ, данные) одним bulk_create. Если пачка не записалась,
+        задачи пишутся по одной: ошибка остается только у сбойных.
+        """
+        if not items:
+            return
+        tasks = [Task(handle=handle, **data) for handle, data in items]
+        failed = {}
+        started = time.monotonic()
+        try:
+            run_write(transaction.atomic(Task.objects.bulk_create), tasks)
+        except DatabaseError as exc:
+            logger.warning('Пачка из %d задач не записана, запись по одной: %s', len(tasks), exc)
+            for task in tasks:
+                try:
+                    run_write(task.save, force_insert=True)
+                except DatabaseError as exc:
+                    failed[task.handle] = str(exc)
+        except Exception as exc:
+            logger.exception('Ошибка записи очереди создания задач')
+            failed = {task.handle: str(exc) for task in tasks}
+        finally:
+            # Соединение потока живет по тем же правилам CONN_MAX_AGE, что и в запросах
+            connection.close_if_unusable_or_obsolete()
+
+        elapsed = time.monotonic() - started
+        if exceeds_settle_window(elapsed):
+            logger.warning(
+                'Пачка из %d задач записывалась %.1f c, дольше TASKS_CHANGES_SETTLE_SECONDS: '
+                'лента изменений может пропустить задачи пачки', len(tasks), elapsed
+            )
+        if len(failed) < len(tasks):
+            invalidate_task_cache()
+        try:
+            self.states.delete_many([state_key(handle) for handle, _ in items if handle not in failed])
+            self.states.set_many({
+                state_key(handle): {'status': 'failed', 'error': error} for handle, error in failed.items()
+            }, self.state_ttl)
+        except Exception:
+            # Задачи уже в БД, без кэша ключи разрешаются по полю handle
+            logger.exception('Не удалось сохранить состояние ключей очереди создания')
+        if failed:
+            logger.error('Не записано задач из очереди создания: %d', len(failed))
+        logger.debug('Записано задач из очереди создания: %d', len(tasks) - len(failed))
+
+    def join(self):
+        """Ожидание записи всех поставленных в очередь задач"""
+        self.items.join()
+
+    def stop(self, timeout=None):
+        """Запись оставшихся в очереди задач и остановка потока; новые задачи не принимаются"""
+        with self.start_lock:
+            self.closed = True
+            thread, self.thread = self.thread, None
+        if thread is not None and thread.is_alive():
+            self.items.put(None)
+            thread.join(timeout)
+        # Задачи, поставленные одновременно с остановкой, записываются здесь же
+        leftovers = []
+        while True:
+            try:
+                leftovers.append(self.items.get_nowait())
+            except queue.Empty:
+                break
+        self.write_batch([item for item in leftovers if item is not None])
+
+
+_write_behind_queue = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind_queue():
+    global _write_behind_queue
+    with _write_behind_lock:
+        if _write_behind_queue is None:
+            config = get_config()
+            _write_behind_queue = WriteBehindQueue(
+                batch_size=config['BATCH_SIZE'],
+                flush_interval=config['FLUSH_MS'] / 1000,
+                max_pending=config['MAX_PENDING'],
+                states=caches[config['CACHE']],
+                state_ttl=config['STATE_TTL'],
+            )
+            # Graceful shutdown: очередь дописывается до выхода из процесса
+            atexit.register(_write_behind_queue.stop)
+        return _write_behind_queue
+
+
+def get_handle_state(handle, states=None):
+    """Состояние ключа из кэша: {'status': 'pending'}, {'status': 'failed', 'error': ...} или {}"""
+    if states is None:
+        states = get_state_cache()
+    return states.get(state_key(handle)) or {}
+
+
+def resolve_handle(handle):
+    """
+    Состояние отложенного создания по ключу: ('pending', None), ('created', id задачи),
+    ('failed', текст ошибки) или None, если ключ неизвестен (или его состояние
+    истекло через TASKS_WRITE_BEHIND['STATE_TTL'])
+    """
+    # Сначала БД: задача может быть уже записана, а состояние в кэше - еще не обновлено
+    task_id = Task.objects.filter(handle=handle).values_list('id', flat=True).first()
+    if task_id is not None:
+        return 'created', task_id
+    state = get_handle_state(handle)
+    if state.get('status') == 'pending':
+        return 'pending', None
+    if state.get('status') == 'failed':
+        return 'failed', state['error']
+    return None
+
+
+def reset_write_behind_queue(*, setting, **kwargs):
+    global _write_behind_queue
+    if setting == 'TASKS_WRITE_BEHIND':
+        with _write_behind_lock:
+            write_queue, _write_behind_queue = _write_behind_queue, None
+        if write_queue is not None:
+            write_queue.stop()
+
+
+setting_changed.connect(reset_write_behind_queue)